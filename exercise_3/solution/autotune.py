@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional
+
+# Rough costs of the parallel machinery, used to decide whether parallel execution pays off at all
+# Fixed cost of one parallel call in the parent process, e.g. for setting up and collecting the tasks
+CALL_OVERHEAD_SECONDS = 1e-3
+# Cost of submitting one chunk to a worker and receiving its result
+TASK_OVERHEAD_SECONDS = 1e-4
+# Cost of sending one entry to a worker and its result back if the data is pickled
+TRANSFER_SECONDS_PER_ENTRY = 2e-6
+
+# The number of entries evaluated to estimate the cost of a function
+PILOT_SIZE = 16
+
+# Inputs with at most this many entries are evaluated serially by the "auto" backend
+AUTO_SERIAL_MAX_LENGTH = 64
+
+# The number of measured costs kept. The least recently used ones are forgotten first,
+# so that functions created anew for every call, e.g. lambdas, neither grow the cache nor are kept alive forever
+COST_CACHE_SIZE = 256
+
+
+class ExecutionPlan(NamedTuple):
+    """The decision how to split a parallel call
+
+    Attributes
+    ----------
+    serial: bool
+        If True, the call should be evaluated in the calling process without any workers
+    num_workers: int
+        The number of workers to keep busy at the same time
+    num_chunks: int
+        The number of chunks the data is split into. Usually several per worker, so that a slow chunk does not stall the whole call.
+    chunk_size: int
+        The approximate number of entries per chunk
+    """
+    serial: bool
+    num_workers: int
+    num_chunks: int
+    chunk_size: int
+
+
+def static_plan(total_length: int, max_workers: int, min_executor_data_count: int) -> ExecutionPlan:
+    """Function to split the data into one equal chunk per executor, each with at least `min_executor_data_count` entries
+
+    Parameters
+    ----------
+    total_length: int
+        The number of entries to be processed
+    max_workers: int
+        The maximum number of workers available
+    min_executor_data_count: int
+        The minimum chunk size of data assigned to each executor process.
+
+    Returns
+    --------
+    ExecutionPlan
+        A plan with as many chunks as workers that never runs serially
+
+    """
+    # We need at least one but at most as many executors as the pool has workers
+    num_executors = max(1, min(max_workers, int(
+        math.floor(total_length/min_executor_data_count))))
+    return ExecutionPlan(False, num_executors, num_executors, math.ceil(total_length/num_executors))
+
+
+def plan_execution(cost_per_entry: float, total_length: int, max_workers: int, chunks_per_worker: int = 4, transfer_seconds_per_entry: float = TRANSFER_SECONDS_PER_ENTRY) -> ExecutionPlan:
+    """Function to choose the number of workers and the chunk size from the estimated cost of the work
+
+    Parameters
+    ----------
+    cost_per_entry: float
+        The estimated time in seconds to process one entry
+    total_length: int
+        The number of entries to be processed
+    max_workers: int
+        The maximum number of workers available
+    chunks_per_worker: int, optional
+        The number of chunks per worker to aim for for load balancing. Default: 4
+    transfer_seconds_per_entry: float, optional
+        The estimated time in seconds to send one entry to a worker and back. 0 if the data is not copied, e.g. with shared memory.
+
+    Returns
+    --------
+    ExecutionPlan
+        The plan with the lowest estimated runtime. Serial if no number of workers is estimated to beat serial execution.
+
+    """
+    total_work = cost_per_entry * total_length
+    serial_plan = ExecutionPlan(True, 1, 1, total_length)
+
+    if total_length == 0 or max_workers < 1:
+        return serial_plan
+
+    best_plan = serial_plan
+    best_time = total_work
+    for num_workers in range(1, max_workers+1):
+        num_chunks = min(total_length, num_workers*chunks_per_worker)
+        # The workers share the work and the transfer, the parent has to submit every chunk itself
+        estimated_time = (total_work + total_length*transfer_seconds_per_entry)/num_workers + \
+            CALL_OVERHEAD_SECONDS + num_chunks*TASK_OVERHEAD_SECONDS
+        if estimated_time < best_time:
+            best_time = estimated_time
+            best_plan = ExecutionPlan(
+                False, num_workers, num_chunks, math.ceil(total_length/num_chunks))
+
+    return best_plan
+
+
+def is_free_threaded() -> bool:
+    """Function to check whether the interpreter runs without the global interpreter lock
+
+    Returns
+    --------
+    bool
+        True on free-threaded CPython builds with the GIL disabled
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def choose_backend(total_length: Optional[int], vectorized: bool = False) -> str:
+    """Function to choose the backend for the "auto" setting from the size and type of the input
+
+    Parameters
+    ----------
+    total_length: int, optional
+        The number of entries to be processed if known
+    vectorized: bool, optional
+        Whether the function is a numpy array kernel. Default: False
+
+    Returns
+    --------
+    str
+        "serial" for tiny inputs, "thread" for numpy kernels or free-threaded interpreters, where threads avoid all pickling, and "process" otherwise
+
+    """
+    if total_length is not None and total_length <= AUTO_SERIAL_MAX_LENGTH:
+        return "serial"
+    # Numpy kernels release the GIL, so threads run them in parallel without copying any data
+    if vectorized or is_free_threaded():
+        return "thread"
+    return "process"
+
+
+_cost_cache: "OrderedDict[Hashable, float]" = OrderedDict()
+_cost_cache_lock = threading.Lock()
+
+
+def get_cost_per_entry(key: Hashable, pilot: Callable[[], int]) -> float:
+    """Function to obtain the estimated time per entry of a function, measuring it with a pilot batch on first use
+
+    The result is cached per `key`, so later calls with the same key do not run the pilot again, as long as it is among the COST_CACHE_SIZE most recently used keys.
+
+    Parameters
+    ----------
+    key: Hashable
+        The cache key, usually the function together with the mode it is evaluated in
+    pilot: Callable[[], int]
+        A function evaluating a small batch of entries and returning the number of entries it evaluated
+
+    Returns
+    --------
+    float
+        The estimated time in seconds to process one entry
+
+    """
+    with _cost_cache_lock:
+        if key in _cost_cache:
+            _cost_cache.move_to_end(key)
+            return _cost_cache[key]
+
+    start = time.perf_counter()
+    num_entries = pilot()
+    end = time.perf_counter()
+    return record_cost_per_entry(key, end-start, num_entries)
+
+
+def record_cost_per_entry(key: Hashable, seconds: float, num_entries: int) -> float:
+    """Function to remember the time measured for a batch of entries that has been evaluated anyway, so that get_cost_per_entry does not run a pilot batch for `key`
+
+    A cost measured before for the same key is kept.
+
+    Parameters
+    ----------
+    key: Hashable
+        The cache key, see get_cost_per_entry
+    seconds: float
+        The time in seconds it took to evaluate the batch
+    num_entries: int
+        The number of entries in the batch
+
+    Returns
+    --------
+    float
+        The estimated time in seconds to process one entry
+
+    """
+    if num_entries == 0:
+        # Nothing has been measured, so there is nothing to remember
+        return 0.0
+
+    with _cost_cache_lock:
+        if key not in _cost_cache:
+            _cost_cache[key] = seconds/num_entries
+            if len(_cost_cache) > COST_CACHE_SIZE:
+                _cost_cache.popitem(last=False)
+        _cost_cache.move_to_end(key)
+        return _cost_cache[key]
+
+
+def clear_cost_cache() -> None:
+    """Function to forget all measured costs, so that the next call of every function runs a pilot batch again"""
+    with _cost_cache_lock:
+        _cost_cache.clear()
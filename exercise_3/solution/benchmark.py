@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import scipy
+from scipy.integrate import trapezoid
+from .map_reduce_parallel import map_parallel, reduce_parallel, map_reduce_parallel
+from .worker_pool import BACKENDS, default_backend, get_default_pool, shutdown_default_pool
+from .ex_3_3 import get_center_derivative, get_trapezoid_integral
+from .ex_3_4 import get_center_derivative_parallel, get_trapezoid_integral_parallel
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where no memory is reported
+    resource = None
+
+# The default sweep, chosen so that a full run takes a few minutes
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_WORKERS = [1, 2, 4]
+# A case counts as a regression if its median runtime grows by more than this fraction compared to the baseline
+DEFAULT_TOLERANCE = 0.1
+
+
+def _square(x: np.float64) -> np.float64:
+    return x*x
+
+
+def _add(x: np.float64, y: np.float64) -> np.float64:
+    return x+y
+
+
+def _make_x(n: int, rng: np.random.Generator) -> Tuple[np.ndarray]:
+    return (rng.exponential(10, (n,)),)
+
+
+def _make_x_y(n: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    return rng.exponential(10, (n,)), rng.standard_normal(n)
+
+
+class BenchmarkCase(NamedTuple):
+    """One benchmarked function together with the reference it is compared to
+
+    Attributes
+    ----------
+    name: str
+        The unique name of the case
+    make_input: Callable[[int, np.random.Generator], tuple]
+        Function creating the arguments for an input size n
+    func: Callable
+        The function to be measured, called with the arguments from `make_input`
+    baseline: str, optional
+        The name of the case with the numpy/scipy reference implementation, if there is one
+    parallel: bool
+        Whether `func` runs on the worker pools, in which case it is measured once for every number of workers
+    """
+    name: str
+    make_input: Callable[[int, np.random.Generator], tuple]
+    func: Callable
+    baseline: Optional[str] = None
+    parallel: bool = True
+
+
+CASES: Dict[str, BenchmarkCase] = {case.name: case for case in [
+    # The numpy/scipy references
+    BenchmarkCase("numpy_square", _make_x, np.square, parallel=False),
+    BenchmarkCase("numpy_sum", _make_x, np.sum, parallel=False),
+    BenchmarkCase("numpy_sum_of_squares", _make_x,
+                  lambda x: np.sum(x*x), parallel=False),
+    BenchmarkCase("numpy_gradient", _make_x_y,
+                  lambda x, y: np.gradient(y, x), parallel=False),
+    BenchmarkCase("scipy_trapezoid", _make_x_y,
+                  lambda x, y: trapezoid(y, x), parallel=False),
+    # The map/reduce functions
+    BenchmarkCase("map_parallel", _make_x,
+                  lambda x: map_parallel(_square, x), "numpy_square"),
+    BenchmarkCase("map_parallel_vectorized", _make_x,
+                  lambda x: map_parallel(np.square, x, vectorized=True), "numpy_square"),
+    BenchmarkCase("reduce_parallel", _make_x,
+                  lambda x: reduce_parallel(_add, _add, x), "numpy_sum"),
+    BenchmarkCase("reduce_parallel_vectorized", _make_x,
+                  lambda x: reduce_parallel(np.add, np.add, x, vectorized=True), "numpy_sum"),
+    BenchmarkCase("map_reduce_parallel", _make_x,
+                  lambda x: map_reduce_parallel(_square, _add, _add, x), "numpy_sum_of_squares"),
+    BenchmarkCase("map_reduce_parallel_vectorized", _make_x,
+                  lambda x: map_reduce_parallel(np.square, np.add, np.add, x, vectorized=True), "numpy_sum_of_squares"),
+    # Exercise 3.3 and 3.4
+    BenchmarkCase("ex_3_3_center_derivative", _make_x_y,
+                  get_center_derivative, "numpy_gradient", parallel=False),
+    BenchmarkCase("ex_3_3_trapezoid_integral", _make_x_y,
+                  get_trapezoid_integral, "scipy_trapezoid", parallel=False),
+    BenchmarkCase("ex_3_4_center_derivative", _make_x_y,
+                  get_center_derivative_parallel, "numpy_gradient"),
+    BenchmarkCase("ex_3_4_trapezoid_integral", _make_x_y,
+                  get_trapezoid_integral_parallel, "scipy_trapezoid"),
+]}
+
+
+def measure(func: Callable, args: tuple, warmup: int = 1, repeat: int = 5) -> List[float]:
+    """Function to measure the runtime of `func`(*args) after some warm-up runs
+
+    The warm-up runs are not measured. They start the worker pools and fill the cost cache of the autotuner, so the measured runs only see the steady state.
+
+    Parameters
+    ----------
+    func: Callable
+        The function to be measured
+    args: tuple
+        The arguments to call `func` with
+    warmup: int, optional
+        The number of unmeasured runs before the measurement. Default: 1
+    repeat: int, optional
+        The number of measured runs. Default: 5
+
+    Returns
+    --------
+    List of float
+        The runtime of each measured run in seconds
+
+    """
+    for _ in range(warmup):
+        func(*args)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        end = time.perf_counter()
+        times.append(end-start)
+    return times
+
+
+def summarize(times: Sequence[float]) -> Dict[str, float]:
+    """Function to reduce a list of runtimes to robust statistics
+
+    Parameters
+    ----------
+    times: Sequence of float
+        The measured runtimes in seconds
+
+    Returns
+    --------
+    Dict[str, float]
+        The median, the first and third quartile, the interquartile range, the minimum and the maximum in seconds
+
+    """
+    q1, median, q3 = np.percentile(times, [25, 50, 75])
+    return {
+        "median": float(median),
+        "q1": float(q1),
+        "q3": float(q3),
+        "iqr": float(q3-q1),
+        "min": float(np.min(times)),
+        "max": float(np.max(times)),
+    }
+
+
+def _get_max_rss_bytes(who: int) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    # macOS reports bytes, Linux KiB
+    return peak if sys.platform == "darwin" else peak*1024
+
+
+def _memory_probe(case_name: str, n: int, seed: int, num_workers: Optional[int], backend: str, connection) -> None:
+    case = CASES[case_name]
+    args = case.make_input(n, np.random.default_rng(seed))
+    if num_workers is not None:
+        _set_num_workers(num_workers)
+
+    with default_backend(backend):
+        peak_before = _get_max_rss_bytes(resource.RUSAGE_SELF)
+        case.func(*args)
+        peak_after = _get_max_rss_bytes(resource.RUSAGE_SELF)
+    # Worker processes only count as children once they have exited
+    shutdown_default_pool()
+    worker_peak = _get_max_rss_bytes(resource.RUSAGE_CHILDREN)
+    connection.send((peak_after-peak_before, worker_peak if worker_peak > 0 else None))
+
+
+def measure_peak_memory(case_name: str, n: int, seed: int, num_workers: Optional[int] = None, backend: str = "auto") -> Dict[str, Optional[int]]:
+    """Function to measure the peak resident memory of one call of a benchmark case, including the worker processes
+
+    The call runs in a fresh process with fresh worker pools, so that the peaks are not those of earlier cases.
+    Unlike traced Python allocations, the resident memory also covers native buffers and shared memory the call touches.
+    As the call is the first one of the process, it includes starting the pools and the pilot batch of the autotuner.
+
+    Parameters
+    ----------
+    case_name: str
+        The name of the case in CASES
+    n: int
+        The input size
+    seed: int
+        The seed of the random input
+    num_workers: int, optional
+        The number of workers of the default pools, if the case is parallel
+    backend: str, optional
+        The backend the call runs on. Default: "auto"
+
+    Returns
+    --------
+    Dict[str, Optional[int]]
+        "peak_rss_bytes": how much the peak resident memory of the calling process grew during the call, beyond the interpreter and the input.
+        "worker_peak_rss_bytes": the peak resident memory of the largest worker process, including its interpreter, or None if no worker process was started.
+        Both are None if the platform does not report resident memory.
+
+    """
+    if resource is None:
+        return {"peak_rss_bytes": None, "worker_peak_rss_bytes": None}
+
+    # A spawned process starts without the pools and the memory of this one
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    probe = context.Process(target=_memory_probe, args=(case_name, n, seed, num_workers, backend, sender))
+    probe.start()
+    sender.close()
+    try:
+        peak_rss, worker_peak_rss = receiver.recv()
+    finally:
+        probe.join()
+    return {"peak_rss_bytes": peak_rss, "worker_peak_rss_bytes": worker_peak_rss}
+
+
+def get_environment() -> Dict[str, Any]:
+    """Function to collect the information about the machine and software needed to compare benchmark results
+
+    Returns
+    --------
+    Dict[str, Any]
+        The host, platform, core count, start method and the versions of python, numpy and scipy
+
+    """
+    return {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "start_method": multiprocessing.get_start_method(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+    }
+
+
+# The kinds of default pools the parallel cases may run on
+_POOL_KINDS = ("thread", "process")
+
+
+def _get_num_workers() -> Dict[str, int]:
+    return {kind: get_default_pool(kind).max_workers for kind in _POOL_KINDS}
+
+
+def _set_num_workers(num_workers: int) -> None:
+    # The parallel functions run on the default pools, so their size is the number of workers used
+    for kind in _POOL_KINDS:
+        get_default_pool(kind).resize(num_workers)
+
+
+def run_benchmarks(case_names: Optional[Sequence[str]] = None, sizes: Sequence[int] = DEFAULT_SIZES, workers: Sequence[int] = DEFAULT_WORKERS, backend: str = "auto", warmup: int = 1, repeat: int = 5, seed: int = 42, log: Callable[[str], None] = print, memory: bool = True) -> Dict[str, Any]:
+    """Function to run a sweep of benchmark cases over input sizes and worker counts
+
+    The baselines of the selected cases are always measured as well, so that every result can report its speedup against them.
+
+    Parameters
+    ----------
+    case_names: Sequence of str, optional
+        The names of the cases in CASES to run. Defaults to all cases
+    sizes: Sequence of int, optional
+        The input sizes to run every case with
+    workers: Sequence of int, optional
+        The numbers of workers to run the parallel cases with
+    backend: str, optional
+        The backend the parallel cases run on, one of "serial", "thread", "process" or "auto". Default: "auto"
+    warmup: int, optional
+        The number of unmeasured runs before each measurement. Default: 1
+    repeat: int, optional
+        The number of measured runs per case, size and worker count. Default: 5
+    seed: int, optional
+        The seed of the random inputs. Default: 42
+    log: Callable[[str], None], optional
+        Function receiving a progress message per measurement. Default: print
+    memory: bool, optional
+        Whether to measure the peak memory of every case as well, see measure_peak_memory. Each measurement starts a new process. Default: True
+
+    Returns
+    --------
+    Dict[str, Any]
+        A JSON serializable report with the environment, the settings and one entry per measurement
+
+    """
+    if case_names is None:
+        case_names = list(CASES)
+    unknown_cases = [name for name in case_names if name not in CASES]
+    if unknown_cases:
+        raise ValueError("Unknown benchmark cases: {}".format(unknown_cases))
+
+    # Baselines first, so that the speedups can be computed right away
+    baseline_names = [CASES[name].baseline for name in case_names
+                      if CASES[name].baseline is not None]
+    selected = [CASES[name] for name in dict.fromkeys(
+        baseline_names + list(case_names))]
+
+    results = []
+    # The sizes of the default pools are changed for the sweep and restored afterwards, so that later calls in this process are not affected
+    previous_num_workers = _get_num_workers()
+    try:
+        with default_backend(backend):
+            for n in sizes:
+                baseline_medians = {}
+                for case in selected:
+                    # Every case sees the same input for one size
+                    args = case.make_input(n, np.random.default_rng(seed))
+                    for num_workers in (workers if case.parallel else [None]):
+                        if num_workers is not None:
+                            _set_num_workers(num_workers)
+
+                        times = measure(case.func, args, warmup, repeat)
+                        entry = {"case": case.name, "n": n,
+                                 "workers": num_workers, "repeat": repeat}
+                        entry.update(summarize(times))
+                        if memory:
+                            entry.update(measure_peak_memory(
+                                case.name, n, seed, num_workers, backend))
+
+                        if case.baseline is None:
+                            baseline_medians[case.name] = entry["median"]
+                        else:
+                            entry["baseline"] = case.baseline
+                            entry["speedup"] = baseline_medians[case.baseline] / \
+                                entry["median"]
+
+                        log("{case:<32} n={n:<10} workers={workers!s:<5} median={median:.3e}s iqr={iqr:.1e}s".format(**entry) +
+                            (" speedup={:.3g}".format(entry["speedup"]) if "speedup" in entry else ""))
+                        results.append(entry)
+    finally:
+        for kind, num_workers in previous_num_workers.items():
+            get_default_pool(kind).resize(num_workers)
+
+    return {
+        "environment": get_environment(),
+        "settings": {"sizes": list(sizes), "workers": list(workers), "backend": backend, "warmup": warmup, "repeat": repeat, "seed": seed},
+        "results": results,
+    }
+
+
+def _result_key(entry: Dict[str, Any]) -> Tuple[str, int, Optional[int]]:
+    return entry["case"], entry["n"], entry["workers"]
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[Dict[str, Any]]:
+    """Function to compare two benchmark reports and flag the cases that got slower
+
+    A measurement only counts as a regression if its median grew by more than `tolerance` and the increase is larger than the
+    interquartile ranges of both runs, so that noisy cases are not flagged by chance.
+
+    Parameters
+    ----------
+    baseline: Dict[str, Any]
+        The saved report to compare against, as returned by run_benchmarks
+    current: Dict[str, Any]
+        The new report
+    tolerance: float, optional
+        The relative slowdown that is still accepted. Default: 0.1
+
+    Returns
+    --------
+    List of Dict[str, Any]
+        One entry per measurement present in both reports with the case, size, workers, both medians, their ratio and whether it is a regression
+
+    """
+    baseline_entries = {_result_key(entry): entry for entry in baseline["results"]}
+
+    comparison = []
+    for entry in current["results"]:
+        key = _result_key(entry)
+        if key not in baseline_entries:
+            continue
+        old = baseline_entries[key]
+        ratio = entry["median"]/old["median"]
+        noise = max(entry["iqr"], old["iqr"])
+        comparison.append({
+            "case": entry["case"], "n": entry["n"], "workers": entry["workers"],
+            "baseline_median": old["median"], "median": entry["median"], "ratio": ratio,
+            "regression": ratio > 1.0 + tolerance and entry["median"]-old["median"] > noise,
+        })
+    return comparison
+
+
+def _print_comparison(comparison: List[Dict[str, Any]]) -> None:
+    for entry in comparison:
+        print("{case:<32} n={n:<10} workers={workers!s:<5} {baseline_median:.3e}s -> {median:.3e}s ({ratio:.2f}x)".format(**entry) +
+              ("  REGRESSION" if entry["regression"] else ""))
+
+
+def _load_report(path: str) -> Dict[str, Any]:
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        sys.argv[0], description="Script to benchmark the map/reduce functions and the exercise 3.3 and 3.4 routines against numpy and scipy")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser(
+        "run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--cases", nargs="+", choices=list(CASES),
+                            help="The cases to run. Defaults to all cases")
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                            help="The input sizes to sweep")
+    run_parser.add_argument("--workers", nargs="+", type=int, default=DEFAULT_WORKERS,
+                            help="The numbers of workers to sweep for the parallel cases")
+    run_parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                            help="The backend of the parallel cases")
+    run_parser.add_argument("--warmup", type=int, default=1,
+                            help="The number of unmeasured runs before each measurement")
+    run_parser.add_argument("--repeat", type=int, default=5,
+                            help="The number of measured runs")
+    run_parser.add_argument("--seed", type=int, default=42,
+                            help="The seed of the random inputs")
+    run_parser.add_argument("--skip-memory", action="store_true",
+                            help="Do not measure the peak memory, which runs every case once more in a new process")
+    run_parser.add_argument("--output", default="benchmark_results.json",
+                            help="The JSON file to write the results to")
+    run_parser.add_argument("--baseline",
+                            help="A saved JSON report to compare the new results against")
+    run_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                            help="The relative slowdown accepted before flagging a regression")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare two saved JSON reports")
+    compare_parser.add_argument("baseline", help="The saved baseline report")
+    compare_parser.add_argument("current", help="The new report")
+    compare_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                                help="The relative slowdown accepted before flagging a regression")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_benchmarks(args.cases, args.sizes, args.workers,
+                                args.backend, args.warmup, args.repeat, args.seed, memory=not args.skip_memory)
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+        if args.baseline is None:
+            sys.exit(0)
+        baseline_report = _load_report(args.baseline)
+        current_report = report
+    else:
+        baseline_report = _load_report(args.baseline)
+        current_report = _load_report(args.current)
+
+    comparison = compare_results(
+        baseline_report, current_report, args.tolerance)
+    _print_comparison(comparison)
+    # A non-zero exit code lets scripts detect regressions
+    sys.exit(1 if any(entry["regression"] for entry in comparison) else 0)
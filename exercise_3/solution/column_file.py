@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import struct
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The layout of a column file:
+#   MAGIC, the length of the header as little-endian uint64, the header as UTF-8 JSON,
+#   then the data of every column contiguously at the offset listed in the header.
+# The header holds the number of rows, the name, data type and offset of every column and optional metadata.
+MAGIC = b"COLFILE1"
+
+# Columns start at multiples of this many bytes, so that their memory maps are aligned for every data type
+ALIGNMENT = 64
+
+_LENGTH_FORMAT = "<Q"
+
+# Anything that can be turned into named columns: a mapping of names to arrays or a structured array
+Columns = Union[Mapping[str, np.ndarray], np.ndarray]
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1)//ALIGNMENT*ALIGNMENT
+
+
+def _get_named_columns(columns: Columns) -> Dict[str, np.ndarray]:
+    if isinstance(columns, np.ndarray):
+        if columns.dtype.names is None:
+            raise ValueError("An array of columns must be a structured array")
+        return {name: columns[name] for name in columns.dtype.names}
+    return {name: np.asarray(values) for name, values in columns.items()}
+
+
+def _check_dtype(name: str, dtype: np.dtype) -> None:
+    # Only data types with a fixed size can be stored and mapped, e.g. no Python objects
+    if dtype.hasobject or dtype.itemsize == 0:
+        logging.error("Column %s has data type %s, which cannot be memory-mapped.", name, dtype)
+        raise ValueError("Column data type not supported")
+
+
+def _check_shape(name: str, values: np.ndarray) -> None:
+    # Every column holds one entry per row, the header has no shapes for the entries
+    if np.ndim(values) != 1:
+        logging.error("Column %s has shape %s, but columns must be one dimensional.", name, np.shape(values))
+        raise ValueError("Column shape not supported")
+
+
+def _build_header(num_rows: int, dtypes: Mapping[str, np.dtype], metadata: Optional[Mapping[str, Any]]) -> Tuple[bytes, Dict[str, Any]]:
+    # The offsets of the columns depend on the length of the header, which in turn depends on the offsets.
+    # Reserving space for the offsets first and growing it until everything fits resolves this
+    reserved = ALIGNMENT
+    while True:
+        columns = []
+        offset = _align(len(MAGIC) + struct.calcsize(_LENGTH_FORMAT) + reserved)
+        for name, dtype in dtypes.items():
+            columns.append({"name": name, "dtype": dtype.descr if dtype.fields is not None else dtype.str, "offset": offset})
+            offset = _align(offset + num_rows*dtype.itemsize)
+        header = {"version": 1, "num_rows": num_rows, "columns": columns, "metadata": dict(metadata or {})}
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) <= reserved:
+            # Padding with spaces keeps the header valid JSON
+            return encoded.ljust(reserved), header
+        reserved = _align(len(encoded))
+
+
+def _read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as source:
+        magic = source.read(len(MAGIC))
+        if magic != MAGIC:
+            logging.error("File %s is not a column file.", path)
+            raise ValueError("Not a column file")
+        length, = struct.unpack(_LENGTH_FORMAT, source.read(struct.calcsize(_LENGTH_FORMAT)))
+        return json.loads(source.read(length).decode("utf-8"))
+
+
+def _get_dtype(descr) -> np.dtype:
+    # Structured data types are stored as their list description, which JSON turns into lists of lists
+    if isinstance(descr, list):
+        return np.dtype([tuple(field) for field in descr])
+    return np.dtype(descr)
+
+
+def create_columns(path: str, num_rows: int, dtypes: Mapping[str, np.dtype], metadata: Optional[Mapping[str, Any]] = None) -> Dict[str, np.memmap]:
+    """Function to create a column file and map its columns for writing
+
+    The columns are filled through the returned memory maps, e.g. block by block, so the file may be much larger than the available memory.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file to create or overwrite
+    num_rows: int
+        The number of entries of every column
+    dtypes: Mapping of str to np.dtype
+        The names and data types of the columns in the order they are stored
+    metadata: Mapping of str to Any, optional
+        JSON serializable information stored in the header
+
+    Raises
+    --------
+    ValueError
+        If a data type has no fixed size, e.g. for Python objects, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    Dict of str to np.memmap
+        The writable one dimensional memory maps of the columns, with num_rows entries each
+
+    See also
+    --------
+    write_columns, open_columns
+
+    """
+    if num_rows < 0:
+        raise ValueError("num_rows must not be negative")
+    dtypes = {name: np.dtype(dtype) for name, dtype in dtypes.items()}
+    for name, dtype in dtypes.items():
+        _check_dtype(name, dtype)
+
+    encoded, header = _build_header(num_rows, dtypes, metadata)
+    end = header["columns"][-1]["offset"] + num_rows*dtypes[header["columns"][-1]["name"]].itemsize if dtypes else len(MAGIC)
+    with open(path, "wb") as target:
+        target.write(MAGIC)
+        target.write(struct.pack(_LENGTH_FORMAT, len(encoded)))
+        target.write(encoded)
+        # The data is left sparse until it is written through the memory maps
+        target.truncate(max(end, target.tell()))
+
+    return _map_columns(path, header, "r+")
+
+
+def _map_columns(path: str, header: Dict[str, Any], mode: str) -> Dict[str, np.memmap]:
+    num_rows = header["num_rows"]
+    columns = {}
+    for column in header["columns"]:
+        dtype = _get_dtype(column["dtype"])
+        if num_rows == 0:
+            # np.memmap cannot map empty ranges
+            columns[column["name"]] = np.empty((0,), dtype=dtype)
+            continue
+        columns[column["name"]] = np.memmap(path, dtype=dtype, mode=mode, offset=column["offset"], shape=(num_rows,))
+    return columns
+
+
+def write_columns(path: str, columns: Columns, metadata: Optional[Mapping[str, Any]] = None) -> None:
+    """Function to store named columns in a column file
+
+    Parameters
+    ----------
+    path: str
+        The path of the file to create or overwrite
+    columns: Mapping of str to np.ndarray or structured np.ndarray
+        The one dimensional columns to store, all of the same length. A structured array must be one dimensional as well
+    metadata: Mapping of str to Any, optional
+        JSON serializable information stored in the header, see read_metadata
+
+    Raises
+    --------
+    ValueError
+        If the columns are not one dimensional, differ in length or have a data type without a fixed size, e.g. Python objects.
+        The file is left untouched in that case.
+
+    See also
+    --------
+    create_columns: For writing files larger than memory block by block
+    open_columns
+
+    """
+    columns = _get_named_columns(columns)
+    # All checks happen before the file is opened, so that an invalid column does not leave a partly written file behind
+    for name, values in columns.items():
+        _check_shape(name, values)
+        _check_dtype(name, values.dtype)
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same length, got lengths {}".format(sorted(lengths)))
+
+    targets = create_columns(path, lengths.pop() if lengths else 0, {name: values.dtype for name, values in columns.items()}, metadata)
+    for name, target in targets.items():
+        target[:] = columns[name]
+        if isinstance(target, np.memmap):
+            target.flush()
+
+
+def open_columns(path: str, mode: str = "r") -> Dict[str, np.memmap]:
+    """Function to open the columns of a column file as memory maps
+
+    Only the header is read, so opening takes constant time and memory independent of the size of the file.
+    The data is read from disk when it is accessed.
+
+    Parameters
+    ----------
+    path: str
+        The path of the column file
+    mode: str, optional
+        "r" to map the columns read-only, "r+" to also write to them, "c" for copy-on-write. Default: "r"
+
+    Raises
+    --------
+    ValueError
+        If the file is not a column file, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    Dict of str to np.memmap
+        The columns by name in the order they are stored
+
+    See also
+    --------
+    write_columns, read_metadata
+
+    """
+    return _map_columns(path, _read_header(path), mode)
+
+
+def read_metadata(path: str) -> Dict[str, Any]:
+    """Function to read the metadata stored in the header of a column file
+
+    Parameters
+    ----------
+    path: str
+        The path of the column file
+
+    Returns
+    --------
+    Dict of str to Any
+        The metadata passed to write_columns or create_columns
+
+    """
+    return _read_header(path)["metadata"]
+
+
+def to_structured(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+    """Function to copy named columns into a structured array with one field per column
+
+    Parameters
+    ----------
+    columns: Mapping of str to np.ndarray
+        The columns, all of the same length
+
+    Returns
+    --------
+    np.ndarray
+        The structured array in memory
+
+    """
+    length = len(next(iter(columns.values()))) if columns else 0
+    result = np.empty((length,), dtype=[(name, values.dtype) for name, values in columns.items()])
+    for name, values in columns.items():
+        result[name] = values
+    return result
@@ -1,9 +1,14 @@
 import numpy as np
 from typing import List, Callable, Sequence, TypeVar, Optional, Union, Tuple
 import matplotlib.pyplot as plt
+# This script is run directly, as its name is not a valid module name, so the loader is imported from the same directory
+from loader import load_columns
+from histogram import Histogram
+from random_arrays import get_normal_array
+from gaussian_fit import fit_normal, fit_normal_histogram
 
 
-def get_random_array(n: Union[int, Tuple[int]], mean: np.float32 = 0.0, sigma: np.float32 = 1.0, ) -> np.ndarray:
+def get_random_array(n: Union[int, Tuple[int]], mean: np.float32 = 0.0, sigma: np.float32 = 1.0, seed: Optional[int] = None) -> np.ndarray:
     """Function to obtain a numpy array of length/shape n filled with normal distributed random numbers with the denoted mean and sigma
 
     Parameters
@@ -14,6 +19,8 @@ def get_random_array(n: Union[int, Tuple[int]], mean: np.float32 = 0.0, sigma: n
         The desired mean of the numbers
     sigma: np.float32, optional
         The desired standard deviation of numbers
+    seed: int, optional
+        The seed, for the same numbers in every run
 
     Returns
     --------
@@ -22,12 +29,11 @@ def get_random_array(n: Union[int, Tuple[int]], mean: np.float32 = 0.0, sigma: n
 
     See also
     --------
-    np.ndarray, np.random.randn
+    np.ndarray, random_arrays.get_normal_array
 
     """
-    if isinstance(n, int):
-        n = (n,)
-    return np.random.randn(*n)*sigma + mean
+    # Generated in parallel blocks and scaled in place
+    return get_normal_array(n, mean, sigma, seed)
 
 
 if __name__ == "__main__":
@@ -53,23 +59,21 @@ if __name__ == "__main__":
     last_third_index = int(2*len(random_number_2d_array[0]/3.))
     random_number_2d_array[last_third_index:, 1::2] = 0
 
-    loaded_data = np.loadtxt(
-        "./ex_3.2.txt",
-        ndmin=2,  # To make result at least 2d
-        # only use all columns but the third. We might need to build this tuple dynamically for an arbitrary file
-        usecols=(0, 1, 3, 4),
-    )
+    # Only the numeric columns are loaded, i.e. all columns but the third. They are found from the first lines of the file instead of being hard-coded.
+    # The parsed columns are cached next to the file and reused as long as the file is unchanged
+    loaded_data = np.column_stack(load_columns("./ex_3.2.txt"))
 
     random_number_2d_array = get_random_array((2, 1000000))
     random_number_1d_array = get_random_array(1000000)
 
-    hist_1d, bin_edges_1d = np.histogram(random_number_1d_array, density=True)
-    hist_2d, bin_edges_2d_x, bin_edges_2d_y = np.histogram2d(
-        random_number_2d_array[0], random_number_2d_array[1], density=True)
+    # The bins are fixed up front, so the samples could also be counted chunk by chunk, e.g. from a file or in parallel
+    histogram_1d = Histogram.uniform(10, (np.min(random_number_1d_array), np.max(random_number_1d_array)))
+    hist_1d = histogram_1d.add(random_number_1d_array).density()
+    histogram_2d = Histogram.uniform((10, 10), [(np.min(values), np.max(values)) for values in random_number_2d_array])
+    hist_2d = histogram_2d.add(random_number_2d_array[0], random_number_2d_array[1]).density()
 
-    bin_centers_1d = (bin_edges_1d[:-1]+bin_edges_1d[1:])/2.
-    bin_centers_2d_x = (bin_edges_2d_x[:-1]+bin_edges_2d_x[1:])/2.
-    bin_centers_2d_y = (bin_edges_2d_y[:-1]+bin_edges_2d_y[1:])/2.
+    bin_centers_1d, = histogram_1d.centers
+    bin_centers_2d_x, bin_centers_2d_y = histogram_2d.centers
 
     plt.clf()
     plt.scatter(bin_centers_1d, hist_1d, s=4)
@@ -82,13 +86,11 @@ if __name__ == "__main__":
     plt.show()
     plt.savefig("2d_hist.pdf", dpi=300)
 
-    # Fit data with a normal distribution and print the resulting parameters
-    from scipy.stats import norm as normal_distr
-    from scipy.optimize import curve_fit
+    # Fit data with a normal distribution and print the resulting parameters.
+    # With the samples at hand, the maximum likelihood estimates and their errors are obtained in closed form in one pass, without binning
+    fit = fit_normal(random_number_1d_array)
+    print(np.array([fit.mean, fit.sigma]), "+/-", np.array([fit.mean_error, fit.sigma_error]))
 
-    params, cov = curve_fit(
-        normal_distr.pdf, bin_centers_1d, hist_1d, p0=(2, 2))
-
-    errors = np.sqrt(np.diag(cov))
-
-    print(params, "+/-", errors)
+    # Fitting the histogram with curve_fit remains available if only the binned data is known. It is started from the closed form estimates
+    fit = fit_normal_histogram(bin_centers_1d, hist_1d, p0=(fit.mean, fit.sigma))
+    print(np.array([fit.mean, fit.sigma]), "+/-", np.array([fit.mean_error, fit.sigma_error]))
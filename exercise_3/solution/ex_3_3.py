@@ -1,74 +1,499 @@
 from numpy.testing import assert_almost_equal
 import unittest
 import numpy as np
-from typing import List, Callable, Sequence, TypeVar, Optional, Union, Tuple
+from typing import List, Callable, Sequence, TypeVar, Optional, Union, Tuple, NamedTuple
 import matplotlib.pyplot as plt
 import logging
+import threading
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
 
-def get_center_derivative(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+def get_sorted_samples(x: np.ndarray, y: np.ndarray, assume_sorted: bool = False, order: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Function to bring the samples (x, y) into ascending order of x
+
+    Sampled grids are usually monotonic already. This is detected in a single O(n) pass, in which case the samples are returned as they are,
+    or as reversed views for descending grids, instead of sorting and copying them.
+
+    Parameters
+    ----------
+    x, y : np.ndarray of np.float32
+        The x and y positions of the points respectively. 
+        y may hold several series sampled at the same positions x, with the samples along its last axis, which must have the same length as x.
+    assume_sorted: bool, optional
+        If True, x is trusted to be in ascending order and neither checked nor sorted. Default: False
+    order: np.ndarray of int, optional
+        A permutation sorting x, e.g. np.argsort(x). Computing it once allows to reuse it for many y-series sampled at the same x positions.
+
+    Returns
+    --------
+    Tuple[np.ndarray, np.ndarray]
+        The x and y positions in ascending order of x
+
+    """
+    if order is not None:
+        return x[order], y[..., order]
+    if assume_sorted:
+        return x, y
+
+    steps = np.diff(x)
+    if np.all(steps >= 0):
+        return x, y
+    if np.all(steps <= 0):
+        # Reversed views, no copies needed
+        return x[::-1], y[..., ::-1]
+
+    # Sort by x positions
+    indices = np.argsort(x)
+    return x[indices], y[..., indices]
+
+
+def get_center_derivative(x: np.ndarray, y: np.ndarray, assume_sorted: bool = False, order: Optional[np.ndarray] = None, axis: int = -1) -> np.ndarray:
     """Function to calculate the central numerical derivative to the positions x and the function values y.
 
     Parameters
     ----------
     x, y : np.ndarray of np.float32
         The x and y positions of the points respectively. Both of same length.
+        y may also be an (m, n) array of m series sampled at the same n positions x, which are all differentiated in one pass.
+    assume_sorted: bool, optional
+        If True, x must already be in ascending order and is not sorted. Otherwise, sorting is skipped automatically for monotonic x. Default: False
+    order: np.ndarray of int, optional
+        A precomputed permutation sorting x, e.g. np.argsort(x), to be reused across calls with the same x. See get_sorted_samples.
+    axis: int, optional
+        The axis of y along which the samples are stored. Default: -1
 
     Returns
     --------
     np.ndarray of np.float32
-        The resulting ndarray with the center derivatives. Has length of two less than x and y
+        The resulting ndarray with the center derivatives. Has length of two less than x and y along `axis`
 
     """
-    # Sort by x positions
-    indices = np.argsort(x)
-    x = x[indices]
-    y = y[indices]
+    # Work on the samples along the last axis, the sorting and the x differences are then shared by all series
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    x, y = get_sorted_samples(x, y, assume_sorted, order)
 
     # Get indices offset by -1
     lower_neighbors_x = x[:-2]
-    lower_neighbors_y = y[:-2]
+    lower_neighbors_y = y[..., :-2]
 
     # Get indices offset by +1
     upper_neighbors_x = x[2:]
-    upper_neighbors_y = y[2:]
+    upper_neighbors_y = y[..., 2:]
+
+    derivative = (upper_neighbors_y-lower_neighbors_y) / \
+        (upper_neighbors_x-lower_neighbors_x)
+    return np.moveaxis(derivative, -1, axis)
 
-    return (upper_neighbors_y-lower_neighbors_y)/(upper_neighbors_x-lower_neighbors_x)
 
+# The orders of accuracy supported by get_derivative
+DERIVATIVE_ACCURACIES = (2, 4)
 
-def get_trapezoid_integral(x: np.ndarray, y: np.ndarray) -> np.float32:
+# The number of grids whose stencils are kept by get_derivative_stencil
+STENCIL_CACHE_SIZE = 8
+
+
+class DerivativeStencil(NamedTuple):
+    """The finite difference weights of the first derivative at every sample of a grid
+
+    The derivative at sample i is sum_j weights[i, j]*y[starts[i]+j].
+
+    Attributes
+    ----------
+    x: np.ndarray of np.float32
+        The grid in ascending order
+    accuracy: int
+        The order of accuracy of the stencil
+    starts: np.ndarray of int
+        The index of the first sample of the stencil of each sample
+    weights: np.ndarray of np.float32
+        The (n, accuracy+1) weights of the samples of the stencil of each sample
+    """
+    x: np.ndarray
+    accuracy: int
+    starts: np.ndarray
+    weights: np.ndarray
+
+
+def _get_lagrange_weights(nodes: List[np.ndarray], x: np.ndarray) -> np.ndarray:
+    # The derivative at x of the Lagrange basis polynomial of every node, for all stencils at once
+    weights = np.zeros((len(x), len(nodes)))
+    for j, x_j in enumerate(nodes):
+        for m, x_m in enumerate(nodes):
+            if m == j:
+                continue
+            term = 1.0/(x_j - x_m)
+            for l, x_l in enumerate(nodes):
+                if l != j and l != m:
+                    term = term*(x - x_l)/(x_j - x_l)
+            weights[:, j] += term
+    return weights
+
+
+_stencil_cache: OrderedDict = OrderedDict()
+_stencil_cache_lock = threading.Lock()
+
+
+def get_derivative_stencil(x: np.ndarray, accuracy: int = 2) -> DerivativeStencil:
+    """Function to precompute the finite difference weights of the first derivative on the grid x
+
+    Interior samples use a central stencil of accuracy+1 samples, the samples near the edges a one-sided stencil of the same size,
+    so the derivative has the same order of accuracy everywhere, also on non-uniform grids.
+    The stencils of the most recently used grids are cached, so they are only computed once per grid.
+
+    Parameters
+    ----------
+    x : np.ndarray of np.float32
+        The grid in ascending order, with at least accuracy+1 distinct samples
+    accuracy: int, optional
+        The order of accuracy, one of DERIVATIVE_ACCURACIES. Default: 2
+
+    Raises
+    --------
+    ValueError
+        If the accuracy is not supported or the grid has too few samples, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    DerivativeStencil
+        The weights of the derivative at every sample of x
+
+    """
+    if accuracy not in DERIVATIVE_ACCURACIES:
+        logging.error("Accuracy must be one of %s. Got %s.",
+                      DERIVATIVE_ACCURACIES, accuracy)
+        raise ValueError("Derivative accuracy not supported")
+
+    x = np.asarray(x)
+    size = accuracy + 1
+    if x.ndim != 1 or len(x) < size:
+        logging.error(
+            "A derivative of accuracy %d needs a one dimensional grid of at least %d samples. Got shape %s.", accuracy, size, x.shape)
+        raise ValueError("Grid too small for the derivative accuracy")
+
+    # Hashing the grid is O(n) but much cheaper than computing the weights. Equality is checked on a hit to rule out collisions
+    key = (accuracy, x.dtype.str, len(x), hash(x.tobytes()))
+    with _stencil_cache_lock:
+        stencil = _stencil_cache.get(key)
+        if stencil is not None and np.array_equal(stencil.x, x):
+            _stencil_cache.move_to_end(key)
+            return stencil
+
+    # Center the stencil on each sample, shifted inwards at the edges
+    starts = np.clip(np.arange(len(x)) - accuracy//2, 0, len(x) - size)
+    nodes = [x[starts + j] for j in range(size)]
+    weights = _get_lagrange_weights(nodes, x)
+    stencil = DerivativeStencil(x.copy(), accuracy, starts, weights)
+
+    with _stencil_cache_lock:
+        _stencil_cache[key] = stencil
+        if len(_stencil_cache) > STENCIL_CACHE_SIZE:
+            _stencil_cache.popitem(last=False)
+    return stencil
+
+
+def get_derivative(x: np.ndarray, y: np.ndarray, accuracy: int = 2, assume_sorted: bool = False, order: Optional[np.ndarray] = None, axis: int = -1, stencil: Optional[DerivativeStencil] = None) -> np.ndarray:
+    """Function to calculate the numerical derivative at every sample of the positions x and the function values y
+
+    In contrast to get_center_derivative, the result has the full length, using one-sided stencils at the edges,
+    and has an order of accuracy of 2 or 4 also on non-uniform grids.
+    With accuracy 2, the result is the same as of np.gradient(y, x, edge_order=2).
+
+    Parameters
+    ----------
+    x, y : np.ndarray of np.float32
+        The x and y positions of the points respectively. Both of same length.
+        y may also be an (m, n) array of m series sampled at the same n positions x, which are all differentiated in one pass.
+    accuracy: int, optional
+        The order of accuracy, one of DERIVATIVE_ACCURACIES. Default: 2
+    assume_sorted: bool, optional
+        If True, x must already be in ascending order and is not sorted. Otherwise, sorting is skipped automatically for monotonic x. Default: False
+    order: np.ndarray of int, optional
+        A precomputed permutation sorting x, e.g. np.argsort(x), to be reused across calls with the same x. See get_sorted_samples.
+    axis: int, optional
+        The axis of y along which the samples are stored. Default: -1
+    stencil: DerivativeStencil, optional
+        The weights precomputed with get_derivative_stencil for the sorted x, which skips even the lookup in the stencil cache
+
+    Raises
+    --------
+    ValueError
+        If the accuracy is not supported or x has too few samples, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    np.ndarray of np.float32
+        The derivatives in ascending order of x. Has the same shape as y
+
+    See also
+    --------
+    get_derivative_stencil: For the weights used
+
+    """
+    # Work on the samples along the last axis, the sorting and the stencil are then shared by all series
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    x, y = get_sorted_samples(x, y, assume_sorted, order)
+    if stencil is None:
+        stencil = get_derivative_stencil(x, accuracy)
+
+    # One gather per stencil sample instead of a gather of all (n, accuracy+1) samples at once
+    derivative = stencil.weights[:, 0]*y[..., stencil.starts]
+    for j in range(1, stencil.weights.shape[1]):
+        derivative += stencil.weights[:, j]*y[..., stencil.starts + j]
+    return np.moveaxis(derivative, -1, axis)
+
+
+def get_trapezoid_integral(x: np.ndarray, y: np.ndarray, assume_sorted: bool = False, order: Optional[np.ndarray] = None, axis: int = -1) -> np.float32:
     """Function to calculate the numerical integral of the function denoted by the (x,y) positions using the trapezoid rule
 
     Parameters
     ----------
     x, y : np.ndarray of np.float32
         The x and y positions of the function graph respectively. Both of same length.
+        y may also be an (m, n) array of m series sampled at the same n positions x, which are all integrated in one pass.
+    assume_sorted: bool, optional
+        If True, x must already be in ascending order and is not sorted. Otherwise, sorting is skipped automatically for monotonic x. Default: False
+    order: np.ndarray of int, optional
+        A precomputed permutation sorting x, e.g. np.argsort(x), to be reused across calls with the same x. See get_sorted_samples.
+    axis: int, optional
+        The axis of y along which the samples are stored. Default: -1
 
     Returns
     --------
-    np.float32
-        The area integral of the discrete function
+    np.float32 or np.ndarray of np.float32
+        The area integral of the discrete function. For multiple series, an array of the integrals with `axis` removed from the shape of y
 
     """
-    # Sort by x positions
-    indices = np.argsort(x)
-    x = x[indices]
-    y = y[indices]
+    # Work on the samples along the last axis, the sorting and the x differences are then shared by all series
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    x, y = get_sorted_samples(x, y, assume_sorted, order)
 
     # Get indices offset by 0
     lower_neighbors_x = x[:-1]
-    lower_neighbors_y = y[:-1]
+    lower_neighbors_y = y[..., :-1]
 
     # Get indices offset by +1
     upper_neighbors_x = x[1:]
-    upper_neighbors_y = y[1:]
+    upper_neighbors_y = y[..., 1:]
 
-    return np.sum((upper_neighbors_y+lower_neighbors_y)*(upper_neighbors_x-lower_neighbors_x)/2.0)
+    return np.sum((upper_neighbors_y+lower_neighbors_y)*(upper_neighbors_x-lower_neighbors_x)/2.0, axis=-1)
 
 
-def get_biscection_root(f: Callable[[np.float32], np.float32], x_min: np.float32, x_max: np.float32, max_steps: int = 20) -> np.float32:
+def get_cumulative_trapezoid(x: np.ndarray, y: np.ndarray, assume_sorted: bool = False, order: Optional[np.ndarray] = None, axis: int = -1, initial: np.float32 = 0.0) -> np.ndarray:
+    """Function to calculate the running numerical integral of the function denoted by the (x,y) positions at every sample using the trapezoid rule
+
+    Parameters
+    ----------
+    x, y : np.ndarray of np.float32
+        The x and y positions of the function graph respectively. Both of same length.
+        y may also be an (m, n) array of m series sampled at the same n positions x, which are all integrated in one pass.
+    assume_sorted: bool, optional
+        If True, x must already be in ascending order and is not sorted. Otherwise, sorting is skipped automatically for monotonic x. Default: False
+    order: np.ndarray of int, optional
+        A precomputed permutation sorting x, e.g. np.argsort(x), to be reused across calls with the same x. See get_sorted_samples.
+    axis: int, optional
+        The axis of y along which the samples are stored. Default: -1
+    initial: np.float32, optional
+        The value of the integral at the first sample. Default: 0.0
+
+    Returns
+    --------
+    np.ndarray of np.float32
+        The integral from the first sample up to each sample in ascending order of x. Has the same shape as y, its last value equals get_trapezoid_integral() + `initial`
+
+    See also
+    --------
+    TrapezoidIntegrator: For samples arriving in batches
+
+    """
+    # Work on the samples along the last axis, the sorting and the x differences are then shared by all series
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    x, y = get_sorted_samples(x, y, assume_sorted, order)
+
+    areas = (y[..., 1:]+y[..., :-1])*(x[1:]-x[:-1])/2.0
+
+    cumulative = np.empty(np.broadcast_shapes(y.shape, x.shape), dtype=np.result_type(areas, initial))
+    cumulative[..., :1] = initial
+    # The running sum is written into the result directly instead of into a temporary array
+    np.cumsum(areas, axis=-1, out=cumulative[..., 1:])
+    cumulative[..., 1:] += initial
+    return np.moveaxis(cumulative, -1, axis)
+
+
+class TrapezoidIntegrator:
+    """Class to integrate a function with the trapezoid rule from samples that arrive in append-only batches
+
+    Only the last sample and the running total are kept, so appending a batch costs O(batch) independent of the number of samples seen before.
+    The batches may hold several series sampled at the same positions, with the samples along the last axis of y.
+
+    Parameters
+    ----------
+    initial: np.float32, optional
+        The value of the integral at the first sample. Default: 0.0
+
+    See also
+    --------
+    get_cumulative_trapezoid: For all samples at once
+
+    """
+
+    def __init__(self, initial: np.float32 = 0.0):
+        self._total = initial
+        self._last_x: Optional[np.float32] = None
+        self._last_y: Optional[np.ndarray] = None
+        self._num_samples = 0
+
+    @property
+    def total(self) -> Union[np.float32, np.ndarray]:
+        """The integral from the first sample up to the last appended sample"""
+        return self._total
+
+    @property
+    def num_samples(self) -> int:
+        """The number of samples appended so far"""
+        return self._num_samples
+
+    def append(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Function to add a batch of samples and update the running total
+
+        Parameters
+        ----------
+        x, y : np.ndarray of np.float32
+            The x and y positions of the new samples respectively, with the samples along the last axis of y. 
+            x must be in ascending order and must not start before the last sample of the previous batch.
+
+        Raises
+        --------
+        ValueError
+            If x is not in ascending order or starts before the last appended sample, then the function will log an error and throw a ValueError
+
+        Returns
+        --------
+        np.ndarray of np.float32
+            The integral from the first sample up to each of the new samples
+
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if len(x) == 0:
+            return np.empty(y.shape, dtype=np.result_type(y, self._total))
+
+        if np.any(np.diff(x) < 0) or (self._last_x is not None and x[0] < self._last_x):
+            logging.error(
+                "Samples must be appended in ascending order of x. Got a batch out of order.")
+            raise ValueError("Batch not in ascending order")
+
+        if self._last_x is None:
+            # The very first sample only fixes the start of the integral
+            cumulative = get_cumulative_trapezoid(
+                x, y, assume_sorted=True, initial=self._total)
+        else:
+            # Prepend the last sample of the previous batch to close the gap between the batches
+            batch_x = np.concatenate(([self._last_x], x))
+            batch_y = np.concatenate(
+                (self._last_y[..., np.newaxis], y), axis=-1)
+            cumulative = get_cumulative_trapezoid(
+                batch_x, batch_y, assume_sorted=True, initial=self._total)[..., 1:]
+
+        self._total = cumulative[..., -1]
+        self._last_x = x[-1]
+        self._last_y = y[..., -1]
+        self._num_samples += len(x)
+        return cumulative
+
+
+class CacheInfo(NamedTuple):
+    """The statistics of an EvaluationCache"""
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class EvaluationCache:
+    """A bounded least recently used cache of the values of costly functions
+
+    Root searches evaluate f again on x values seen before, e.g. the interval boundaries of repeated or nested searches over overlapping intervals.
+    Passing the same cache to these searches lets them reuse all earlier evaluations.
+    Values are stored per function object and x, so one cache can be shared by several functions.
+
+    Parameters
+    ----------
+    maxsize: int, optional
+        The maximum number of values kept. The least recently used value is dropped once it is exceeded. Default: 1024
+    quantum: np.float32, optional
+        If positive, x values are rounded to multiples of quantum before the lookup, so that values closer than quantum can share one evaluation.
+        The cached value is then the one of the first x evaluated in the bin. Default: 0.0, i.e. only identical x values are reused
+
+    Attributes
+    ----------
+    hits, misses: int
+        The number of lookups that found a value and that had to evaluate the function
+
+    See also
+    --------
+    get_biscection_root, get_root
+
+    """
+
+    def __init__(self, maxsize: int = 1024, quantum: np.float32 = 0.0):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if quantum < 0:
+            raise ValueError("quantum must not be negative")
+        self.maxsize = maxsize
+        self.quantum = quantum
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict = OrderedDict()
+        # Searches on a thread pool may share one cache
+        self._lock = threading.Lock()
+
+    def _get_key(self, f: Callable, x: np.float32) -> tuple:
+        if self.quantum > 0:
+            return f, round(float(x)/self.quantum)
+        return f, float(x)
+
+    def evaluate(self, f: Callable[[np.float32], np.float32], x: np.float32) -> np.float32:
+        """Function to obtain f(x) from the cache, evaluating and storing it on a miss
+
+        The function is evaluated outside of the internal lock, so concurrent misses on the same x may both evaluate f.
+        """
+        return self._evaluate(f, x, f)
+
+    def _evaluate(self, f: Callable, x: np.float32, compute: Callable[[np.float32], np.float32]) -> np.float32:
+        # The value is stored for f but computed by compute on a miss, e.g. a wrapper of f counting the evaluations
+        key = self._get_key(f, x)
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                self._values.move_to_end(key)
+                return self._values[key]
+            self.misses += 1
+
+        value = compute(x)
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+        return value
+
+    def cache_info(self) -> CacheInfo:
+        """Function to obtain the hit and miss statistics and the current size of the cache"""
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._values))
+
+    def cache_clear(self) -> None:
+        """Function to drop all values and reset the statistics"""
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def get_biscection_root(f: Callable[[np.float32], np.float32], x_min: np.float32, x_max: np.float32, max_steps: int = 20, cache: Optional[EvaluationCache] = None) -> np.float32:
     """Function to find a numerical root of the function f via bisection of the interval [x_min, x_max]
 
     Parameters
@@ -79,6 +504,8 @@ def get_biscection_root(f: Callable[[np.float32], np.float32], x_min: np.float32
         The lower and upper interval boundary in which to look for the root of f. f must have different signs on them
     max_steps: int, optional
         The maximum number of bisection steps to perform. Default: 20
+    cache: EvaluationCache, optional
+        If provided, the values of f are looked up in and stored to the cache, so that repeated searches reuse earlier evaluations
 
     Raises
     --------
@@ -90,7 +517,17 @@ def get_biscection_root(f: Callable[[np.float32], np.float32], x_min: np.float32
     np.float32
         The closest approximation of the root of f in max_steps steps
 
+    See also
+    --------
+    get_root: For faster converging methods and tolerances
+
     """
+    if cache is not None:
+        uncached_f = f
+
+        def f(x: np.float32) -> np.float32:
+            return cache.evaluate(uncached_f, x)
+
     f_x_min = f(x_min)
     f_x_max = f(x_max)
     if f_x_min * f_x_max > 0:
@@ -116,6 +553,348 @@ def get_biscection_root(f: Callable[[np.float32], np.float32], x_min: np.float32
     return (x_min+x_max)/2.0
 
 
+# The methods available for get_root
+ROOT_METHODS = ("bisection", "illinois", "brent")
+
+
+class RootResult(NamedTuple):
+    """The result of a root search with get_root
+
+    Attributes
+    ----------
+    root: np.float32
+        The best approximation of the root of f
+    converged: bool
+        Whether the requested tolerance was reached within the maximum number of steps
+    num_evaluations: int
+        The number of calls of f, including the two on the interval boundaries. Values found in a cache are not counted
+    num_steps: int
+        The number of iterations performed
+    """
+    root: np.float32
+    converged: bool
+    num_evaluations: int
+    num_steps: int
+
+
+def _is_converged(x_a: np.float32, x_b: np.float32, x: np.float32, xtol: np.float32, rtol: np.float32) -> bool:
+    return abs(x_b-x_a) <= xtol + rtol*abs(x)
+
+
+def _limit_to_bisection(x_new: np.float32, x_a: np.float32, x_b: np.float32, initial_width: np.float32, num_steps: int) -> np.float32:
+    # Moves x_new towards the midpoint of the bracket, so that the bracket after this step is at most as wide as after num_steps+1 bisection steps
+    # from the initial bracket, with three steps to spare. Like in the ITP method, this bounds the number of steps by the one of bisection plus three,
+    # e.g. at multiple roots, where interpolation shrinks the bracket far slower, while the steps of smooth functions are rarely limited
+    x_mid = (x_a+x_b) / 2.0
+    radius = initial_width*2.0**(2-num_steps) - abs(x_b-x_a)/2.0
+    if radius <= 0:
+        return x_mid
+    return min(max(x_new, x_mid-radius), x_mid+radius)
+
+
+def _bisection_steps(f, x_min, x_max, f_x_min, f_x_max, xtol, rtol, ftol, max_steps) -> Tuple[np.float32, bool, int]:
+    for step in range(max_steps):
+        x_mid = (x_min+x_max) / 2.0
+        if _is_converged(x_min, x_max, x_mid, xtol, rtol):
+            return x_mid, True, step
+
+        f_x_mid = f(x_mid)
+        if abs(f_x_mid) <= ftol:
+            return x_mid, True, step+1
+
+        # Keep boundaries with different signs of f(x)
+        if f_x_mid * f_x_max > 0:
+            x_max, f_x_max = x_mid, f_x_mid
+        else:
+            x_min, f_x_min = x_mid, f_x_mid
+
+    x_mid = (x_min+x_max) / 2.0
+    return x_mid, _is_converged(x_min, x_max, x_mid, xtol, rtol), max_steps
+
+
+def _illinois_steps(f, x_a, x_b, f_a, f_b, xtol, rtol, ftol, max_steps) -> Tuple[np.float32, bool, int]:
+    # Regula falsi with the Illinois modification: if the same boundary is kept twice in a row, its function value is halved,
+    # which pulls the next secant point towards it and prevents one boundary from getting stuck
+    kept_side = 0
+    initial_width = abs(x_b-x_a)
+
+    for step in range(max_steps):
+        x_best = x_a if abs(f_a) < abs(f_b) else x_b
+        if _is_converged(x_a, x_b, x_best, xtol, rtol):
+            return x_best, True, step
+
+        x_new = (x_a*f_b - x_b*f_a) / (f_b - f_a)
+        # Fall back to bisection if the secant point is numerically outside of the bracket
+        if not min(x_a, x_b) < x_new < max(x_a, x_b):
+            x_new = (x_a+x_b) / 2.0
+        x_new = _limit_to_bisection(x_new, x_a, x_b, initial_width, step)
+
+        f_new = f(x_new)
+        if abs(f_new) <= ftol:
+            return x_new, True, step+1
+
+        if f_new * f_b > 0:
+            x_b, f_b = x_new, f_new
+            if kept_side == -1:
+                f_a /= 2.0
+            kept_side = -1
+        else:
+            x_a, f_a = x_new, f_new
+            if kept_side == 1:
+                f_b /= 2.0
+            kept_side = 1
+
+    x_best = x_a if abs(f_a) < abs(f_b) else x_b
+    return x_best, _is_converged(x_a, x_b, x_best, xtol, rtol), max_steps
+
+
+def _brent_steps(f, x_a, x_b, f_a, f_b, xtol, rtol, ftol, max_steps) -> Tuple[np.float32, bool, int]:
+    # Brent's method: inverse quadratic interpolation or secant steps where they make good progress, bisection otherwise
+    x_previous, f_previous = x_a, f_a
+    x_current, f_current = x_b, f_b
+    # The boundary on the other side of the root from x_current
+    x_block, f_block = x_previous, f_previous
+    step_previous = step_current = x_current - x_previous
+    # The test on the step sizes alone lets the bracket shrink far slower than bisection at multiple roots, so the steps are limited as well
+    initial_width = abs(x_block - x_current)
+
+    for step in range(max_steps):
+        if f_previous != 0 and f_current != 0 and np.sign(f_previous) != np.sign(f_current):
+            x_block, f_block = x_previous, f_previous
+            step_previous = step_current = x_current - x_previous
+        # x_current is always the best approximation so far
+        if abs(f_block) < abs(f_current):
+            x_previous, x_current, x_block = x_current, x_block, x_current
+            f_previous, f_current, f_block = f_current, f_block, f_current
+
+        delta = (xtol + rtol*abs(x_current)) / 2.0
+        step_bisection = (x_block - x_current) / 2.0
+        if f_current == 0 or abs(f_current) <= ftol or abs(step_bisection) < delta:
+            return x_current, True, step
+
+        if abs(step_previous) > delta and abs(f_current) < abs(f_previous):
+            if x_previous == x_block:
+                # Secant step
+                step_try = -f_current*(x_current - x_previous) / \
+                    (f_current - f_previous)
+            else:
+                # Inverse quadratic interpolation
+                slope_previous = (f_previous - f_current) / \
+                    (x_previous - x_current)
+                slope_block = (f_block - f_current)/(x_block - x_current)
+                step_try = -f_current*(f_block*slope_block - f_previous*slope_previous) / \
+                    (slope_block*slope_previous*(f_block - f_previous))
+
+            # Only accept the interpolation if it converges faster than bisection would
+            if 2*abs(step_try) < min(abs(step_previous), 3*abs(step_bisection) - delta):
+                step_previous = step_current
+                step_current = step_try
+            else:
+                step_previous = step_current = step_bisection
+        else:
+            step_previous = step_current = step_bisection
+
+        x_previous, f_previous = x_current, f_current
+        if abs(step_current) <= delta:
+            # Never take steps below the tolerance
+            step_current = delta if step_bisection > 0 else -delta
+        x_new = _limit_to_bisection(x_current+step_current, x_current, x_block, initial_width, step)
+        if x_new != x_current+step_current:
+            # A limited step is no longer an interpolation step, so it is treated like a bisection step
+            step_previous = step_current = x_new - x_current
+        x_current = x_new
+        f_current = f(x_current)
+
+    return x_current, False, max_steps
+
+
+def get_root(f: Callable[[np.float32], np.float32], x_min: np.float32, x_max: np.float32, method: str = "brent", xtol: np.float32 = 1e-12, rtol: np.float32 = 4*np.finfo(np.float64).eps, ftol: np.float32 = 0.0, max_steps: int = 100, cache: Optional[EvaluationCache] = None) -> RootResult:
+    """Function to find a numerical root of the function f in the interval [x_min, x_max] up to a given tolerance
+
+    In contrast to get_biscection_root, the search stops as soon as the tolerance is reached instead of after a fixed number of steps,
+    and faster converging methods are available, which need far fewer evaluations of f for smooth functions.
+
+    Parameters
+    ----------
+    f: Callable[[np.float32], np.float32]
+        A function mapping floating point numbers to floating point numbers
+    x_min, x_max: np.float32
+        The lower and upper interval boundary in which to look for the root of f. f must have different signs on them
+    method: str, optional
+        "bisection" halves the interval in every step.
+        "illinois" uses regula falsi steps with the Illinois modification, with the steps limited so that it never needs more than three steps more than bisection.
+        "brent" uses Brent's method, combining inverse quadratic interpolation and secant steps with bisection as a safeguard, limited in the same way.
+        Default: "brent"
+    xtol, rtol: np.float32, optional
+        The absolute and relative tolerance: the search stops once the root is known to lie in an interval narrower than xtol + rtol*|root|.
+        Default: 1e-12 and four times the machine precision
+    ftol: np.float32, optional
+        The search also stops once |f| is at most ftol at the current approximation. Default: 0.0
+    max_steps: int, optional
+        The maximum number of iterations to perform. Default: 100
+    cache: EvaluationCache, optional
+        If provided, the values of f are looked up in and stored to the cache, so that repeated searches reuse earlier evaluations
+
+    Raises
+    --------
+    ValueError
+        If the function f does not have different signs on the boundaries, then the function will log an error and throw a ValueError.
+        Also if the method is not known.
+
+    Returns
+    --------
+    RootResult
+        The root, whether it reached the tolerance and the number of evaluations of f and iterations needed
+
+    See also
+    --------
+    get_biscection_root: For a fixed number of bisection steps
+    get_biscection_roots: For many independent problems at once
+
+    """
+    if method not in ROOT_METHODS:
+        raise ValueError("method must be one of {}, got {!r}".format(
+            ROOT_METHODS, method))
+
+    num_evaluations = 0
+
+    def count_evaluation(x: np.float32) -> np.float32:
+        nonlocal num_evaluations
+        num_evaluations += 1
+        return f(x)
+
+    def evaluate(x: np.float32) -> np.float32:
+        if cache is None:
+            return count_evaluation(x)
+        # Keyed by f, not by the counting wrapper, so that values are shared between searches
+        return cache._evaluate(f, x, count_evaluation)
+
+    f_x_min = evaluate(x_min)
+    f_x_max = evaluate(x_max)
+    if f_x_min * f_x_max > 0:
+        logging.error(
+            "Function f must have different signs on x_min and x_max. Had same sign on both boundaries.")
+        raise ValueError("Interval not valid for bisection")
+
+    # A root on the boundary needs no search
+    if f_x_min == 0.0:
+        return RootResult(x_min, True, num_evaluations, 0)
+    if f_x_max == 0.0:
+        return RootResult(x_max, True, num_evaluations, 0)
+
+    steps = {"bisection": _bisection_steps,
+             "illinois": _illinois_steps, "brent": _brent_steps}[method]
+    root, converged, num_steps = steps(
+        evaluate, x_min, x_max, f_x_min, f_x_max, xtol, rtol, ftol, max_steps)
+    return RootResult(root, converged, num_evaluations, num_steps)
+
+
+class BatchRoots(NamedTuple):
+    """The result of a batch of independent root searches
+
+    Attributes
+    ----------
+    roots: np.ndarray of np.float32
+        The best approximation of the root per element. NaN for elements without a valid bracket
+    converged: np.ndarray of bool
+        Whether the element reached the requested tolerance within the maximum number of steps
+    num_steps: np.ndarray of int
+        The number of bisection steps performed per element
+    """
+    roots: np.ndarray
+    converged: np.ndarray
+    num_steps: np.ndarray
+
+
+def get_biscection_roots(f: Callable[[np.ndarray], np.ndarray], x_min: np.ndarray, x_max: np.ndarray, max_steps: int = 100, xtol: np.float32 = 1e-12, rtol: np.float32 = 4*np.finfo(np.float64).eps, ftol: np.float32 = 0.0) -> BatchRoots:
+    """Function to find roots of many independent problems at once via bisection of the intervals [x_min, x_max]
+
+    All brackets are bisected together with one call of `f` per step on the whole batch. Elements stop being updated as soon as they reach the tolerance,
+    and the loop ends early once all elements have converged.
+
+    Parameters
+    ----------
+    f: Callable[[np.ndarray], np.ndarray]
+        A vectorized function, called with an array of the shape of the batch and returning the function value for each element. 
+        Element i may depend on problem specific parameters, as `f` is always called with the full batch.
+    x_min, x_max: np.ndarray of np.float32
+        The lower and upper interval boundaries per problem, broadcast against each other. f must have different signs on them
+    max_steps: int, optional
+        The maximum number of bisection steps to perform. Default: 100
+    xtol, rtol: np.float32, optional
+        An element has converged once its bracket is narrower than xtol + rtol*|root|. Default: 1e-12 and four times the machine precision
+    ftol: np.float32, optional
+        An element has also converged once |f| at the midpoint is at most ftol. Default: 0.0
+
+    Returns
+    --------
+    BatchRoots
+        The roots, which of them converged and how many steps each element took.
+        Brackets on which f does not change its sign are not searched. They are reported with a NaN root as not converged, and a warning is logged.
+
+    See also
+    --------
+    get_biscection_root: For a single problem
+
+    """
+    x_min = np.asarray(x_min, dtype=np.float64)
+    x_max = np.asarray(x_max, dtype=np.float64)
+    f_x_min = np.asarray(f(x_min))
+    f_x_max = np.asarray(f(x_max))
+
+    # The batch may also be shaped by the parameters inside of f, e.g. for scalar boundaries.
+    # Own copies of everything, the brackets are narrowed in place
+    x_min, x_max, f_x_min, f_x_max = [np.array(values, dtype=np.float64) for values in np.broadcast_arrays(
+        x_min, x_max, f_x_min, f_x_max)]
+
+    roots = np.full(x_min.shape, np.nan)
+    converged = np.zeros(x_min.shape, dtype=bool)
+    num_steps = np.zeros(x_min.shape, dtype=int)
+
+    invalid = f_x_min*f_x_max > 0
+    if np.any(invalid):
+        logging.warning(
+            "Function f must have different signs on x_min and x_max. Had same sign on both boundaries for %d elements.", np.count_nonzero(invalid))
+
+    # Roots exactly on a boundary need no bisection
+    for boundary, f_boundary in ((x_min, f_x_min), (x_max, f_x_max)):
+        on_boundary = ~invalid & ~converged & (f_boundary == 0.0)
+        roots[on_boundary] = boundary[on_boundary]
+        converged |= on_boundary
+
+    active = ~invalid & ~converged
+    for _ in range(max_steps):
+        if not np.any(active):
+            break
+
+        x_mid = (x_min+x_max) / 2.0
+        f_x_mid = np.asarray(f(x_mid))
+        num_steps[active] += 1
+
+        # Keep boundaries with different signs of f(x)
+        move_max = active & (f_x_mid*f_x_max > 0)
+        move_min = active & ~move_max
+        x_max[move_max] = x_mid[move_max]
+        f_x_max[move_max] = f_x_mid[move_max]
+        x_min[move_min] = x_mid[move_min]
+        f_x_min[move_min] = f_x_mid[move_min]
+
+        # A midpoint with a small enough function value is taken as it is
+        hit = active & (np.abs(f_x_mid) <= ftol)
+        roots[hit] = x_mid[hit]
+        # Otherwise, the middle of a small enough bracket
+        x_center = (x_min+x_max) / 2.0
+        narrow = active & ~hit & (x_max-x_min <= xtol + rtol*np.abs(x_center))
+        roots[narrow] = x_center[narrow]
+
+        converged |= hit | narrow
+        active &= ~(hit | narrow)
+
+    # The best approximation for elements that ran out of steps
+    roots[active] = ((x_min+x_max) / 2.0)[active]
+    return BatchRoots(roots, converged, num_steps)
+
+
 def lin_f(x, m, t):
     return x*m+t
 
@@ -130,6 +909,151 @@ class TestCenterDerivative(unittest.TestCase):
 
         assert_almost_equal(result, expected_res)
 
+    def test_sorted_inputs(self):
+        data_x = np.sort(np.random.exponential(10, size=(100,)))
+        data_y = data_x**2
+        permutation = np.random.permutation(100)
+        expected_res = get_center_derivative(data_x[permutation], data_y[permutation])
+
+        assert_almost_equal(get_center_derivative(data_x, data_y), expected_res)
+        assert_almost_equal(get_center_derivative(data_x, data_y, assume_sorted=True), expected_res)
+        # Descending grids give the same result as ascending ones
+        assert_almost_equal(get_center_derivative(data_x[::-1], data_y[::-1]), expected_res)
+
+
+class TestDerivative(unittest.TestCase):
+    def test_matches_gradient(self):
+        data_x = np.sort(np.random.exponential(10, size=(100,)))
+        data_y = np.sin(data_x)
+
+        assert_almost_equal(get_derivative(data_x, data_y),
+                            np.gradient(data_y, data_x, edge_order=2))
+
+    def test_polynomials(self):
+        # Stencils of accuracy p differentiate polynomials of degree p exactly, also at the edges of non-uniform grids
+        data_x = np.sort(np.random.uniform(-2, 2, size=(50,)))
+        for accuracy in DERIVATIVE_ACCURACIES:
+            data_y = data_x**accuracy - 3*data_x
+            expected_res = accuracy*data_x**(accuracy-1) - 3
+            assert_almost_equal(get_derivative(data_x, data_y, accuracy=accuracy), expected_res, decimal=6)
+
+    def test_convergence(self):
+        errors = {accuracy: [] for accuracy in DERIVATIVE_ACCURACIES}
+        for n in (100, 200):
+            data_x = np.linspace(0, 1, n)**1.5
+            for accuracy in DERIVATIVE_ACCURACIES:
+                derivative = get_derivative(data_x, np.exp(data_x), accuracy=accuracy)
+                errors[accuracy].append(np.max(np.abs(derivative - np.exp(data_x))))
+        # Halving the spacing reduces the error by about 2**accuracy
+        self.assertGreater(errors[2][0]/errors[2][1], 3)
+        self.assertGreater(errors[4][0]/errors[4][1], 12)
+
+    def test_stencil_cache(self):
+        data_x = np.sort(np.random.exponential(10, size=(100,)))
+        stencil = get_derivative_stencil(data_x, accuracy=4)
+        self.assertIs(get_derivative_stencil(data_x.copy(), accuracy=4), stencil)
+
+        data_y = np.random.normal(size=(3, 100))
+        expected_res = get_derivative(data_x, data_y, accuracy=4)
+        for index in range(3):
+            assert_almost_equal(expected_res[index], get_derivative(data_x, data_y[index], stencil=stencil))
+        assert_almost_equal(get_derivative(data_x[::-1], data_y.T[::-1], accuracy=4, axis=0), expected_res.T)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_derivative(np.arange(4.0), np.arange(4.0), accuracy=4)
+        with self.assertRaises(ValueError):
+            get_derivative(np.arange(4.0), np.arange(4.0), accuracy=3)
+
+
+class TestSortedSamples(unittest.TestCase):
+    def test_sorted_not_copied(self):
+        data_x = np.linspace(0, 1, 100)
+        data_y = np.random.randn(100)
+
+        x, y = get_sorted_samples(data_x, data_y)
+        self.assertIs(x, data_x)
+        self.assertIs(y, data_y)
+
+        x, y = get_sorted_samples(data_x[::-1], data_y[::-1])
+        self.assertTrue(np.shares_memory(x, data_x))
+        assert_almost_equal(x, data_x)
+        assert_almost_equal(y, data_y)
+
+    def test_reused_order(self):
+        data_x = np.random.exponential(10, size=(100,))
+        order = np.argsort(data_x)
+        for m in (1.0, -3.5, 14.2):
+            data_y = lin_f(data_x, m, 4)
+            assert_almost_equal(get_center_derivative(data_x, data_y, order=order),
+                                get_center_derivative(data_x, data_y))
+            assert_almost_equal(get_trapezoid_integral(data_x, data_y, order=order),
+                                get_trapezoid_integral(data_x, data_y))
+
+    def test_unsorted(self):
+        data_x = np.array([3.0, 1.0, 2.0])
+        data_y = np.array([30.0, 10.0, 20.0])
+        x, y = get_sorted_samples(data_x, data_y)
+        assert_almost_equal(x, [1.0, 2.0, 3.0])
+        assert_almost_equal(y, [10.0, 20.0, 30.0])
+
+
+class TestBatchedSeries(unittest.TestCase):
+    def test_rows(self):
+        data_x = np.random.exponential(10, size=(100,))
+        slopes = np.array([1.0, -3.5, 14.2])
+        data_y = lin_f(data_x[np.newaxis, :], slopes[:, np.newaxis], 4)
+
+        derivative = get_center_derivative(data_x, data_y)
+        integral = get_trapezoid_integral(data_x, data_y)
+        self.assertEqual(derivative.shape, (3, 98))
+        self.assertEqual(integral.shape, (3,))
+        for index in range(3):
+            assert_almost_equal(derivative[index], get_center_derivative(data_x, data_y[index]))
+            assert_almost_equal(integral[index], get_trapezoid_integral(data_x, data_y[index]))
+
+    def test_axis(self):
+        data_x = np.random.exponential(10, size=(100,))
+        data_y = np.random.randn(100, 4)
+
+        derivative = get_center_derivative(data_x, data_y, axis=0)
+        integral = get_trapezoid_integral(data_x, data_y, axis=0)
+        self.assertEqual(derivative.shape, (98, 4))
+        assert_almost_equal(derivative, get_center_derivative(data_x, data_y.T).T)
+        assert_almost_equal(integral, get_trapezoid_integral(data_x, data_y.T))
+
+
+class TestCumulativeTrapezoid(unittest.TestCase):
+    def test_against_scipy(self):
+        from scipy.integrate import cumulative_trapezoid
+        data_x = np.random.exponential(10, size=(100,))
+        data_y = np.random.randn(3, 100)
+
+        result = get_cumulative_trapezoid(data_x, data_y)
+        order = np.argsort(data_x)
+        expected_res = cumulative_trapezoid(data_y[:, order], data_x[order], initial=0)
+
+        assert_almost_equal(result, expected_res)
+        assert_almost_equal(result[:, -1], get_trapezoid_integral(data_x, data_y))
+
+    def test_incremental_batches(self):
+        data_x = np.sort(np.random.exponential(10, size=(100,)))
+        data_y = lin_f(data_x, 14.2, 4)
+
+        integrator = TrapezoidIntegrator()
+        batches = [integrator.append(data_x[begin:end], data_y[begin:end])
+                   for begin, end in ((0, 1), (1, 30), (30, 30), (30, 100))]
+
+        assert_almost_equal(np.concatenate(batches), get_cumulative_trapezoid(data_x, data_y))
+        assert_almost_equal(integrator.total, get_trapezoid_integral(data_x, data_y))
+        self.assertEqual(integrator.num_samples, 100)
+
+    def test_out_of_order_batch(self):
+        integrator = TrapezoidIntegrator()
+        integrator.append([1.0, 2.0], [1.0, 1.0])
+        with self.assertRaises(ValueError):
+            integrator.append([1.5, 3.0], [1.0, 1.0])
+
 
 class TestTrapezoidIntegral(unittest.TestCase):
     def test_random_linear(self):
@@ -158,5 +1082,112 @@ class TestBisectionRoot(unittest.TestCase):
         assert_almost_equal(result, expected_res)
 
 
+class TestRoot(unittest.TestCase):
+    def test_methods(self):
+        for method in ROOT_METHODS:
+            for f, expected_res in ((lambda x: x*4.5 - 18, 4.0), (lambda x: x**3 - 2*x - 5, 2.0945514815423265),
+                                    (np.cos, np.pi/2), (lambda x: np.exp(x) - 10.0, np.log(10.0))):
+                result = get_root(f, x_min=-0.5, x_max=3.0 if expected_res < 3 else 20.0, method=method)
+                self.assertTrue(result.converged, method)
+                assert_almost_equal(result.root, expected_res, decimal=10)
+
+    def test_fewer_evaluations(self):
+        def f(x):
+            return np.exp(x) - 10.0
+
+        evaluations = {method: get_root(f, 0.0, 5.0, method=method, xtol=1e-12).num_evaluations
+                       for method in ROOT_METHODS}
+        self.assertLess(evaluations["brent"], evaluations["bisection"]/2)
+        self.assertLess(evaluations["illinois"], evaluations["bisection"]/2)
+
+    def test_multiple_roots(self):
+        # Interpolation shrinks the bracket only slowly at roots of higher multiplicity
+        for f, x_min, x_max in ((lambda x: (x - 1.0/3.0)**3, 0.0, 2.0), (lambda x: x**3, -1.0, 10.0), (lambda x: (x - 1e-3)**5, -1.0, 2.0)):
+            bisection = get_root(f, x_min, x_max, method="bisection")
+            for method in ("illinois", "brent"):
+                result = get_root(f, x_min, x_max, method=method)
+                self.assertTrue(result.converged, method)
+                self.assertLessEqual(result.num_evaluations, bisection.num_evaluations + 3, method)
+
+    def test_ftol(self):
+        result = get_root(lambda x: x*4.5 - 18, -3.0, 20.0, method="bisection", xtol=0.0, rtol=0.0, ftol=1.0)
+        self.assertTrue(result.converged)
+        self.assertLessEqual(abs(result.root*4.5 - 18), 1.0)
+
+    def test_not_converged(self):
+        result = get_root(np.cos, 0.0, 3.0, method="bisection", max_steps=3)
+        self.assertFalse(result.converged)
+        self.assertEqual(result.num_evaluations, 5)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_root(np.cos, 0.0, 1.0)
+        with self.assertRaises(ValueError):
+            get_root(np.cos, 0.0, 3.0, method="newton")
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def test_repeated_searches(self):
+        num_calls = 0
+
+        def f(x):
+            nonlocal num_calls
+            num_calls += 1
+            return x**3 - 2*x - 5
+
+        cache = EvaluationCache()
+        first = get_biscection_root(f, -0.5, 3.0, cache=cache)
+        calls_first = num_calls
+        second = get_biscection_root(f, -0.5, 3.0, cache=cache)
+        self.assertEqual(first, second)
+        self.assertEqual(num_calls, calls_first)
+        self.assertEqual(cache.cache_info().hits, calls_first)
+        self.assertEqual(cache.cache_info().misses, calls_first)
+
+        # A nested search on a sub interval reuses the boundaries and midpoints already evaluated
+        result = get_root(f, 2.0625, 3.0, method="bisection", cache=cache)
+        self.assertLess(result.num_evaluations, result.num_steps + 2)
+        assert_almost_equal(result.root, 2.0945514815423265, decimal=10)
+
+    def test_lru_and_quantum(self):
+        cache = EvaluationCache(maxsize=2, quantum=0.1)
+        for x in (0.0, 1.0, 0.01, 2.0, 1.0):
+            cache.evaluate(np.exp, x)
+        # 0.01 shares the bin of 0.0, and 1.0 was dropped as least recently used once 2.0 was added
+        self.assertEqual(cache.cache_info(), CacheInfo(1, 4, 2, 2))
+        self.assertEqual(cache.evaluate(np.exp, 2.04), np.exp(2.0))
+
+        cache.cache_clear()
+        self.assertEqual(cache.cache_info(), CacheInfo(0, 0, 2, 0))
+
+
+class TestBisectionRoots(unittest.TestCase):
+    def test_per_element_parameters(self):
+        targets = np.random.exponential(10, size=(1000,))
+        result = get_biscection_roots(lambda x: x*x - targets, x_min=0.0, x_max=100.0)
+
+        assert_almost_equal(result.roots, np.sqrt(targets))
+        self.assertTrue(np.all(result.converged))
+
+    def test_early_stop_per_element(self):
+        # The root of the first element lies exactly on the first midpoint
+        result = get_biscection_roots(lambda x: x - np.array([5.0, 1.0/3.0]), x_min=0.0, x_max=10.0, xtol=1e-6)
+        assert_almost_equal(result.roots, [5.0, 1.0/3.0])
+        self.assertEqual(result.num_steps[0], 1)
+        self.assertGreater(result.num_steps[1], 10)
+
+    def test_invalid_brackets(self):
+        result = get_biscection_roots(lambda x: x*4.5 - 18, x_min=np.array([-3.0, 5.0, 4.0]), x_max=20.0)
+        assert_almost_equal(result.roots[[0, 2]], [4.0, 4.0])
+        self.assertTrue(np.isnan(result.roots[1]))
+        self.assertEqual(list(result.converged), [True, False, True])
+        self.assertEqual(result.num_steps[2], 0)
+
+    def test_not_converged(self):
+        result = get_biscection_roots(lambda x: x*4.5 - 18, x_min=-3.0, x_max=20.0, max_steps=5)
+        self.assertFalse(result.converged)
+        self.assertLess(abs(result.roots - 4.0), 23.0/2**5)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,82 +4,106 @@ import numpy as np
 from typing import List, Callable, Sequence, TypeVar, Optional, Union, Tuple
 import matplotlib.pyplot as plt
 import logging
-from .map_reduce_parallel import map_parallel, reduce_parallel, map_reduce_parallel, map
+from functools import partial
+from .map_reduce_parallel import map_parallel, map_slices_parallel, reduce_slices_parallel
+from .ex_3_3 import get_sorted_samples
 
 logger = logging.getLogger(__name__)
 
 
-def _center_derivative_helper(lower_neighbor_x, lower_neighbor_y, upper_neighbor_x, upper_neighbor_y):
-    return (upper_neighbor_y-lower_neighbor_y)/(upper_neighbor_x-lower_neighbor_x)
+def _center_derivative_slice_helper(x, y):
+    # The slice contains one neighbour on either side of the samples it computes the derivatives of
+    return (y[2:]-y[:-2])/(x[2:]-x[:-2])
 
 
-def get_center_derivative_parallel(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+def _center_derivative_rows_helper(dx, rows):
+    # The neighbours are sliced from the chunk of rows, so the samples are only sent once
+    return (rows[:, 2:]-rows[:, :-2])/dx
+
+
+def get_center_derivative_parallel(x: np.ndarray, y: np.ndarray, assume_sorted: bool = False, order: Optional[np.ndarray] = None, axis: int = -1) -> np.ndarray:
     """Function to calculate the central numerical derivative to the positions x and the function values y.
 
     Parameters
     ----------
     x, y : np.ndarray of np.float32
         The x and y positions of the points respectively. Both of same length.
+        y may also be an (m, n) array of m series sampled at the same n positions x. The series are then split into chunks of rows for the workers.
+    assume_sorted: bool, optional
+        If True, x must already be in ascending order and is not sorted. Otherwise, sorting is skipped automatically for monotonic x. Default: False
+    order: np.ndarray of int, optional
+        A precomputed permutation sorting x, e.g. np.argsort(x), to be reused across calls with the same x. See get_sorted_samples.
+    axis: int, optional
+        The axis of y along which the samples are stored. Default: -1
 
     Returns
     --------
     np.ndarray of np.float32
-        The resulting ndarray with the center derivatives. Has length of two less than x and y
+        The resulting ndarray with the center derivatives. Has length of two less than x and y along `axis`
 
     """
-    # Sort by x positions
-    indices = np.argsort(x)
-    x = x[indices]
-    y = y[indices]
-
-    # Get indices offset by -1
-    lower_neighbors_x = x[:-2]
-    lower_neighbors_y = y[:-2]
+    # Work on the samples along the last axis, the sorting and the x differences are then shared by all series
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    x, y = get_sorted_samples(x, y, assume_sorted, order)
 
-    # Get indices offset by +1
-    upper_neighbors_x = x[2:]
-    upper_neighbors_y = y[2:]
+    if y.ndim > 1:
+        series_shape = y.shape[:-1]
+        rows = y.reshape((-1, y.shape[-1]))
+        dx = x[2:]-x[:-2]
+        # The workers get chunks of rows, while dx is bound to the kernel and sent once per chunk instead of once per row
+        derivative = map_parallel(partial(_center_derivative_rows_helper, dx), rows, vectorized=True)
+        return np.moveaxis(derivative.reshape(series_shape + (len(dx),)), -1, axis)
 
-    # return map_parallel(_center_derivative_helper, lower_neighbors_x, lower_neighbors_y, upper_neighbors_x, upper_neighbors_y, min_executor_data_count=20)
-    return map(_center_derivative_helper, lower_neighbors_x, lower_neighbors_y, upper_neighbors_x, upper_neighbors_y)
+    # Each worker differentiates a contiguous slice of the samples, extended by a halo of the two neighbours it needs,
+    # and writes its derivatives directly into the result
+    return map_slices_parallel(_center_derivative_slice_helper, x, y, halo=2)
 
 
-def _integral_helper(lower_neighbors_x, lower_neighbors_y, upper_neighbors_x, upper_neighbors_y):
-    return (upper_neighbors_y+lower_neighbors_y)*(upper_neighbors_x-lower_neighbors_x)
+def _integral_slice_helper(x, y):
+    # The slice contains the next sample after the trapezoids it sums up
+    return np.sum((y[1:]+y[:-1])*(x[1:]-x[:-1]))
 
 
-def _integral_sum_helper(x, y):
-    return x+y
+def _integral_rows_helper(dx, rows):
+    # The neighbours are sliced from the chunk of rows, so the samples are only sent once
+    return np.sum((rows[:, 1:]+rows[:, :-1])*dx, axis=-1)/2.0
 
 
-def get_trapezoid_integral_parallel(x: np.ndarray, y: np.ndarray) -> np.float32:
+def get_trapezoid_integral_parallel(x: np.ndarray, y: np.ndarray, assume_sorted: bool = False, order: Optional[np.ndarray] = None, axis: int = -1) -> np.float32:
     """Function to calculate the numerical integral of the function denoted by the (x,y) positions using the trapezoid rule
 
     Parameters
     ----------
     x, y : np.ndarray of np.float32
         The x and y positions of the function graph respectively. Both of same length.
+        y may also be an (m, n) array of m series sampled at the same n positions x. The series are then split into chunks of rows for the workers.
+    assume_sorted: bool, optional
+        If True, x must already be in ascending order and is not sorted. Otherwise, sorting is skipped automatically for monotonic x. Default: False
+    order: np.ndarray of int, optional
+        A precomputed permutation sorting x, e.g. np.argsort(x), to be reused across calls with the same x. See get_sorted_samples.
+    axis: int, optional
+        The axis of y along which the samples are stored. Default: -1
 
     Returns
     --------
-    np.float32
-        The area integral of the discrete function
+    np.float32 or np.ndarray of np.float32
+        The area integral of the discrete function. For multiple series, an array of the integrals with `axis` removed from the shape of y
 
     """
-    # Sort by x positions
-    indices = np.argsort(x)
-    x = x[indices]
-    y = y[indices]
-
-    # Get indices offset by 0
-    lower_neighbors_x = x[:-1]
-    lower_neighbors_y = y[:-1]
-
-    # Get indices offset by +1
-    upper_neighbors_x = x[1:]
-    upper_neighbors_y = y[1:]
-
-    return map_reduce_parallel(_integral_helper, _integral_sum_helper, _integral_sum_helper, lower_neighbors_x, lower_neighbors_y, upper_neighbors_x, upper_neighbors_y, reduce_initial=0.0, min_executor_data_count=20)/2.0
+    # Work on the samples along the last axis, the sorting and the x differences are then shared by all series
+    y = np.moveaxis(np.asarray(y), axis, -1)
+    x, y = get_sorted_samples(x, y, assume_sorted, order)
+
+    if y.ndim > 1:
+        series_shape = y.shape[:-1]
+        rows = y.reshape((-1, y.shape[-1]))
+        dx = x[1:]-x[:-1]
+        # The workers get chunks of rows, while dx is bound to the kernel and sent once per chunk instead of once per row
+        integrals = map_parallel(partial(_integral_rows_helper, dx), rows, vectorized=True)
+        return integrals.reshape(series_shape)
+
+    # Each worker sums the trapezoids of a contiguous slice of the samples, extended by a halo of one sample, and only returns its partial sum
+    return reduce_slices_parallel(_integral_slice_helper, np.add, x, y, halo=1)/2.0
 
 
 if __name__ == '__main__':
@@ -3,6 +3,8 @@ import unittest
 import numpy as np
 import logging
 from .ex_3_4 import get_center_derivative_parallel, get_trapezoid_integral_parallel
+from .ex_3_3 import get_center_derivative
+from .worker_pool import default_backend
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +46,63 @@ class TestCenterDerivativeParallel(unittest.TestCase):
         # Need to cut off padding at beginning and end of reference
         assert_almost_equal(result, expected_res)
 
+    def test_presorted(self):
+        n = 501
+        data_x = np.random.exponential(10, (n,))
+        data_y = data_x**2
+        order = np.argsort(data_x)
+
+        expected_res = get_center_derivative_parallel(data_x, data_y)
+        assert_almost_equal(get_center_derivative_parallel(
+            data_x, data_y, order=order), expected_res)
+        assert_almost_equal(get_center_derivative_parallel(
+            data_x[order], data_y[order], assume_sorted=True), expected_res)
+
+
+class TestSlicesParallel(unittest.TestCase):
+    def test_backends(self):
+        data_x = np.sort(np.random.exponential(10, size=(10000,)))
+        data_y = np.sin(data_x)
+
+        from scipy.integrate import trapezoid
+        for backend in ("serial", "thread", "process"):
+            with default_backend(backend):
+                derivative = get_center_derivative_parallel(data_x, data_y)
+                integral = get_trapezoid_integral_parallel(data_x, data_y)
+            self.assertIsInstance(derivative, np.ndarray)
+            assert_almost_equal(derivative, get_center_derivative(data_x, data_y))
+            assert_almost_equal(integral, trapezoid(data_y, data_x))
+
+    def test_short(self):
+        self.assertEqual(get_center_derivative_parallel(np.arange(2.0), np.arange(2.0)).shape, (0,))
+        self.assertEqual(get_trapezoid_integral_parallel(np.arange(1.0), np.arange(1.0)), 0.0)
+
+
+class TestBatchedSeriesParallel(unittest.TestCase):
+    def test_rows(self):
+        data_x = np.random.exponential(10, size=(200,))
+        data_y = np.random.randn(300, 200)
+
+        for backend in ("serial", "thread", "process"):
+            with default_backend(backend):
+                derivative = get_center_derivative_parallel(data_x, data_y)
+                integral = get_trapezoid_integral_parallel(data_x, data_y)
+            self.assertEqual(derivative.shape, (300, 198))
+            self.assertEqual(integral.shape, (300,))
+            for index in (0, 150, 299):
+                assert_almost_equal(derivative[index], get_center_derivative_parallel(data_x, data_y[index]))
+                assert_almost_equal(integral[index], get_trapezoid_integral_parallel(data_x, data_y[index]))
+
+    def test_axis(self):
+        data_x = np.linspace(0, 10, 100)
+        data_y = np.random.randn(100, 3, 4)
+
+        from scipy.integrate import trapezoid
+        assert_almost_equal(get_trapezoid_integral_parallel(data_x, data_y, axis=0),
+                            trapezoid(data_y, data_x, axis=0))
+        expected_res = np.gradient(data_y, data_x, axis=0)[1:-1]
+        assert_almost_equal(get_center_derivative_parallel(data_x, data_y, axis=0), expected_res)
+
 
 class TestTrapezoidIntegralParallel(unittest.TestCase):
     def test_random(self):
@@ -56,6 +115,16 @@ class TestTrapezoidIntegralParallel(unittest.TestCase):
 
         assert_almost_equal(result, expected_res)
 
+    def test_presorted(self):
+        data_x = np.linspace(0, 100, 100)
+        data_y = np.random.exponential(10, size=(100,))
+
+        expected_res = get_trapezoid_integral_parallel(data_x, data_y)
+        assert_almost_equal(get_trapezoid_integral_parallel(
+            data_x, data_y, assume_sorted=True), expected_res)
+        assert_almost_equal(get_trapezoid_integral_parallel(
+            data_x[::-1], data_y[::-1]), expected_res)
+
     def test_linear(self):
         data_x = np.random.exponential(10, size=(100,))
         data_y = lin_f(data_x, 14.2, 4)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+import logging
+from typing import Iterable, NamedTuple, Optional
+import numpy as np
+from scipy.optimize import curve_fit
+
+logger = logging.getLogger(__name__)
+
+# The number of samples per channel processed at once by fit_normal
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+
+class GaussianFit(NamedTuple):
+    """The estimated parameters of normal distributions and their standard errors
+
+    All attributes are numbers for a single channel or arrays with one entry per channel.
+
+    Attributes
+    ----------
+    mean, sigma: np.ndarray of np.float64
+        The estimated mean and standard deviation
+    mean_error, sigma_error: np.ndarray of np.float64
+        The standard errors of mean and sigma
+    num_samples: np.ndarray of np.int64
+        The number of samples the estimates are based on
+    """
+    mean: np.ndarray
+    sigma: np.ndarray
+    mean_error: np.ndarray
+    sigma_error: np.ndarray
+    num_samples: np.ndarray
+
+
+class MomentAccumulator:
+    """The running count, mean and sum of squared deviations of samples of one or many channels
+
+    Samples are added chunk by chunk and accumulators of disjoint samples can be merged, e.g. the partial results of parallel workers.
+    The moments of every chunk are combined with the previous ones by the pairwise update of Chan et al.,
+    which stays accurate for large means unlike sums of squares, so the data is read only once.
+
+    Parameters
+    ----------
+    shape: Tuple of int, optional
+        The shape of the channels, e.g. (number of channels,). Default: (), i.e. a single channel
+
+    Attributes
+    ----------
+    count: np.ndarray of np.int64
+        The number of samples per channel
+    mean: np.ndarray of np.float64
+        The mean of the samples per channel
+    m2: np.ndarray of np.float64
+        The sum of squared deviations from the mean per channel
+
+    See also
+    --------
+    fit_normal
+
+    """
+
+    def __init__(self, shape: tuple = ()):
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray) -> None:
+        total = self.count + count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Channels without any samples keep a mean of 0
+            weight = np.where(total > 0, count/np.maximum(total, 1), 0.0)
+        delta = mean - self.mean
+        self.mean = self.mean + delta*weight
+        self.m2 = self.m2 + m2 + delta**2*self.count*weight
+        self.count = total
+
+    def add(self, samples: np.ndarray, axis: int = -1) -> "MomentAccumulator":
+        """Function to add a chunk of samples of every channel
+
+        Parameters
+        ----------
+        samples: np.ndarray
+            The samples, with the channels along the other axes in the shape of the accumulator
+        axis: int, optional
+            The axis along which the samples of a channel are stored. Default: -1
+
+        Returns
+        --------
+        MomentAccumulator
+            The accumulator itself
+
+        """
+        samples = np.moveaxis(np.asarray(samples, dtype=np.float64), axis, -1)
+        if samples.shape[:-1] != self.count.shape:
+            raise ValueError("Expected samples of channels of shape {}, got {}".format(
+                self.count.shape, samples.shape[:-1]))
+        if samples.shape[-1] == 0:
+            return self
+
+        mean = np.mean(samples, axis=-1)
+        m2 = np.sum((samples - mean[..., np.newaxis])**2, axis=-1)
+        self._combine(np.full(mean.shape, samples.shape[-1], dtype=np.int64), mean, m2)
+        return self
+
+    def merge(self, other: "MomentAccumulator") -> "MomentAccumulator":
+        """Function to add the moments of another accumulator of disjoint samples of the same channels
+
+        Returns
+        --------
+        MomentAccumulator
+            The accumulator itself
+
+        """
+        if other.count.shape != self.count.shape:
+            raise ValueError("Expected channels of shape {}, got {}".format(
+                self.count.shape, other.count.shape))
+        self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def estimate(self, ddof: int = 0) -> GaussianFit:
+        """Function to estimate the parameters of a normal distribution per channel in closed form
+
+        With ddof=0, mean and sigma are the maximum likelihood estimates. The standard errors are the asymptotic ones,
+        sigma/sqrt(n) for the mean and sigma/sqrt(2n) for sigma.
+
+        Parameters
+        ----------
+        ddof: int, optional
+            The delta degrees of freedom of the variance, 1 for the unbiased sample variance. Default: 0
+
+        Returns
+        --------
+        GaussianFit
+            The estimates per channel. NaN for channels with too few samples
+
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sigma = np.sqrt(np.where(self.count > ddof, self.m2/(self.count - ddof), np.nan))
+            mean = np.where(self.count > 0, self.mean, np.nan)
+            return GaussianFit(mean, sigma, sigma/np.sqrt(self.count), sigma/np.sqrt(2*self.count), self.count.copy())
+
+
+def fit_normal(samples: np.ndarray, axis: int = -1, ddof: int = 0, block_size: int = DEFAULT_BLOCK_SIZE) -> GaussianFit:
+    """Function to fit normal distributions to the samples of one or many channels in closed form
+
+    In contrast to fitting a histogram with curve_fit, this needs no binning and no iterations,
+    and all channels are fitted at once in a single pass over the samples, e.g. of an np.memmap larger than the memory.
+
+    Parameters
+    ----------
+    samples: np.ndarray
+        The samples, with one channel per entry of the other axes
+    axis: int, optional
+        The axis along which the samples of a channel are stored. Default: -1
+    ddof: int, optional
+        The delta degrees of freedom of the variance, see MomentAccumulator.estimate. Default: 0
+    block_size: int, optional
+        The number of samples per channel read at once. Default: 2**16
+
+    Returns
+    --------
+    GaussianFit
+        The estimates and their standard errors per channel
+
+    See also
+    --------
+    fit_normal_chunks, fit_normal_histogram
+
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    samples = np.moveaxis(np.asarray(samples), axis, -1)
+    accumulator = MomentAccumulator(samples.shape[:-1])
+    for begin_index in range(0, samples.shape[-1], block_size):
+        accumulator.add(samples[..., begin_index:begin_index+block_size])
+    return accumulator.estimate(ddof)
+
+
+def fit_normal_chunks(chunks: Iterable[np.ndarray], axis: int = -1, ddof: int = 0) -> GaussianFit:
+    """Function to fit normal distributions to samples arriving in chunks, e.g. from a generator or the blocks of a file
+
+    Parameters
+    ----------
+    chunks: Iterable of np.ndarray
+        The chunks of samples, all with the same channels along the other axes
+    axis: int, optional
+        The axis along which the samples of a channel are stored. Default: -1
+    ddof: int, optional
+        The delta degrees of freedom of the variance, see MomentAccumulator.estimate. Default: 0
+
+    Returns
+    --------
+    GaussianFit
+        The estimates and their standard errors per channel
+
+    """
+    accumulator: Optional[MomentAccumulator] = None
+    for chunk in chunks:
+        chunk = np.moveaxis(np.asarray(chunk), axis, -1)
+        if accumulator is None:
+            accumulator = MomentAccumulator(chunk.shape[:-1])
+        accumulator.add(chunk)
+    if accumulator is None:
+        accumulator = MomentAccumulator()
+    return accumulator.estimate(ddof)
+
+
+def _normal_pdf(x: np.ndarray, mean: np.float32, sigma: np.float32) -> np.ndarray:
+    return np.exp(-0.5*((x - mean)/sigma)**2)/(np.sqrt(2*np.pi)*sigma)
+
+
+def fit_normal_histogram(centers: np.ndarray, density: np.ndarray, p0: Optional[np.ndarray] = None) -> GaussianFit:
+    """Function to fit the probability density of normal distributions to histograms with curve_fit
+
+    The iterative least-squares fit is only needed if the samples themselves are not available.
+    It starts from the mean and standard deviation of the binned data, so it usually converges in a few iterations.
+
+    Parameters
+    ----------
+    centers: np.ndarray of np.float32
+        The centers of the bins
+    density: np.ndarray of np.float32
+        The normalized histogram, or one normalized histogram per channel along the other axes of shape (..., number of bins)
+    p0: np.ndarray, optional
+        The initial mean and sigma, of shape (..., 2). Defaults to the moments of the binned data
+
+    Raises
+    --------
+    RuntimeError
+        If curve_fit does not converge for a channel
+
+    Returns
+    --------
+    GaussianFit
+        The fitted mean and sigma with the standard errors from the covariance of the fit.
+        num_samples is 0, as the number of samples is unknown
+
+    See also
+    --------
+    fit_normal: For the closed form estimates from the samples
+
+    """
+    centers = np.asarray(centers, dtype=np.float64)
+    density = np.asarray(density, dtype=np.float64)
+    if p0 is None:
+        # Warm start from the moments of the binned data
+        weights = density/np.sum(density, axis=-1, keepdims=True)
+        mean = np.sum(weights*centers, axis=-1)
+        sigma = np.sqrt(np.sum(weights*(centers - mean[..., np.newaxis])**2, axis=-1))
+        p0 = np.stack([mean, sigma], axis=-1)
+    p0 = np.asarray(p0, dtype=np.float64)
+
+    channel_shape = density.shape[:-1]
+    params = np.empty(channel_shape + (2,))
+    errors = np.empty(channel_shape + (2,))
+    for index in np.ndindex(channel_shape):
+        params[index], cov = curve_fit(_normal_pdf, centers, density[index], p0=p0[index])
+        errors[index] = np.sqrt(np.diag(cov))
+
+    return GaussianFit(params[..., 0], np.abs(params[..., 1]), errors[..., 0], errors[..., 1], np.zeros(channel_shape, dtype=np.int64))
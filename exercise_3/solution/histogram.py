@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+import logging
+from typing import Iterable, Sequence, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The bin edges of one dimension or of every dimension
+Edges = Union[np.ndarray, Sequence[float], Sequence[np.ndarray]]
+
+# The number of samples counted at once
+BLOCK_SIZE = 1 << 16
+
+# Edges are treated as uniform if they deviate from a uniform grid by no more than this fraction of a bin width
+UNIFORM_TOLERANCE = 1e-9
+
+
+def _is_uniform(edges: np.ndarray) -> bool:
+    width = (edges[-1]-edges[0])/(len(edges)-1)
+    uniform_edges = edges[0] + width*np.arange(len(edges))
+    return bool(np.all(np.abs(edges - uniform_edges) <= UNIFORM_TOLERANCE*width))
+
+
+class Histogram:
+    """A histogram of 1-D or 2-D samples with fixed bin edges, filled chunk by chunk
+
+    As the bin edges are fixed up front, chunks can be counted independently, e.g. blocks of a file, a generator or the slices of parallel workers,
+    and the partial counts can be merged by adding them. Like np.histogram, every bin includes its left edge and the last bin also its right edge.
+    Samples outside of the edges or NaN are not counted.
+    For uniform bins, the bin of a sample is computed by index arithmetic instead of a binary search in the edges.
+
+    To count in parallel, count_chunk and np.add form a map/combine pair for map_reduce_parallel:
+    ``histogram.add_counts(map_reduce_parallel(histogram.count_chunk, np.add, np.add, x, y, vectorized=True))``
+
+    Parameters
+    ----------
+    edges: np.ndarray or Sequence of np.ndarray
+        The increasing bin edges for 1-D samples, or one array of edges per dimension
+
+    Attributes
+    ----------
+    edges: Tuple of np.ndarray
+        The bin edges per dimension
+    counts: np.ndarray of np.int64
+        The number of samples per bin, of shape (number of bins,) per dimension
+    num_samples: int
+        The number of samples added, including those outside of the edges
+
+    See also
+    --------
+    np.histogram, np.histogram2d
+
+    """
+
+    def __init__(self, edges: Edges):
+        # A single array of numbers holds the edges of 1-D samples
+        if isinstance(edges, np.ndarray) or np.isscalar(edges[0]):
+            edges = (edges,)
+        self.edges: Tuple[np.ndarray, ...] = tuple(np.asarray(dimension_edges, dtype=np.float64) for dimension_edges in edges)
+
+        for dimension_edges in self.edges:
+            if dimension_edges.ndim != 1 or len(dimension_edges) < 2 or np.any(np.diff(dimension_edges) <= 0):
+                logging.error(
+                    "Bin edges must be strictly increasing arrays of at least two edges. Got edges of shape %s.", dimension_edges.shape)
+                raise ValueError("Invalid bin edges")
+
+        self._uniform = [_is_uniform(dimension_edges) for dimension_edges in self.edges]
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.num_samples = 0
+
+    @classmethod
+    def uniform(cls, bins: Union[int, Sequence[int]], ranges: Union[Tuple[float, float], Sequence[Tuple[float, float]]]) -> "Histogram":
+        """Function to create a histogram with bins of equal width
+
+        Parameters
+        ----------
+        bins: int or Sequence of int
+            The number of bins, per dimension for more than one dimension
+        ranges: Tuple of float or Sequence of Tuple of float
+            The lower and upper edge, per dimension for more than one dimension
+
+        Returns
+        --------
+        Histogram
+            The empty histogram
+
+        """
+        if np.ndim(bins) == 0:
+            bins, ranges = (bins,), (ranges,)
+        return cls([np.linspace(lower, upper, num_bins+1) for num_bins, (lower, upper) in zip(bins, ranges)])
+
+    @property
+    def ndim(self) -> int:
+        """The number of dimensions of the samples"""
+        return len(self.edges)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """The number of bins per dimension"""
+        return tuple(len(dimension_edges)-1 for dimension_edges in self.edges)
+
+    @property
+    def centers(self) -> Tuple[np.ndarray, ...]:
+        """The centers of the bins per dimension"""
+        return tuple((dimension_edges[:-1]+dimension_edges[1:])/2.0 for dimension_edges in self.edges)
+
+    def _get_bin_indices(self, dimension: int, values: np.ndarray, buffer: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        # Returns the bin index of every sample shifted by one, with 0 for samples below the edges or NaN and the number of bins + 1 for samples above.
+        # buffer and indices are preallocated arrays of the length of values, which are overwritten
+        edges = self.edges[dimension]
+        num_bins = len(edges)-1
+
+        if not self._uniform[dimension]:
+            indices[:] = np.searchsorted(edges, values, side="right")
+            # The last bin includes its right edge
+            indices[values == edges[-1]] = num_bins
+            return indices
+
+        # The position in units of bins, shifted by one and a tolerance, so that truncating gives the shifted bin index
+        # unless the sample is closer to an edge than the rounding error and the deviation of the edges from a uniform grid
+        tolerance = 2*UNIFORM_TOLERANCE + 8*np.finfo(np.float64).eps*(num_bins+2)
+        np.subtract(values, edges[0], out=buffer)
+        buffer *= num_bins/(edges[-1]-edges[0])
+        buffer += 1.0 + tolerance
+        # fmax and fmin map NaN to the first bound, i.e. below the edges. Far away samples are clipped so that they fit into an integer
+        np.fmax(buffer, 0.0, out=buffer)
+        np.fmin(buffer, num_bins+1.5, out=buffer)
+        indices[:] = buffer
+
+        # Only the few samples next to an edge are placed exactly by comparing them with the edges
+        buffer -= indices
+        near_edge = np.flatnonzero(buffer < 2*tolerance)
+        if len(near_edge) > 0:
+            near_values = values[near_edge]
+            near_indices = np.searchsorted(edges, near_values, side="right")
+            # The last bin includes its right edge
+            near_indices[near_values == edges[-1]] = num_bins
+            indices[near_edge] = near_indices
+        return indices
+
+    def count_chunk(self, *samples: np.ndarray) -> np.ndarray:
+        """Function to count a chunk of samples without changing the histogram
+
+        Parameters
+        ----------
+        *samples: np.ndarray
+            One array of coordinates per dimension, all of the same length
+
+        Returns
+        --------
+        np.ndarray of np.int64
+            The counts per bin with a leading axis of length 1, i.e. of shape (1,) + shape.
+            The partial counts of several chunks are combined with np.add, e.g. np.add.reduce in map_reduce_parallel
+
+        """
+        if len(samples) != self.ndim:
+            raise ValueError("Expected one array of samples per dimension, {}, got {}".format(
+                self.ndim, len(samples)))
+        samples = [np.asarray(values) for values in samples]
+
+        if self.ndim == 1 and not self._uniform[0]:
+            return self._count_sorted(samples[0]).reshape((1,) + self.shape)
+
+        # Every dimension has an extra bin below and above the edges for the samples outside, which are dropped at the end
+        extended_shape = tuple(num_bins+2 for num_bins in self.shape)
+        num_extended_bins = int(np.prod(extended_shape))
+        counts = np.zeros((num_extended_bins,), dtype=np.int64)
+        # The buffers are reused for all blocks, which are small enough for the cache
+        block_size = min(BLOCK_SIZE, len(samples[0]))
+        buffer = np.empty((block_size,))
+        indices = np.empty((block_size,), dtype=np.intp)
+        flat_indices = np.empty((block_size,), dtype=np.intp)
+        for begin_index in range(0, len(samples[0]), BLOCK_SIZE):
+            block = [values[begin_index:begin_index+BLOCK_SIZE] for values in samples]
+            length = len(block[0])
+
+            # The bins are numbered row-major, so one np.bincount counts all dimensions at once
+            flat_indices[:length] = self._get_bin_indices(0, block[0], buffer[:length], indices[:length])
+            for dimension in range(1, self.ndim):
+                flat_indices[:length] *= extended_shape[dimension]
+                flat_indices[:length] += self._get_bin_indices(dimension, block[dimension], buffer[:length], indices[:length])
+            counts += np.bincount(flat_indices[:length], minlength=num_extended_bins)
+
+        inside = tuple(slice(1, -1) for _ in extended_shape)
+        return counts.reshape(extended_shape)[inside].reshape((1,) + self.shape)
+
+    def _count_sorted(self, values: np.ndarray) -> np.ndarray:
+        # For 1-D samples, searching the few edges in the sorted block is faster than searching every sample in the edges
+        edges = self.edges[0]
+        counts = np.zeros((len(edges)-1,), dtype=np.int64)
+        for begin_index in range(0, len(values), BLOCK_SIZE):
+            # NaN are sorted to the end and never counted
+            sorted_block = np.sort(values[begin_index:begin_index+BLOCK_SIZE])
+            positions = np.searchsorted(sorted_block, edges, side="left")
+            # The last bin includes its right edge
+            positions[-1] = np.searchsorted(sorted_block, edges[-1], side="right")
+            counts += np.diff(positions)
+        return counts
+
+    def add(self, *samples: np.ndarray) -> "Histogram":
+        """Function to count a chunk of samples into the histogram
+
+        Parameters
+        ----------
+        *samples: np.ndarray
+            One array of coordinates per dimension, all of the same length
+
+        Returns
+        --------
+        Histogram
+            The histogram itself
+
+        """
+        self.add_counts(self.count_chunk(*samples)[0], len(samples[0]))
+        return self
+
+    def add_chunks(self, chunks: Iterable[Union[np.ndarray, Sequence[np.ndarray]]]) -> "Histogram":
+        """Function to count chunks of samples from an iterable, e.g. a generator or blocks of a file
+
+        Only one chunk is held in memory at a time.
+
+        Parameters
+        ----------
+        chunks: Iterable of np.ndarray or of Sequence of np.ndarray
+            The chunks of 1-D samples, or per chunk one array of coordinates per dimension
+
+        Returns
+        --------
+        Histogram
+            The histogram itself
+
+        """
+        for chunk in chunks:
+            if self.ndim == 1 and isinstance(chunk, np.ndarray) and chunk.ndim == 1:
+                chunk = (chunk,)
+            self.add(*chunk)
+        return self
+
+    def add_counts(self, counts: np.ndarray, num_samples: int = None) -> "Histogram":
+        """Function to add partial counts obtained with count_chunk on the same bin edges, e.g. from parallel workers
+
+        Parameters
+        ----------
+        counts: np.ndarray
+            The counts per bin, of the shape of the histogram, optionally with a leading axis of length 1
+        num_samples: int, optional
+            The number of samples counted. Defaults to the sum of counts
+
+        Returns
+        --------
+        Histogram
+            The histogram itself
+
+        """
+        counts = np.asarray(counts).reshape(self.shape)
+        self.counts += counts
+        self.num_samples += int(counts.sum()) if num_samples is None else num_samples
+        return self
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        """Function to add the counts of another histogram with the same bin edges
+
+        Raises
+        --------
+        ValueError
+            If the bin edges differ, then the function will log an error and throw a ValueError
+
+        Returns
+        --------
+        Histogram
+            The histogram itself
+
+        """
+        if len(other.edges) != len(self.edges) or any(not np.array_equal(own, others) for own, others in zip(self.edges, other.edges)):
+            logging.error("Only histograms with the same bin edges can be merged.")
+            raise ValueError("Bin edges differ")
+        return self.add_counts(other.counts, other.num_samples)
+
+    def density(self) -> np.ndarray:
+        """Function to obtain the probability density per bin like np.histogram(..., density=True)
+
+        Returns
+        --------
+        np.ndarray of np.float64
+            The counts divided by the number of counted samples and the volume of the bin, which integrates to 1 over the edges
+
+        """
+        volumes = np.ones(self.shape)
+        for dimension, dimension_edges in enumerate(self.edges):
+            widths_shape = [1]*self.ndim
+            widths_shape[dimension] = -1
+            volumes = volumes*np.diff(dimension_edges).reshape(widths_shape)
+        return self.counts/volumes/self.counts.sum()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+try:
+    from .column_file import open_columns, read_metadata, to_structured, write_columns
+except ImportError:
+    # Imported as a top-level module by the scripts of this directory, see ex_3.2.py
+    from column_file import open_columns, read_metadata, to_structured, write_columns
+
+logger = logging.getLogger(__name__)
+
+# The number of bytes of text read and parsed at once. Bounds the memory of the text and the token arrays independent of the size of the file
+DEFAULT_BLOCK_BYTES = 1 << 24
+
+# The number of lines from the beginning of the file used to infer the types of the columns
+INFER_LINES = 100
+
+# The suffix of the sidecar column file the parsed columns are cached in, see column_file.py
+CACHE_SUFFIX = ".cache.cols"
+
+# The version of the contents of the sidecar file. Caches of another version are ignored
+CACHE_VERSION = 2
+
+
+def _get_data_lines(lines: Sequence[str], comments: Optional[str]) -> List[str]:
+    # Strips comments and drops empty lines
+    if comments is not None:
+        lines = [line.split(comments, 1)[0] for line in lines]
+    return [line for line in lines if line.strip()]
+
+
+def _has_data(lines: Sequence[str], comments: Optional[str]) -> bool:
+    # Stops at the first line with data, so it is cheap for all but blocks of only comments and empty lines
+    return any((line.split(comments, 1)[0] if comments is not None else line).strip() for line in lines)
+
+
+def _split_lines(lines: Sequence[str], delimiter: Optional[str]) -> List[List[str]]:
+    return [[token.strip() for token in line.split(delimiter)] if delimiter is not None else line.split() for line in lines]
+
+
+def _infer_token_dtype(token: str) -> Optional[np.dtype]:
+    for dtype, parse in ((np.dtype(np.int64), int), (np.dtype(np.float64), float)):
+        try:
+            parse(token)
+            return dtype
+        except ValueError:
+            pass
+    return None
+
+
+def infer_column_types(path: str, num_lines: int = INFER_LINES, delimiter: Optional[str] = None, comments: Optional[str] = "#") -> List[Optional[np.dtype]]:
+    """Function to infer the data types of the columns of a text file from its first lines
+
+    Parameters
+    ----------
+    path: str
+        The path of the text file
+    num_lines: int, optional
+        The number of data lines to look at. Default: 100
+    delimiter: str, optional
+        The string separating the columns. Default: any whitespace
+    comments: str, optional
+        The text after this string is ignored on every line. Default: "#"
+
+    Raises
+    --------
+    ValueError
+        If the lines do not all have the same number of columns, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    List of np.dtype or None
+        np.int64 for columns of integers, np.float64 for other numbers and None for columns that are not numeric
+
+    """
+    lines = []
+    with open(path, "r") as source:
+        for line in source:
+            lines.extend(_get_data_lines([line], comments))
+            if len(lines) >= num_lines:
+                break
+
+    rows = _split_lines(lines, delimiter)
+    if len(rows) == 0:
+        return []
+    num_columns = len(rows[0])
+    if any(len(row) != num_columns for row in rows):
+        logging.error(
+            "All lines must have the same number of columns. Found a line without %d columns in the first %d lines.", num_columns, len(rows))
+        raise ValueError("Ragged columns in text file")
+
+    dtypes = []
+    for column in zip(*rows):
+        token_dtypes = [_infer_token_dtype(token) for token in column]
+        if any(dtype is None for dtype in token_dtypes):
+            dtypes.append(None)
+        else:
+            dtypes.append(np.result_type(*token_dtypes))
+    return dtypes
+
+
+def _parse_numeric(lines: List[str], usecols: Sequence[int], dtypes: List[np.dtype], delimiter: Optional[str], comments: Optional[str]) -> np.ndarray:
+    # The C parser of np.loadtxt splits the lines, but only converts the selected columns, all typed at once through a structured data type
+    return np.loadtxt(lines, dtype=[("column_{}".format(index), dtype) for index, dtype in zip(usecols, dtypes)],
+                      usecols=usecols, delimiter=delimiter, comments=comments, ndmin=1)
+
+
+def _is_parseable(lines: List[str], column_index: int, dtype: np.dtype, delimiter: Optional[str], comments: Optional[str]) -> bool:
+    try:
+        _parse_numeric(lines, [column_index], [dtype], delimiter, comments)
+        return True
+    except ValueError:
+        return False
+
+
+def _parse_block(lines: List[str], usecols: Sequence[int], dtypes: List[Optional[np.dtype]], delimiter: Optional[str], comments: Optional[str], first_line: int) -> List[np.ndarray]:
+    numeric = [index for index, dtype in enumerate(dtypes) if dtype is not None]
+    numeric_usecols = [usecols[index] for index in numeric]
+    columns: List[Optional[np.ndarray]] = [None]*len(usecols)
+
+    if numeric:
+        try:
+            table = _parse_numeric(lines, numeric_usecols, [dtypes[index] for index in numeric], delimiter, comments)
+        except ValueError:
+            # A column of integers in the first lines may contain other numbers further down. Such columns are parsed as floats from now on
+            promoted = [index for index in numeric if dtypes[index] == np.int64 and not _is_parseable(
+                lines, usecols[index], dtypes[index], delimiter, comments)]
+            if not promoted:
+                logging.error(
+                    "The selected columns must be numeric and all lines must have the same number of columns. Found a line that is not after line %d.", first_line)
+                raise ValueError("Column not numeric or ragged columns in text file")
+            for index in promoted:
+                dtypes[index] = np.dtype(np.float64)
+            return _parse_block(lines, usecols, dtypes, delimiter, comments, first_line)
+
+        for index, column_index in zip(numeric, numeric_usecols):
+            columns[index] = table["column_{}".format(column_index)]
+
+    if len(numeric) < len(usecols):
+        # Columns of text are only split if they are selected, and kept as strings
+        rows = _split_lines(_get_data_lines(lines, comments), delimiter)
+        if any(len(row) != len(rows[0]) for row in rows):
+            logging.error(
+                "All lines must have the same number of columns. Found a line with a different number of columns after line %d.", first_line)
+            raise ValueError("Ragged columns in text file")
+        for index, column_index in enumerate(usecols):
+            if dtypes[index] is None:
+                columns[index] = np.array([row[column_index] for row in rows], dtype=str)
+
+    return columns
+
+
+def _join_blocks(column_blocks: List[np.ndarray], dtype: Optional[np.dtype]) -> np.ndarray:
+    if not column_blocks:
+        return np.empty((0,), dtype=dtype or str)
+    column = np.concatenate(column_blocks)
+    # Blocks parsed before a column turned out not to be integers are promoted here. Text columns get the width of their longest entry
+    return column if dtype is None else column.astype(dtype, copy=False)
+
+
+def _get_cache_path(path: str) -> str:
+    return path + CACHE_SUFFIX
+
+
+def _get_cache_key(path: str, usecols: Sequence[int], delimiter: Optional[str], comments: Optional[str]) -> Dict[str, Any]:
+    # The cache is only valid for the same file contents and the same way of parsing them
+    stat = os.stat(path)
+    return {"version": CACHE_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+            "usecols": list(usecols), "delimiter": delimiter, "comments": comments}
+
+
+def _read_cache(path: str, key: Dict[str, Any]) -> Optional[List[np.ndarray]]:
+    cache_path = _get_cache_path(path)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        if read_metadata(cache_path) != key:
+            return None
+        # Only the header is read, the columns are memory-mapped
+        return list(open_columns(cache_path).values())
+    except (OSError, ValueError, KeyError):
+        # A broken cache is parsed anew and overwritten
+        logger.warning("Ignoring unreadable cache %s", cache_path)
+        return None
+
+
+def _write_cache(path: str, key: Dict[str, Any], columns: List[np.ndarray]) -> None:
+    cache_path = _get_cache_path(path)
+    # Written under a temporary name first, so that an interrupted write never leaves a broken cache behind
+    temporary_path = cache_path + ".tmp"
+    try:
+        write_columns(temporary_path, {"column_{}".format(index): column for index, column in enumerate(columns)}, metadata=key)
+        os.replace(temporary_path, cache_path)
+    except OSError:
+        # The cache is only an optimization, e.g. the directory may not be writable
+        logger.warning("Could not write cache %s", cache_path)
+
+
+def load_columns(path: str, usecols: Optional[Sequence[int]] = None, structured: bool = False, names: Optional[Sequence[str]] = None, delimiter: Optional[str] = None, comments: Optional[str] = "#", block_bytes: int = DEFAULT_BLOCK_BYTES, cache: bool = True) -> Union[List[np.ndarray], np.ndarray]:
+    """Function to load columns of a text file of mixed text and numbers as typed numpy arrays
+
+    In contrast to np.loadtxt, the types of the columns are inferred from the first lines, so the numeric columns do not need to be known in advance,
+    and the file is parsed in large blocks of lines by the C parser of np.loadtxt, which bounds the memory used independent of the size of the file.
+    Only the selected columns are converted and kept, and columns of text are only split if they are selected.
+    The parsed columns are cached in a sidecar column file next to the source, which is reused as long as the modification time and size of the source are unchanged.
+    The cached columns are memory-mapped, so loading them takes constant time and memory.
+
+    Parameters
+    ----------
+    path: str
+        The path of the text file
+    usecols: Sequence of int, optional
+        The indices of the columns to load. Default: all numeric columns
+    structured: bool, optional
+        If True, a structured array with one field per column is returned instead of a list of arrays. Default: False
+    names: Sequence of str, optional
+        The field names of the structured array. Default: "column_<index>" after the index of the column in the file
+    delimiter: str, optional
+        The string separating the columns. Default: any whitespace
+    comments: str, optional
+        The text after this string is ignored on every line. Default: "#"
+    block_bytes: int, optional
+        The approximate number of bytes of text parsed at once. Default: 2**24
+    cache: bool, optional
+        Whether to read and write the sidecar cache `path` + ".cache.cols". Default: True
+
+    Raises
+    --------
+    ValueError
+        If the lines do not all have the same number of columns or a selected numeric column contains text, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    List of np.ndarray or np.ndarray
+        One array per selected column, of np.int64 for integers, np.float64 for other numbers and strings for text. Or the structured array of these columns.
+        Read-only np.memmap columns if they are taken from the cache
+
+    See also
+    --------
+    infer_column_types, np.loadtxt
+
+    """
+    if block_bytes < 1:
+        raise ValueError("block_bytes must be at least 1")
+
+    column_types = infer_column_types(path, delimiter=delimiter, comments=comments)
+    if usecols is None:
+        usecols = [index for index, dtype in enumerate(column_types) if dtype is not None]
+    usecols = [int(index) for index in usecols]
+    if any(not 0 <= index < len(column_types) for index in usecols):
+        raise ValueError("usecols must be indices of the {} columns, got {}".format(
+            len(column_types), usecols))
+    if names is None:
+        names = ["column_{}".format(index) for index in usecols]
+    elif len(names) != len(usecols):
+        raise ValueError("There must be one name per column, got {} names for {} columns".format(
+            len(names), len(usecols)))
+
+    key = _get_cache_key(path, usecols, delimiter, comments)
+    columns = _read_cache(path, key) if cache else None
+
+    if columns is None:
+        dtypes = [column_types[index] for index in usecols]
+        blocks: List[List[np.ndarray]] = [[] for _ in usecols]
+        first_line = 0
+        with open(path, "r") as source:
+            while True:
+                # Reads whole lines of about block_bytes in total
+                lines = source.readlines(block_bytes)
+                if not lines:
+                    break
+                if not _has_data(lines, comments):
+                    # A block of only comments and empty lines has nothing to parse. Its empty columns would have no width for text
+                    first_line += len(lines)
+                    continue
+                for column_blocks, column in zip(blocks, _parse_block(lines, usecols, dtypes, delimiter, comments, first_line)):
+                    column_blocks.append(column)
+                first_line += len(lines)
+
+        columns = [_join_blocks(column_blocks, dtype) for column_blocks, dtype in zip(blocks, dtypes)]
+        if cache:
+            _write_cache(path, key, columns)
+
+    if structured:
+        return to_structured(dict(zip(names, columns)))
+    return columns
@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 
 import argparse
+import asyncio
 import sys
 import os
-from typing import List, Callable, Sequence, TypeVar, Optional
+import queue
+import time
+from contextlib import contextmanager
+from typing import List, Callable, Sequence, TypeVar, Optional, Iterator, Tuple, Union, Iterable, AsyncIterator
+from collections import deque
+from itertools import islice
 from .map_reduce import map, reduce
-from concurrent.futures import ProcessPoolExecutor, Future
+from .worker_pool import WorkerPool, BACKENDS, get_default_pool, get_default_backend
+from .shared_arrays import SharedArraySpec, create_shared_array, share_array, attach_shared_array, release_shared_array
+from .autotune import ExecutionPlan, PILOT_SIZE, TRANSFER_SECONDS_PER_ENTRY, choose_backend, get_cost_per_entry, plan_execution, record_cost_per_entry, static_plan
+from .profiling import CallProfile, begin_call, end_call, phase
+from multiprocessing.shared_memory import SharedMemory
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 import numpy as np
 
 R = TypeVar("R")
@@ -13,15 +24,451 @@ R = TypeVar("R")
 # Because the type system does not support tuples with unspecified length or type, we need to set ... in the Callable
 
 
+def _get_pool(pool: Optional[WorkerPool], backend: Optional[str], total_length: Optional[int], vectorized: bool = False) -> WorkerPool:
+    # An explicitly provided pool always wins over the backend setting
+    if pool is not None:
+        return pool
+
+    if backend is None:
+        backend = get_default_backend()
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of {}, got {!r}".format(
+            BACKENDS, backend))
+
+    if backend == "auto":
+        backend = choose_backend(total_length, vectorized)
+    return get_default_pool(backend)
+
+
+def _get_plan(func: Callable, mode: str, pilot: Callable[[], int], total_length: int, min_executor_data_count: Optional[int], pool: WorkerPool, shared: bool = False) -> ExecutionPlan:
+    # A serial pool runs everything in the calling thread anyway
+    if pool.kind == "serial":
+        return ExecutionPlan(True, 1, 1, total_length)
+
+    # An explicit minimum chunk size keeps the simple split into one equal chunk per executor
+    if min_executor_data_count is not None:
+        return static_plan(total_length, pool.max_workers, min_executor_data_count)
+
+    # Otherwise, the cost of func is measured once on a small pilot batch and the plan is derived from it
+    cost_per_entry = get_cost_per_entry(
+        (func, mode), pilot) if total_length > 0 else 0.0
+    # Nothing is copied if the workers can access the data directly
+    transfer_seconds_per_entry = 0.0 if shared or pool.shares_memory else TRANSFER_SECONDS_PER_ENTRY
+    return plan_execution(cost_per_entry, total_length, pool.max_workers, transfer_seconds_per_entry=transfer_seconds_per_entry)
+
+
+def _record_plan(call_profile: Optional[CallProfile], pool: WorkerPool, plan: ExecutionPlan) -> None:
+    if call_profile is None:
+        return
+    call_profile.set_plan(pool.kind, plan.serial, plan.num_workers, plan.num_chunks)
+    # When profiling, the workers are started up front, so that their start-up is not mistaken for work or queue wait
+    if not plan.serial and not pool.is_running:
+        with call_profile.phase("start_workers"):
+            pool.warm_up()
+
+
+def _run_tasks(pool: WorkerPool, tasks: Iterable[Tuple[Callable, tuple]], max_in_flight: int, ordered: bool = True, call_profile: Optional[CallProfile] = None) -> Iterator[Future]:
+    # Submits the tasks while keeping at most max_in_flight of them pending and yields the finished futures,
+    # either in submission order or in the order in which they complete.
+    # The caller takes the results out of the futures, so exceptions like StopIteration are raised outside of this generator.
+    # If the call is profiled, the timing of every chunk is recorded in call_profile
+
+    # A queue in submission order if ordered, otherwise just the set of pending futures
+    in_flight = deque() if ordered else set()
+
+    def take_finished() -> Iterable[Future]:
+        if ordered:
+            future = in_flight.popleft()
+            wait([future])
+            done = [future]
+        else:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            in_flight.difference_update(done)
+        if call_profile is None:
+            return done
+        return [call_profile.collect_chunk(future) for future in done]
+
+    try:
+        for task_func, task_args in tasks:
+            # Backpressure: only take the next task once there is room for it
+            while len(in_flight) >= max_in_flight:
+                yield from take_finished()
+
+            if call_profile is None:
+                future = pool.submit(task_func, *task_args)
+            else:
+                future = call_profile.submit_chunk(pool, task_func, task_args)
+            if ordered:
+                in_flight.append(future)
+            else:
+                in_flight.add(future)
+
+        # All tasks are submitted, so we only need to drain the remaining ones
+        while in_flight:
+            yield from take_finished()
+    finally:
+        # If a task failed or the consumer stopped early, the remaining ones are not needed anymore
+        for future in in_flight:
+            future.cancel()
+
+
+COMBINE_ORDERS = ("submission", "completed", "tree")
+
+
+def _combine_partials(pool: WorkerPool, combine: Callable, partial_futures: Iterator[Future], combine_order: str, call_profile: Optional[CallProfile] = None):
+    if combine_order == "tree":
+        return _tree_combine(pool, combine, partial_futures, call_profile)
+
+    # Sequential folding in the order in which the futures are provided
+    result = None
+    with phase(call_profile, "collect"):
+        for future in partial_futures:
+            # If we have no prior entry, we use the current result as a basis.
+            # For all subsequent futures, we use the combine function to merge
+            # with an existing resul
+            if result is None:
+                result = future.result()
+                continue
+            with phase(call_profile, "combine"):
+                result = combine(result, future.result())
+    return result
+
+
+def _tree_combine(pool: WorkerPool, combine: Callable, partial_futures: Iterator[Future], call_profile: Optional[CallProfile] = None):
+    # Neighbouring partial results are merged pairwise by the workers as soon as both are available, without waiting for the other pairs of a level.
+    # The order of the partial results is kept, so combine only needs to be associative, and no partial result is kept longer than until its neighbour is ready.
+    # Finished merges are reported through a queue, so that only this thread submits to the pool and never waits for a single merge
+    finished_merges: "queue.Queue[Tuple[int, int, Future]]" = queue.Queue()
+    merges: List[Future] = []
+    # The available segments of consecutive partial results that are not being merged, by their begin and by their end index
+    segments_by_begin = {}
+    begin_by_end = {}
+    num_merging = 0
+
+    def add_segment(begin_index: int, end_index: int, value) -> None:
+        nonlocal num_merging
+        if end_index in segments_by_begin:
+            neighbour_end, neighbour_value = segments_by_begin.pop(end_index)
+            del begin_by_end[neighbour_end]
+            begin_index, end_index, left, right = begin_index, neighbour_end, value, neighbour_value
+        elif begin_index in begin_by_end:
+            neighbour_begin = begin_by_end.pop(begin_index)
+            _, neighbour_value = segments_by_begin.pop(neighbour_begin)
+            begin_index, end_index, left, right = neighbour_begin, end_index, neighbour_value, value
+        else:
+            segments_by_begin[begin_index] = (end_index, value)
+            begin_by_end[end_index] = begin_index
+            return
+
+        num_merging += 1
+        merge = pool.submit(combine, left, right)
+        merges.append(merge)
+        merge.add_done_callback(lambda future: finished_merges.put((begin_index, end_index, future)))
+
+    def take_merge(block: bool) -> bool:
+        nonlocal num_merging
+        try:
+            begin_index, end_index, future = finished_merges.get(block=block)
+        except queue.Empty:
+            return False
+        num_merging -= 1
+        add_segment(begin_index, end_index, future.result())
+        return True
+
+    try:
+        num_partials = 0
+        with phase(call_profile, "collect"):
+            # The partial results arrive in submission order, while the merges of earlier ones already run
+            for index, future in enumerate(partial_futures):
+                add_segment(index, index+1, future.result())
+                num_partials += 1
+                while take_merge(block=False):
+                    pass
+
+        with phase(call_profile, "combine"):
+            while num_merging > 0:
+                take_merge(block=True)
+
+        # Without any merges in progress, all neighbouring segments have been merged into one
+        return segments_by_begin[0][1] if num_partials > 0 else None
+    finally:
+        # If a merge failed, the remaining ones are not needed anymore
+        for merge in merges:
+            merge.cancel()
+
+
+def _check_combine_order(combine_order: str) -> None:
+    if combine_order not in COMBINE_ORDERS:
+        raise ValueError("combine_order must be one of {}, got {!r}".format(
+            COMBINE_ORDERS, combine_order))
+
+
+def _chunk_bounds(total_length: int, num_executors: int) -> Iterator[Tuple[int, int]]:
+    # Also used with more chunks than executors, in which case num_executors is the number of chunks
+    for index_executor in range(num_executors):
+        # This calculates the begin index using integer arithmetics for rounding
+        # Will start at 0 and go up about total_length/num_executors per entry
+        begin_index = int((total_length*index_executor)/num_executors)
+        # This calculates the end index. As it uses the index +1 it will eventually exactly reach the end index
+        # A neat trick to split the data into individual slices of approximately equal size
+        end_index = int((total_length*(index_executor+1))/num_executors)
+        yield begin_index, end_index
+
+
 def _map_helper_func(func, data):
     return [func(*params) for params in data]
 
 
-def map_parallel(func: Callable[..., R], *iterable: Sequence, min_executor_data_count=5) -> List[R]:
+def _map_vectorized_helper_func(func, arrays: Sequence[np.ndarray]) -> np.ndarray:
+    return np.asarray(func(*arrays))
+
+
+# Arrays are handed to the workers either as the spec of a shared memory block (for worker processes) or,
+# for workers in the calling process, as the array itself
+ArrayHandle = Union[SharedArraySpec, np.ndarray]
+
+
+def _attach_arrays(handles: Sequence[ArrayHandle]) -> Tuple[List[SharedMemory], List[np.ndarray]]:
+    blocks = []
+    arrays = []
+    for handle in handles:
+        if isinstance(handle, SharedArraySpec):
+            shm, array = attach_shared_array(handle)
+            blocks.append(shm)
+            arrays.append(array)
+        else:
+            arrays.append(handle)
+    return blocks, arrays
+
+
+def _map_shared_helper_func(func, input_handles: Sequence[ArrayHandle], output_handle: ArrayHandle, begin_index: int, end_index: int, vectorized: bool = False, promote: bool = False) -> Optional[np.ndarray]:
+    # Attach to the inputs and the output without copying any data
+    blocks, arrays = _attach_arrays(list(input_handles) + [output_handle])
+    output = arrays.pop()
+
+    try:
+        if vectorized:
+            # A single call on views of the whole chunk
+            results = np.asarray(func(*[array[begin_index:end_index] for array in arrays]))
+        else:
+            results = np.asarray([func(*[array[index] for array in arrays]) for index in range(begin_index, end_index)])
+        # If the data type of the output was only guessed from the first entries, results that do not fit it are not truncated,
+        # but sent back, so that the parent can widen the output like np.array() of all results would
+        if promote and results.size > 0 and not np.can_cast(results.dtype, output.dtype):
+            return results
+        output[begin_index:end_index] = results
+        return None
+    finally:
+        # All views must be dropped before the blocks can be closed
+        del arrays, output
+        for shm in blocks:
+            release_shared_array(shm)
+
+
+def _reduce_shared_helper_func(func: np.ufunc, input_handle: ArrayHandle, begin_index: int, end_index: int, initial=None):
+    blocks, arrays = _attach_arrays([input_handle])
+    try:
+        partial = func.reduce(arrays[0][begin_index:end_index])
+        # Make sure the result does not reference the shared memory anymore
+        partial = np.array(partial) if isinstance(partial, np.ndarray) else partial
+        return partial if initial is None else func(initial, partial)
+    finally:
+        del arrays
+        for shm in blocks:
+            release_shared_array(shm)
+
+
+def _map_reduce_helper_func(func_map, reduce_func, initial, data):
+    # Every mapped value is reduced right away, so no list of intermediate results is ever built
+    return reduce(reduce_func, (func_map(*params) for params in data), initial)
+
+
+def _map_reduce_shared_helper_func(func_map, reduce_func, input_handles: Sequence[ArrayHandle], begin_index: int, end_index: int, initial=None, vectorized: bool = False):
+    blocks, arrays = _attach_arrays(input_handles)
+
+    try:
+        if vectorized:
+            partial = reduce_func.reduce(
+                func_map(*[array[begin_index:end_index] for array in arrays]))
+            # Make sure the result does not reference the shared memory anymore
+            partial = np.array(partial) if isinstance(partial, np.ndarray) else partial
+            return partial if initial is None else reduce_func(initial, partial)
+
+        return reduce(reduce_func, (func_map(*[array[index] for array in arrays]) for index in range(begin_index, end_index)), initial)
+    finally:
+        # All views must be dropped before the blocks can be closed
+        del arrays
+        for shm in blocks:
+            release_shared_array(shm)
+
+
+@contextmanager
+def _shared_inputs(arrays: Sequence[np.ndarray], pool: WorkerPool, call_profile: Optional[CallProfile] = None) -> Iterator[List[ArrayHandle]]:
+    if pool.shares_memory:
+        # Threads can read the arrays directly
+        yield list(arrays)
+        return
+
+    # Copies the arrays into shared memory for the duration of the context and yields the specs to attach to them
+    shared_blocks = []
+    try:
+        input_specs = []
+        with phase(call_profile, "share_inputs"):
+            for values in arrays:
+                shm, shared_values, spec = share_array(values)
+                # We only keep the spec, the data is read by the workers
+                del shared_values
+                shared_blocks.append(shm)
+                input_specs.append(spec)
+        yield input_specs
+    finally:
+        for shm in shared_blocks:
+            release_shared_array(shm, unlink=True)
+
+
+@contextmanager
+def _chunk_inputs(arrays: Sequence[np.ndarray], bounds: Sequence[Tuple[int, int]], pool: WorkerPool, call_profile: Optional[CallProfile] = None) -> Iterator[List[Tuple[List[ArrayHandle], int, int]]]:
+    # Yields the input handles of every chunk together with the index range to read from them
+    if _is_shared_memory_input(arrays):
+        with _shared_inputs(arrays, pool, call_profile) as input_handles:
+            yield [(input_handles, begin_index, end_index) for begin_index, end_index in bounds]
+        return
+
+    # Arrays of Python objects cannot be placed in shared memory, so every task gets its own chunk instead, which is pickled for worker processes
+    yield [([values[begin_index:end_index] for values in arrays], 0, end_index-begin_index) for begin_index, end_index in bounds]
+
+
+def _has_array_entries(iterable: Sequence[Sequence]) -> bool:
+    return len(iterable) > 0 and all(isinstance(values, np.ndarray) and values.ndim > 0 and len(values) > 0 for values in iterable)
+
+
+def _is_shared_memory_input(iterable: Sequence[Sequence]) -> bool:
+    # Arrays of Python objects only hold pointers into the memory of this process, which are invalid in worker processes
+    return _has_array_entries(iterable) and not any(values.dtype.hasobject for values in iterable)
+
+
+def _get_result_layout(func: Callable[..., R], iterable: Sequence[np.ndarray], vectorized: bool, out_dtype: Optional[np.dtype]) -> Optional[Tuple[np.dtype, Tuple[int, ...]]]:
+    # Returns the data type of the results and the shape of a single result entry, or None if the results cannot be stored in an array
+    if not vectorized and out_dtype is not None:
+        return _get_shareable_layout(np.dtype(out_dtype), ())
+
+    # Evaluate the pilot batch locally to find out the type and shape of the results.
+    # Its runtime is remembered as the cost of func, so that planning does not evaluate the same entries again
+    num_entries = min(PILOT_SIZE, min(len(values) for values in iterable))
+    start = time.perf_counter()
+    if vectorized:
+        sample_results = func(*[values[:num_entries] for values in iterable])
+    else:
+        sample_results = _map_helper_func(func, zip(*[values[:num_entries] for values in iterable]))
+    record_cost_per_entry((func, "map_vectorized" if vectorized else "map"), time.perf_counter()-start, num_entries)
+
+    if vectorized:
+        # Entries of a vectorized function may be arrays themselves, e.g. rows of a 2-D input
+        if not isinstance(sample_results, np.ndarray) or sample_results.shape[:1] != (num_entries,):
+            raise ValueError(
+                "A vectorized function must return an array with one entry per input entry")
+        return _get_shareable_layout(sample_results.dtype if out_dtype is None else np.dtype(out_dtype), sample_results.shape[1:])
+
+    if not all(isinstance(result, (np.generic, int, float, complex, bool)) for result in sample_results):
+        # Results that are not plain numbers cannot be stored in a shared array
+        return None
+    # The same promotion as np.array() of the results, e.g. to floats if only some of them are floats.
+    # Later chunks with results of a wider type are still promoted by the workers, see _map_shared_helper_func
+    return _get_shareable_layout(np.asarray(sample_results).dtype, ())
+
+
+def _get_shareable_layout(dtype: np.dtype, entry_shape: Tuple[int, ...]) -> Optional[Tuple[np.dtype, Tuple[int, ...]]]:
+    # Results of Python objects cannot be written to a shared array either
+    return None if dtype.hasobject else (dtype, entry_shape)
+
+
+def _get_map_plan(func: Callable[..., R], iterable: Sequence, total_length: int, min_executor_data_count: Optional[int], pool: WorkerPool, shared: bool, vectorized: bool) -> ExecutionPlan:
+    # iterable are the input arrays if shared or vectorized, otherwise the list of parameter tuples
+    if vectorized:
+        def pilot() -> int:
+            func(*[values[:PILOT_SIZE] for values in iterable])
+            return min(PILOT_SIZE, total_length)
+    elif shared:
+        def pilot() -> int:
+            return len(_map_helper_func(func, zip(*[values[:PILOT_SIZE] for values in iterable])))
+    else:
+        def pilot() -> int:
+            return len(_map_helper_func(func, iterable[:PILOT_SIZE]))
+
+    return _get_plan(func, "map_vectorized" if vectorized else "map", pilot,
+                     total_length, min_executor_data_count, pool, shared=shared)
+
+
+def _allocate_output(shape: Tuple[int, ...], out_dtype: np.dtype, pool: WorkerPool) -> Tuple[Optional[SharedMemory], np.ndarray, ArrayHandle]:
+    if pool.shares_memory:
+        # Threads can write to the result array directly
+        output = np.empty(shape, dtype=out_dtype)
+        return None, output, output
+    return create_shared_array(shape, out_dtype)
+
+
+def _promote_output(output: np.ndarray, promoted_chunks: Sequence[Tuple[int, int, np.ndarray]]) -> np.ndarray:
+    # Widens the output to the type of the chunks the workers sent back instead of writing them and fills them in.
+    # The entries written by the workers fit the old type, so widening them is exact
+    result = output.astype(np.result_type(output.dtype, *[results.dtype for _, _, results in promoted_chunks]))
+    for begin_index, end_index, results in promoted_chunks:
+        result[begin_index:end_index] = results
+    return result
+
+
+def _map_parallel_shared(func: Callable[..., R], iterable: Sequence[np.ndarray], plan: ExecutionPlan, pool: WorkerPool, out_dtype: np.dtype, vectorized: bool = False, call_profile: Optional[CallProfile] = None, entry_shape: Tuple[int, ...] = (), promote: bool = False) -> np.ndarray:
+    # Like zip(), we stop at the end of the shortest input
+    total_length = min(len(values) for values in iterable)
+
+    with phase(call_profile, "allocate_output"):
+        output_shm, output, output_handle = _allocate_output(
+            (total_length,) + entry_shape, out_dtype, pool)
+    try:
+        with _shared_inputs([values[:total_length] for values in iterable], pool, call_profile) as input_handles:
+            # Only the names and index ranges are sent to worker processes, never the data itself
+            bounds = list(_chunk_bounds(total_length, plan.num_chunks))
+            tasks = ((_map_shared_helper_func, (func, input_handles, output_handle, begin_index, end_index, vectorized, promote))
+                     for begin_index, end_index in bounds)
+            promoted_chunks = []
+            with phase(call_profile, "collect"):
+                # The futures are yielded in submission order, i.e. in the order of the bounds
+                for (begin_index, end_index), future in zip(bounds, _run_tasks(pool, tasks, plan.num_workers, call_profile=call_profile)):
+                    results = future.result()
+                    if results is not None:
+                        promoted_chunks.append((begin_index, end_index, results))
+
+        # Copy the result out of shared memory before it is freed
+        with phase(call_profile, "copy_result"):
+            if promoted_chunks:
+                return _promote_output(output, promoted_chunks)
+            return output if output_shm is None else output.copy()
+    finally:
+        # All views must be dropped before the block can be closed
+        del output, output_handle
+        if output_shm is not None:
+            release_shared_array(output_shm, unlink=True)
+
+
+def _map_parallel_chunks(func: Callable[..., np.ndarray], arrays: Sequence[np.ndarray], plan: ExecutionPlan, pool: WorkerPool, out_dtype: Optional[np.dtype], call_profile: Optional[CallProfile] = None) -> np.ndarray:
+    # A vectorized function whose inputs or results hold Python objects: the chunks of the inputs are pickled to the workers and their results sent back
+    total_length = min(len(values) for values in arrays)
+    tasks = ((_map_vectorized_helper_func, (func, [values[begin_index:end_index] for values in arrays]))
+             for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+    with phase(call_profile, "collect"):
+        chunk_results = [future.result() for future in _run_tasks(pool, tasks, plan.num_workers, call_profile=call_profile)]
+    return np.asarray(np.concatenate(chunk_results), dtype=out_dtype)
+
+
+def map_parallel(func: Callable[..., R], *iterable: Sequence, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, out_dtype: Optional[np.dtype] = None, vectorized: bool = False, backend: Optional[str] = None, profile: Optional[Callable[[CallProfile], None]] = None) -> Union[List[R], np.ndarray]:
     """Function to apply the provided function `func` to all entries of tuples in `iterable` and combine the results into a list
 
     The function `func` must accept one argument for each `iterable` provided.
     Evaluation will be eager compared to the built-in map function.
+    Unless `min_executor_data_count` is provided, the cost of `func` is measured on a small pilot batch on its first use to decide
+    whether to run in parallel at all, how many workers to use and how large the chunks should be. Several chunks are scheduled per worker for load balancing.
+    If all sequences in `iterable` are numpy arrays, they are placed in shared memory instead of being sent to the worker processes entry by entry,
+    and the results are written to a shared output array. In that case, the result is returned as a numpy array.
+    Arrays of Python objects, i.e. of dtype=object, only hold pointers into the calling process and are sent to the workers like other sequences.
 
     Parameters
     ----------
@@ -33,50 +480,154 @@ def map_parallel(func: Callable[..., R], *iterable: Sequence, min_executor_data_
         The types of values provided by the sequences must match the parameters of `func` in the order that the sequences are provided.
     min_executor_data_count: int, optional
         The minimum chunk size of data assigned to each executor process. 
+        If provided, the data is split into one equal chunk per executor instead of using the measured cost of the function.
+    pool: WorkerPool, optional
+        The pool of worker processes to run on. If not provided, the shared default pool of the `backend` is used, which is started on first use and kept alive between calls.
+    out_dtype: np.dtype, optional
+        The data type of the result array if all inputs are numpy arrays. 
+        If not provided, it is derived like np.array() would from the results of `func` on the first entries, which are evaluated in the calling process for that purpose,
+        and widened if later results do not fit, e.g. floats after only integers. If these results are not plain numbers, the inputs are sent to the workers entry by entry instead.
+    vectorized: bool, optional
+        If True, `func` is treated as an array kernel: each worker calls it only once with numpy slices of its whole chunk and it must return an array of the same length. 
+        The entries may be arrays themselves, e.g. the rows of 2-D inputs and results. All sequences in `iterable` are converted to numpy arrays in this mode. Default: False
+    backend: str, optional
+        Where to run the work if no `pool` is provided: "serial" in the calling thread, "thread" on the default thread pool, "process" on the default process pool,
+        or "auto" to choose from the size and type of the input. Defaults to the global setting, see set_default_backend.
+    profile: Callable[[CallProfile], None], optional
+        If provided, the call is profiled and the CallProfile with the time spent per phase and per chunk is passed to this function once the call has finished.
+        See also profiling.profile_calls() to profile all calls in a block of code.
 
     Returns
     --------
-    List of R
-        The list of the results obtained through parallel application of func to the entries in *iterable
+    List of R or np.ndarray
+        The list of the results obtained through parallel application of func to the entries in *iterable.
+        A numpy array of dtype `out_dtype` if the shared memory transport or the vectorized mode was used.
 
     See also
     --------
     map: For similar functionality with lazy evaluation
 
     """
-    in_data = [params for params in zip(*iterable)]
+    call_profile = begin_call("map_parallel", profile)
+    try:
+        return _map_parallel(func, iterable, min_executor_data_count, pool, out_dtype, vectorized, backend, call_profile)
+    finally:
+        end_call(call_profile, profile)
 
-    total_length = len(in_data)
 
-    number_available_threads = os.cpu_count()
+def _map_parallel(func: Callable[..., R], iterable: Sequence[Sequence], min_executor_data_count: Optional[int], pool: Optional[WorkerPool], out_dtype: Optional[np.dtype], vectorized: bool, backend: Optional[str], call_profile: Optional[CallProfile]) -> Union[List[R], np.ndarray]:
+    if vectorized:
+        with phase(call_profile, "prepare"):
+            iterable = [np.asarray(values) for values in iterable]
+        if not _has_array_entries(iterable):
+            # Without any entries, there is nothing worth sending to the workers
+            return np.asarray(func(*iterable), dtype=out_dtype)
 
-    # We need at least one but at most as many executors as we have logical CPU cores
-    num_executors: int = max(1, min(number_available_threads, int(
-        np.floor(total_length/min_executor_data_count))))
+    layout = None
+    if vectorized or _is_shared_memory_input(iterable):
+        with phase(call_profile, "plan"):
+            layout = _get_result_layout(func, iterable, vectorized, out_dtype)
+    # Results that cannot be stored in an array are sent back entry by entry, or chunk by chunk for vectorized functions
+    shared = layout is not None and _is_shared_memory_input(iterable)
 
-    with ProcessPoolExecutor(max_workers=num_executors) as executor:
-        result_futures: list[Future] = []
-        for index_executor in range(num_executors):
-            # This calculates the begin index using integer arithmetics for rounding
-            # Will start at 0 and go up about total_length/num_executors per entry
-            begin_index = int((total_length*index_executor)/num_executors)
-            # This calculates the end index. As it uses the index +1 it will eventually exactly reach the end index
-            # A neat trick to split the data into individual slices of approximately equal size
-            end_index = int((total_length*(index_executor+1))/num_executors)
+    if shared or vectorized:
+        total_length = min(len(values) for values in iterable)
+        with phase(call_profile, "plan"):
+            pool = _get_pool(pool, backend, total_length, vectorized)
+            plan = _get_map_plan(func, iterable, total_length,
+                                 min_executor_data_count, pool, shared, vectorized)
+        _record_plan(call_profile, pool, plan)
+        if plan.serial:
+            with phase(call_profile, "work"):
+                if vectorized:
+                    return np.asarray(func(*[values[:total_length] for values in iterable]), dtype=out_dtype)
+                return np.array(map(func, *iterable), dtype=out_dtype)
 
-            # Get the slice of data
-            data = in_data[begin_index:end_index]
+        if not shared:
+            return _map_parallel_chunks(func, iterable, plan, pool, out_dtype, call_profile)
+        layout_dtype, entry_shape = layout
+        return _map_parallel_shared(func, iterable, plan, pool, layout_dtype, vectorized=vectorized, call_profile=call_profile, entry_shape=entry_shape, promote=out_dtype is None)
 
-            # Apply the map function in parallel
-            result_futures.append(executor.submit(
-                _map_helper_func, func, data))
+    with phase(call_profile, "prepare"):
+        in_data = [params for params in zip(*iterable)]
 
-        # Collect the results and return the combined list
-        result = []
-        for future in result_futures:
+    total_length = len(in_data)
+
+    with phase(call_profile, "plan"):
+        pool = _get_pool(pool, backend, total_length)
+        plan = _get_map_plan(func, in_data, total_length,
+                             min_executor_data_count, pool, shared, vectorized)
+    _record_plan(call_profile, pool, plan)
+    if plan.serial:
+        with phase(call_profile, "work"):
+            return _map_helper_func(func, in_data)
+
+    # The pool is kept alive after this call, so we only wait for our own tasks
+    # Each task gets a slice of data to apply the map function to in parallel
+    tasks = ((_map_helper_func, (func, in_data[begin_index:end_index]))
+             for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+
+    # Collect the results and return the combined list
+    result = []
+    with phase(call_profile, "collect"):
+        for future in _run_tasks(pool, tasks, plan.num_workers, call_profile=call_profile):
             result.extend(future.result())
 
-        return result
+    return result
+
+
+def imap_parallel(func: Callable[..., R], *iterable: Iterable, chunk_size: int = 100, max_in_flight: Optional[int] = None, ordered: bool = True, pool: Optional[WorkerPool] = None, backend: Optional[str] = None) -> Iterator[R]:
+    """Function to lazily apply the provided function `func` to all entries of tuples in `iterable` in parallel and yield the results one by one
+
+    In contrast to map_parallel, the input is never collected into a list. It is consumed in chunks of `chunk_size` entries,
+    and at most `max_in_flight` chunks are submitted to the workers at any time. New chunks are only read from `iterable` once results have been taken out.
+    This keeps the memory usage flat even for unbounded generators.
+
+    Parameters
+    ----------
+    func : Callable[..., R]
+        A function, accepting exactly as many arguments as there are positional iterables in `iterable`. Must be picklable.
+    *iterable
+        an arbitrary number of iterables, including generators. `func` will be applied to all tuples created from entries at the same positions in `iterable`.
+        Like with zip(), the iteration stops at the end of the shortest iterable.
+    chunk_size: int, optional
+        The number of entries sent to a worker in one task. Default: 100
+    max_in_flight: int, optional
+        The maximum number of chunks submitted but not yet yielded. Defaults to twice the number of workers in the pool.
+    ordered: bool, optional
+        If True, results are yielded in the order of the input. If False, results of whichever chunk finishes first are yielded first. Default: True
+    pool: WorkerPool, optional
+        The pool of worker processes to run on. If not provided, the shared default pool of the `backend` is used.
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+
+    Returns
+    --------
+    Iterator of R
+        An iterator over the results of applying func to the entries in *iterable
+
+    See also
+    --------
+    map_parallel: For eager evaluation on sequences
+
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    # The length of the input is unknown, so "auto" can only decide by the interpreter
+    pool = _get_pool(pool, backend, None)
+
+    if max_in_flight is None:
+        max_in_flight = 2*pool.max_workers
+
+    params_iterator = zip(*iterable)
+    # Read the input lazily, one list of at most chunk_size entries at a time, until an empty list signals the end
+    chunks = iter(lambda: list(islice(params_iterator, chunk_size)), [])
+
+    # Backpressure: a new chunk is only read from the input once there is room for it
+    tasks = ((_map_helper_func, (func, chunk)) for chunk in chunks)
+    for future in _run_tasks(pool, tasks, max_in_flight, ordered=ordered):
+        yield from future.result()
 
 
 # For the cumulative type
@@ -86,10 +637,11 @@ C = TypeVar("C")
 N = TypeVar("N")
 
 
-def reduce_parallel(func: Callable[[C, N], C], combine: Callable[[C, C], C], iterable: Sequence[N], initial: Optional[C] = None, min_executor_data_count=5) -> C:
+def reduce_parallel(func: Callable[[C, N], C], combine: Callable[[C, C], C], iterable: Sequence[N], initial: Optional[C] = None, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, vectorized: bool = False, combine_order: str = "submission", backend: Optional[str] = None, profile: Optional[Callable[[CallProfile], None]] = None) -> C:
     """Function to mimic reduce() functionality.
 
     Takes an iterable to repeatedly call `func`(cumulative, next_entry) on. Will start with the first entry as a cumulative starting value, unless another initial value is provided as `initial`
+    Unless `min_executor_data_count` is provided, the number of workers and the chunk size are chosen from the cost of `func` measured on a small pilot batch, as in map_parallel.
 
     Parameters
     ----------
@@ -101,8 +653,26 @@ def reduce_parallel(func: Callable[[C, N], C], combine: Callable[[C, C], C], ite
         The values to be reduced into one cumulative value
     initial: C, optional
         An optional initial cumulative value. If not provided, the first entry of `iterable` will be used as an initial cumulative value. Then the types N and C must match.
+        In parallel execution, every chunk starts from `initial`, so it should be a neutral element of `combine`.
     min_executor_data_count: int, optional
         The minimum chunk size of data assigned to each executor process. 
+        If provided, the data is split into one equal chunk per executor instead of using the measured cost of the function.
+    pool: WorkerPool, optional
+        The pool of worker processes to run on. If not provided, the shared default pool of the `backend` is used, which is started on first use and kept alive between calls.
+    vectorized: bool, optional
+        If True, `func` must be a numpy ufunc like np.add. Each worker then applies `func`.reduce() to a numpy slice of its whole chunk instead of calling `func` per entry. 
+        `iterable` is converted to a numpy array and placed in shared memory in this mode. Default: False
+    combine_order: str, optional
+        How the partial results of the chunks are combined:
+        "submission" folds them one by one in the calling process in the order of the chunks.
+        "completed" folds them in the calling process as soon as they are available, which requires `combine` to be commutative.
+        "tree" merges neighbouring partial results pairwise on the workers as soon as both are available, in a tree of about logarithmic depth, which requires `combine` to be picklable.
+        The calling process only schedules the merges. Worker processes cannot send results to each other, so with a process pool the partial results still pass through the calling process.
+        Default: "submission"
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+    profile: Callable[[CallProfile], None], optional
+        If provided, the call is profiled and its CallProfile is passed to this function once the call has finished. See map_parallel.
 
     Returns
     --------
@@ -114,43 +684,82 @@ def reduce_parallel(func: Callable[[C, N], C], combine: Callable[[C, C], C], ite
     functools.reduce: For similar functionality
 
     """
+    _check_combine_order(combine_order)
+
+    call_profile = begin_call("reduce_parallel", profile)
+    try:
+        if vectorized:
+            with phase(call_profile, "prepare"):
+                values = np.asarray(iterable)
+            pool = _get_pool(pool, backend, len(values), vectorized=True)
+            return _reduce_parallel_vectorized(func, combine, values, initial, min_executor_data_count, pool, combine_order, call_profile)
 
-    in_data = [params for params in iterable]
+        return _reduce_parallel(func, combine, iterable, initial, min_executor_data_count, pool, combine_order, backend, call_profile)
+    finally:
+        end_call(call_profile, profile)
+
+
+def _reduce_parallel(func: Callable[[C, N], C], combine: Callable[[C, C], C], iterable: Sequence[N], initial: Optional[C], min_executor_data_count: Optional[int], pool: Optional[WorkerPool], combine_order: str, backend: Optional[str], call_profile: Optional[CallProfile]) -> C:
+    with phase(call_profile, "prepare"):
+        in_data = [params for params in iterable]
 
     total_length = len(in_data)
 
-    number_available_threads = os.cpu_count()
+    with phase(call_profile, "plan"):
+        pool = _get_pool(pool, backend, total_length)
+        plan = _get_reduce_plan(func, in_data, initial,
+                                min_executor_data_count, pool, vectorized=False)
+    _record_plan(call_profile, pool, plan)
+    if plan.serial:
+        with phase(call_profile, "work"):
+            return reduce(func, in_data, initial)
 
-    # We need at least one but at most as many executors as we have logical CPU cores
-    num_executors: int = max(1, min(number_available_threads, int(
-        np.floor(total_length/min_executor_data_count))))
+    # The pool is kept alive after this call, so we only wait for our own tasks
+    # Each task applies the reduce function in parallel to an individual slice
+    tasks = ((reduce, (func, in_data[begin_index:end_index], initial))
+             for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
 
-    with ProcessPoolExecutor(max_workers=num_executors) as executor:
-        result_futures: list[Future] = []
-        for index_executor in range(num_executors):
-            # This calculates the begin index using integer arithmetics for rounding
-            # Will start at 0 and go up about total_length/num_executors per entry
-            begin_index = int((total_length*index_executor)/num_executors)
-            # This calculates the end index. As it uses the index +1 it will eventually exactly reach the end index
-            # A neat trick to split the data into individual slices of approximately equal size
-            end_index = int((total_length*(index_executor+1))/num_executors)
+    # Collect the results and return the combined value
+    partial_futures = _run_tasks(
+        pool, tasks, plan.num_workers, ordered=combine_order != "completed", call_profile=call_profile)
+    return _combine_partials(pool, combine, partial_futures, combine_order, call_profile)
 
-            # Get the slice of data
-            data = in_data[begin_index:end_index]
 
-            # Apply the reduce function in parallel to the individual slices
-            result_futures.append(executor.submit(
-                reduce, func, data, initial))
+def _get_reduce_plan(func: Callable[[C, N], C], values: Sequence[N], initial: Optional[C], min_executor_data_count: Optional[int], pool: WorkerPool, vectorized: bool) -> ExecutionPlan:
+    def pilot() -> int:
+        sample = values[:PILOT_SIZE]
+        if vectorized:
+            func.reduce(sample)
+        else:
+            reduce(func, sample, initial)
+        return len(sample)
 
-        # Collect the results and return the combined list
-        result = None
-        for future in result_futures:
-            # If we have no prior entry, we use the current result as a basis.
-            # For all subsequent futures, we use the combine function to merge
-            # with an existing resul
-            result = future.result() if result is None else combine(result, future.result())
+    return _get_plan(func, "reduce_vectorized" if vectorized else "reduce", pilot, len(values),
+                     min_executor_data_count, pool, shared=vectorized and _is_shared_memory_input([values]))
+
+
+def _reduce_parallel_vectorized(func: np.ufunc, combine: Callable[[C, C], C], values: np.ndarray, initial: Optional[C], min_executor_data_count: Optional[int], pool: WorkerPool, combine_order: str, call_profile: Optional[CallProfile] = None) -> C:
+    total_length = len(values)
+    if total_length == 0:
+        # Same behaviour as the entry-wise reduce without any entries
+        return reduce(func, [], initial)
+
+    with phase(call_profile, "plan"):
+        plan = _get_reduce_plan(func, values, initial,
+                                min_executor_data_count, pool, vectorized=True)
+    _record_plan(call_profile, pool, plan)
+    if plan.serial:
+        with phase(call_profile, "work"):
+            partial_result = func.reduce(values)
+            return partial_result if initial is None else func(initial, partial_result)
+
+    with _chunk_inputs([values], list(_chunk_bounds(total_length, plan.num_chunks)), pool, call_profile) as chunks:
+        tasks = ((_reduce_shared_helper_func, (func, input_handles[0], begin_index, end_index, initial))
+                 for input_handles, begin_index, end_index in chunks)
 
-        return result
+        partial_futures = _run_tasks(
+            pool, tasks, plan.num_workers, ordered=combine_order != "completed", call_profile=call_profile)
+        return _combine_partials(pool, combine, partial_futures, combine_order, call_profile)
 
 
 # For map result type
@@ -161,14 +770,31 @@ C = TypeVar("C")
 N = TypeVar("N")
 
 
-def map_reduce_parallel(func_map: Callable[..., R], reduce_func: Callable[[N, R], N], combine_func: Callable[[N, N], N], *iterable: Sequence, reduce_initial: N = None, min_executor_data_count=5) -> List[N]:
+def _get_map_reduce_plan(func_map: Callable[..., R], reduce_func: Callable[[N, R], N], iterable: Sequence, reduce_initial: Optional[N], total_length: int, min_executor_data_count: Optional[int], pool: WorkerPool, shared: bool, vectorized: bool) -> ExecutionPlan:
+    # iterable are the input arrays if shared or vectorized, otherwise the list of parameter tuples
+    def pilot() -> int:
+        if vectorized:
+            reduce_func.reduce(func_map(*[values[:PILOT_SIZE] for values in iterable]))
+        elif shared:
+            _map_reduce_helper_func(func_map, reduce_func, reduce_initial, zip(*[values[:PILOT_SIZE] for values in iterable]))
+        else:
+            _map_reduce_helper_func(func_map, reduce_func, reduce_initial, iterable[:PILOT_SIZE])
+        return min(PILOT_SIZE, total_length)
+
+    return _get_plan((func_map, reduce_func), "map_reduce_vectorized" if vectorized else "map_reduce", pilot,
+                     total_length, min_executor_data_count, pool, shared=shared)
+
+
+def map_reduce_parallel(func_map: Callable[..., R], reduce_func: Callable[[N, R], N], combine_func: Callable[[N, N], N], *iterable: Sequence, reduce_initial: N = None, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, vectorized: bool = False, combine_order: str = "submission", backend: Optional[str] = None, profile: Optional[Callable[[CallProfile], None]] = None) -> List[N]:
     """Function to apply first apply a map with func_map to the input iterables and then apply reduce with reduce_func and combine_func to the result.
 
     The function `func_map` must accept one argument for each `iterable` provided.
     Evaluation will be eager.
     The reduce() function will be called with reduce_func, combine_func and reduce_initial as arguments. 
-    Overall, this function is equivalent to 
+    Overall, the result is the same as for
     reduce_parallel(reduce_func, combine_func, map_parallel(func_map, iterable, min_executor_data_count), min_executor_data_count, initial=reduce_initial)
+    However, both steps are fused: each worker maps and reduces its own chunk and only sends back one partial result to be combined with `combine_func`.
+    The mapped values are never collected or sent between processes.
 
     Parameters
     ----------
@@ -180,12 +806,23 @@ def map_reduce_parallel(func_map: Callable[..., R], reduce_func: Callable[[N, R]
         The types of values provided by the sequences must match the parameters of `func` in the order that the sequences are provided.
     min_executor_data_count: int, optional
         The minimum chunk size of data assigned to each executor process. 
+        If provided, the data is split into one equal chunk per executor instead of using the measured cost of the function.
     reduce_func: Callable[[N, R], N]
         Function accepting a cumulative value and the next entry and returning the next cumulative value
     combine_func: Callable[[N, N], N]
         Function combining the results of calls to reduce_func() into one aggregate result. Allows for the parallel execution of reduce and then eventual recombination before returning.
     reduce_initial: N, optional
         An optional initial cumulative value. If not provided, the first entry of the result of the map call will be used as an initial cumulative value. Then the types N and R must match.
+    pool: WorkerPool, optional
+        The pool of worker processes shared by the map and the reduce step. If not provided, the shared default pool of the `backend` is used.
+    vectorized: bool, optional
+        If True, `func_map` is called once per chunk with numpy slices and `reduce_func` must be a numpy ufunc which is applied with ufunc.reduce() to each chunk. Default: False
+    combine_order: str, optional
+        How the partial results are combined with `combine_func`, one of "submission", "completed" or "tree". See reduce_parallel. Default: "submission"
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+    profile: Callable[[CallProfile], None], optional
+        If provided, the call is profiled and its CallProfile is passed to this function once the call has finished. See map_parallel.
 
     Returns
     --------
@@ -197,5 +834,637 @@ def map_reduce_parallel(func_map: Callable[..., R], reduce_func: Callable[[N, R]
     map_parallel, reduce_parallel
 
     """
+    _check_combine_order(combine_order)
+
+    call_profile = begin_call("map_reduce_parallel", profile)
+    try:
+        return _map_reduce_parallel(func_map, reduce_func, combine_func, iterable, reduce_initial, min_executor_data_count, pool, vectorized, combine_order, backend, call_profile)
+    finally:
+        end_call(call_profile, profile)
+
+
+def _map_reduce_parallel(func_map: Callable[..., R], reduce_func: Callable[[N, R], N], combine_func: Callable[[N, N], N], iterable: Sequence[Sequence], reduce_initial: N, min_executor_data_count: Optional[int], pool: Optional[WorkerPool], vectorized: bool, combine_order: str, backend: Optional[str], call_profile: Optional[CallProfile]) -> N:
+    if vectorized:
+        with phase(call_profile, "prepare"):
+            iterable = [np.asarray(values) for values in iterable]
+        if not _has_array_entries(iterable):
+            # Without any entries, there is nothing to map
+            return reduce(reduce_func, [], reduce_initial)
+
+    shared = _is_shared_memory_input(iterable)
+    # Vectorized functions always get whole chunks of the arrays, which are pickled if they cannot be shared
+    chunked = shared or vectorized
+    if chunked:
+        total_length = min(len(values) for values in iterable)
+    else:
+        with phase(call_profile, "prepare"):
+            in_data = [params for params in zip(*iterable)]
+        total_length = len(in_data)
+
+    with phase(call_profile, "plan"):
+        pool = _get_pool(pool, backend, total_length, vectorized)
+        plan = _get_map_reduce_plan(func_map, reduce_func, iterable if chunked else in_data, reduce_initial,
+                                    total_length, min_executor_data_count, pool, shared, vectorized)
+    _record_plan(call_profile, pool, plan)
+
+    if chunked:
+        if plan.serial:
+            arrays = [values[:total_length] for values in iterable]
+            with phase(call_profile, "work"):
+                if vectorized:
+                    partial_result = reduce_func.reduce(func_map(*arrays))
+                    return partial_result if reduce_initial is None else reduce_func(reduce_initial, partial_result)
+                return _map_reduce_helper_func(func_map, reduce_func, reduce_initial, zip(*arrays))
+
+        with _chunk_inputs([values[:total_length] for values in iterable], list(_chunk_bounds(total_length, plan.num_chunks)), pool, call_profile) as chunks:
+            tasks = ((_map_reduce_shared_helper_func, (func_map, reduce_func, input_handles, begin_index, end_index, reduce_initial, vectorized))
+                     for input_handles, begin_index, end_index in chunks)
+            partial_futures = _run_tasks(
+                pool, tasks, plan.num_workers, ordered=combine_order != "completed", call_profile=call_profile)
+            return _combine_partials(pool, combine_func, partial_futures, combine_order, call_profile)
+
+    if plan.serial:
+        with phase(call_profile, "work"):
+            return _map_reduce_helper_func(func_map, reduce_func, reduce_initial, in_data)
+
+    # Each task maps and reduces its own slice of data and only returns its partial result
+    tasks = ((_map_reduce_helper_func, (func_map, reduce_func, reduce_initial, in_data[begin_index:end_index]))
+             for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+    partial_futures = _run_tasks(
+        pool, tasks, plan.num_workers, ordered=combine_order != "completed", call_profile=call_profile)
+    return _combine_partials(pool, combine_func, partial_futures, combine_order, call_profile)
+
+
+# Slices with halos: for stencils, every worker needs a few neighbouring entries beyond its own chunk.
+# Instead of shifted copies of the inputs, every worker gets the index range of its chunk and works on views of the
+# shared inputs, extended by `halo` entries at the end.
+
+
+def _get_halo_length(arrays: Sequence[np.ndarray], halo: int) -> int:
+    if halo < 0:
+        raise ValueError("halo must not be negative")
+    # Like zip(), we stop at the end of the shortest input
+    return max(0, min(len(values) for values in arrays) - halo)
+
+
+def _map_slice_helper_func(func, input_handles: Sequence[ArrayHandle], output_handle: ArrayHandle, begin_index: int, end_index: int, halo: int) -> None:
+    blocks, arrays = _attach_arrays(list(input_handles) + [output_handle])
+    output = arrays.pop()
+
+    try:
+        output[begin_index:end_index] = func(
+            *[array[begin_index:end_index+halo] for array in arrays])
+    finally:
+        # All views must be dropped before the blocks can be closed
+        del arrays, output
+        for shm in blocks:
+            release_shared_array(shm)
+
+
+def _reduce_slice_helper_func(func, input_handles: Sequence[ArrayHandle], begin_index: int, end_index: int, halo: int):
+    blocks, arrays = _attach_arrays(input_handles)
+
+    try:
+        partial = func(*[array[begin_index:end_index+halo] for array in arrays])
+        # Make sure the result does not reference the shared memory anymore
+        return np.array(partial) if isinstance(partial, np.ndarray) else partial
+    finally:
+        del arrays
+        for shm in blocks:
+            release_shared_array(shm)
+
+
+def _get_slices_plan(func: Callable, mode: str, arrays: Sequence[np.ndarray], total_length: int, halo: int, min_executor_data_count: Optional[int], pool: WorkerPool) -> ExecutionPlan:
+    def pilot() -> int:
+        func(*[values[:PILOT_SIZE+halo] for values in arrays])
+        return min(PILOT_SIZE, total_length)
+
+    return _get_plan(func, mode, pilot, total_length, min_executor_data_count, pool, shared=True)
+
+
+def map_slices_parallel(func: Callable[..., np.ndarray], *arrays: np.ndarray, halo: int = 0, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, out_dtype: Optional[np.dtype] = None, backend: Optional[str] = None, profile: Optional[Callable[[CallProfile], None]] = None) -> np.ndarray:
+    """Function to apply an array kernel `func` to contiguous slices of `arrays`, each extended by `halo` neighbouring entries, and join the results into one array
+
+    The result has `halo` entries less than the inputs. The entries begin_index to end_index of the result are func(*[values[begin_index:end_index+halo] for values in arrays]),
+    which must return an array of end_index-begin_index entries. E.g. a central difference is computed with halo=2 from values[2:]-values[:-2].
+    Every worker receives the index range of its slice and reads its inputs as views, through shared memory for worker processes, and writes its result
+    directly into the shared output array. Neighbouring slices overlap only by `halo` entries and no shifted copies of the inputs are made.
+
+    Parameters
+    ----------
+    func : Callable[..., np.ndarray]
+        An array kernel accepting one numpy slice per array in `arrays`
+    *arrays: np.ndarray
+        The input arrays, sliced along their first axis
+    halo: int, optional
+        The number of entries each slice extends beyond its part of the result. Default: 0
+    min_executor_data_count, pool, backend, profile: optional
+        See map_parallel
+    out_dtype: np.dtype, optional
+        The data type of the result array. If not provided, it is derived from the result of `func` on the first entries, which is evaluated in the calling process for that purpose.
+
+    Raises
+    --------
+    ValueError
+        If the halo is negative or `func` does not return one entry per entry of its slice
+
+    Returns
+    --------
+    np.ndarray
+        The joined results of `func`, with `halo` entries less than the shortest input
+
+    See also
+    --------
+    map_parallel: For kernels without neighbouring entries
+    reduce_slices_parallel: For kernels returning one partial result per slice
+
+    """
+    call_profile = begin_call("map_slices_parallel", profile)
+    try:
+        with phase(call_profile, "prepare"):
+            arrays = [np.asarray(values) for values in arrays]
+        total_length = _get_halo_length(arrays, halo)
+        if total_length == 0:
+            return np.asarray(func(*arrays), dtype=out_dtype)
+
+        with phase(call_profile, "plan"):
+            # Evaluate the first entry locally to find out the type and shape of the results
+            first_result = func(*[values[:1+halo] for values in arrays])
+            if not isinstance(first_result, np.ndarray) or first_result.shape[:1] != (1,):
+                raise ValueError(
+                    "A slice kernel must return an array with one entry per entry of its slice")
+            out_dtype = first_result.dtype if out_dtype is None else np.dtype(out_dtype)
+
+            pool = _get_pool(pool, backend, total_length, vectorized=True)
+            plan = _get_slices_plan(func, "map_slices", arrays, total_length, halo, min_executor_data_count, pool)
+        _record_plan(call_profile, pool, plan)
+        if plan.serial:
+            with phase(call_profile, "work"):
+                return np.asarray(func(*[values[:total_length+halo] for values in arrays]), dtype=out_dtype)
+
+        with phase(call_profile, "allocate_output"):
+            output_shm, output, output_handle = _allocate_output(
+                (total_length,) + first_result.shape[1:], out_dtype, pool)
+        try:
+            with _shared_inputs([values[:total_length+halo] for values in arrays], pool, call_profile) as input_handles:
+                tasks = ((_map_slice_helper_func, (func, input_handles, output_handle, begin_index, end_index, halo))
+                         for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+                with phase(call_profile, "collect"):
+                    for future in _run_tasks(pool, tasks, plan.num_workers, call_profile=call_profile):
+                        future.result()
+
+            # Copy the result out of shared memory before it is freed
+            with phase(call_profile, "copy_result"):
+                return output if output_shm is None else output.copy()
+        finally:
+            # All views must be dropped before the block can be closed
+            del output, output_handle
+            if output_shm is not None:
+                release_shared_array(output_shm, unlink=True)
+    finally:
+        end_call(call_profile, profile)
+
+
+def reduce_slices_parallel(func: Callable[..., C], combine: Callable[[C, C], C], *arrays: np.ndarray, halo: int = 0, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, combine_order: str = "submission", backend: Optional[str] = None, profile: Optional[Callable[[CallProfile], None]] = None) -> C:
+    """Function to compute one partial result per contiguous slice of `arrays`, each extended by `halo` neighbouring entries, and combine the partial results
+
+    Every worker evaluates func(*[values[begin_index:end_index+halo] for values in arrays]) for the index range of its slice on views of the inputs,
+    through shared memory for worker processes, and only sends back its partial result. E.g. a sum of trapezoids is computed with halo=1.
+    The slices cover the entries 0 to len-halo, so every entry and every group of neighbours is seen by exactly one slice.
+
+    Parameters
+    ----------
+    func : Callable[..., C]
+        An array kernel accepting one numpy slice per array in `arrays` and returning a partial result
+    combine: Callable[[C, C], C]
+        Function combining two partial results into one
+    *arrays: np.ndarray
+        The input arrays, sliced along their first axis
+    halo: int, optional
+        The number of entries each slice extends beyond the next slice's beginning. Default: 0
+    combine_order: str, optional
+        How the partial results are combined, one of "submission", "completed" or "tree". See reduce_parallel. Default: "submission"
+    min_executor_data_count, pool, backend, profile: optional
+        See map_parallel
+
+    Raises
+    --------
+    ValueError
+        If the halo is negative or the combine order is not known
+
+    Returns
+    --------
+    C
+        The combined partial results. For inputs with no more than `halo` entries, func applied to the whole inputs
+
+    See also
+    --------
+    map_reduce_parallel: For kernels without neighbouring entries
+    map_slices_parallel: For kernels returning one entry per entry
+
+    """
+    _check_combine_order(combine_order)
+
+    call_profile = begin_call("reduce_slices_parallel", profile)
+    try:
+        with phase(call_profile, "prepare"):
+            arrays = [np.asarray(values) for values in arrays]
+        total_length = _get_halo_length(arrays, halo)
+        if total_length == 0:
+            return func(*arrays)
+
+        with phase(call_profile, "plan"):
+            pool = _get_pool(pool, backend, total_length, vectorized=True)
+            plan = _get_slices_plan(func, "reduce_slices", arrays, total_length, halo, min_executor_data_count, pool)
+        _record_plan(call_profile, pool, plan)
+        if plan.serial:
+            with phase(call_profile, "work"):
+                return func(*[values[:total_length+halo] for values in arrays])
+
+        with _shared_inputs([values[:total_length+halo] for values in arrays], pool, call_profile) as input_handles:
+            tasks = ((_reduce_slice_helper_func, (func, input_handles, begin_index, end_index, halo))
+                     for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+            partial_futures = _run_tasks(
+                pool, tasks, plan.num_workers, ordered=combine_order != "completed", call_profile=call_profile)
+            return _combine_partials(pool, combine, partial_futures, combine_order, call_profile)
+    finally:
+        end_call(call_profile, profile)
+
+
+# The asyncio front end. The same chunks as above are scheduled on the executor of the pool through loop.run_in_executor(),
+# so that the event loop keeps running while the workers compute.
+
+
+async def _gather_tasks(pool: WorkerPool, tasks: Iterable[Tuple[Callable, tuple]], timeout: Optional[float]) -> list:
+    loop = asyncio.get_running_loop()
+    # A serial pool would run the tasks inline and block the event loop, so they go to the default executor of the loop instead
+    executor = None if pool.kind == "serial" else pool.get_executor()
+    futures = [loop.run_in_executor(executor, task_func, *task_args)
+               for task_func, task_args in tasks]
+    try:
+        return await asyncio.wait_for(asyncio.gather(*futures), timeout)
+    finally:
+        # On a timeout, cancellation or a failing task, the chunks that have not started yet are dropped.
+        # Chunks that are already running cannot be interrupted and finish in the background
+        for future in futures:
+            future.cancel()
+
+
+async def _run_off_loop(func: Callable[..., R], *args) -> R:
+    # Probing the results and planning evaluate the functions of the user on a pilot batch in the calling process,
+    # so they run on the default executor of the loop to keep the event loop responsive
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _prepare_map(func: Callable[..., R], iterable: Sequence, min_executor_data_count: Optional[int], pool: Optional[WorkerPool], out_dtype: Optional[np.dtype], vectorized: bool, backend: Optional[str]) -> Tuple[Optional[Tuple[np.dtype, Tuple[int, ...]]], Optional[list], int, WorkerPool, ExecutionPlan]:
+    # The blocking part of amap_parallel. Returns the layout of the results if they are stored in a shared array, the list of parameter tuples unless the function is vectorized, as well as the plan
+    layout = None
+    if vectorized or _is_shared_memory_input(iterable):
+        layout = _get_result_layout(func, iterable, vectorized, out_dtype)
+    # Results that cannot be stored in an array are sent back entry by entry, or chunk by chunk for vectorized functions
+    shared = layout is not None and _is_shared_memory_input(iterable)
+
+    in_data = None
+    if shared or vectorized:
+        total_length = min(len(values) for values in iterable)
+    else:
+        in_data = [params for params in zip(*iterable)]
+        total_length = len(in_data)
+
+    pool = _get_pool(pool, backend, total_length, vectorized)
+    plan = _get_map_plan(func, iterable if in_data is None else in_data, total_length,
+                         min_executor_data_count, pool, shared, vectorized)
+    return layout if shared else None, in_data, total_length, pool, plan
+
+
+def _fold_partials(combine: Callable, partial_results: list):
+    # The partial results are folded in the order of the chunks
+    return reduce(combine, partial_results)
+
+
+def _check_not_empty(total_length: int, initial) -> None:
+    # StopIteration cannot be passed through coroutines and asyncio futures, so an empty input is rejected like functools.reduce does
+    if total_length == 0 and initial is None:
+        raise TypeError("reduce of empty iterable with no initial value")
+
+
+async def amap_parallel(func: Callable[..., R], *iterable: Sequence, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, out_dtype: Optional[np.dtype] = None, vectorized: bool = False, backend: Optional[str] = None, timeout: Optional[float] = None) -> Union[List[R], np.ndarray]:
+    """Coroutine to apply the provided function `func` to all entries of tuples in `iterable` in parallel without blocking the event loop
+
+    Works like map_parallel, but the chunks are scheduled with loop.run_in_executor() and awaited.
+    If the calling task is cancelled or `timeout` expires, all chunks that have not started yet are cancelled.
+    Even if the plan decides against parallel execution, the work runs on the default executor of the loop and never in the event loop itself.
+
+    Parameters
+    ----------
+    func : Callable[..., R]
+        A function, accepting exactly as many arguments as there are positional iterables in `iterable`. Must be picklable.
+    *iterable
+        an arbitrary number of sequences. See map_parallel.
+    min_executor_data_count: int, optional
+        The minimum chunk size of data assigned to each executor process. See map_parallel.
+    pool: WorkerPool, optional
+        The pool of workers to run on. If not provided, the shared default pool of the `backend` is used.
+    out_dtype: np.dtype, optional
+        The data type of the result array if all inputs are numpy arrays. See map_parallel.
+    vectorized: bool, optional
+        If True, `func` is treated as an array kernel. See map_parallel. Default: False
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+    timeout: float, optional
+        The maximum time in seconds to wait for the result. Waits indefinitely if not provided.
+
+    Returns
+    --------
+    List of R or np.ndarray
+        The same result as map_parallel
+
+    Raises
+    --------
+    asyncio.TimeoutError
+        If the result is not available within `timeout` seconds
+
+    See also
+    --------
+    map_parallel: For the blocking version
+
+    """
+    if vectorized:
+        iterable = [np.asarray(values) for values in iterable]
+        if not _has_array_entries(iterable):
+            # Without any entries, there is nothing worth sending to the workers
+            return np.asarray(func(*iterable), dtype=out_dtype)
+
+    layout, in_data, total_length, pool, plan = await _run_off_loop(
+        _prepare_map, func, iterable, min_executor_data_count, pool, out_dtype, vectorized, backend)
+    shared = layout is not None
+    if plan.serial:
+        # A single chunk off the event loop, without copying the data to any worker
+        pool = get_default_pool("serial")
+
+    if not shared and vectorized:
+        chunk_results = await _gather_tasks(pool, ((_map_vectorized_helper_func, (func, [values[begin_index:end_index] for values in iterable]))
+                                                   for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks)), timeout)
+        return np.asarray(np.concatenate(chunk_results), dtype=out_dtype)
+    if not shared:
+        partial_results = await _gather_tasks(pool, ((_map_helper_func, (func, in_data[begin_index:end_index]))
+                                                     for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks)), timeout)
+        return [result for partial_result in partial_results for result in partial_result]
+
+    layout_dtype, entry_shape = layout
+    output_shm, output, output_handle = _allocate_output(
+        (total_length,) + entry_shape, layout_dtype, pool)
+    try:
+        with _shared_inputs([values[:total_length] for values in iterable], pool) as input_handles:
+            bounds = list(_chunk_bounds(total_length, plan.num_chunks))
+            tasks = ((_map_shared_helper_func, (func, input_handles, output_handle, begin_index, end_index, vectorized, out_dtype is None))
+                     for begin_index, end_index in bounds)
+            chunk_results = await _gather_tasks(pool, tasks, timeout)
+
+        promoted_chunks = [(begin_index, end_index, results)
+                           for (begin_index, end_index), results in zip(bounds, chunk_results) if results is not None]
+        if promoted_chunks:
+            return _promote_output(output, promoted_chunks)
+        # Copy the result out of shared memory before it is freed
+        return output if output_shm is None else output.copy()
+    finally:
+        # All views must be dropped before the block can be closed
+        del output, output_handle
+        if output_shm is not None:
+            release_shared_array(output_shm, unlink=True)
+
+
+async def aimap_parallel(func: Callable[..., R], *iterable: Iterable, chunk_size: int = 100, max_in_flight: Optional[int] = None, ordered: bool = True, pool: Optional[WorkerPool] = None, backend: Optional[str] = None) -> AsyncIterator[R]:
+    """Asynchronous generator to lazily apply the provided function `func` to all entries of tuples in `iterable` in parallel
+
+    Works like imap_parallel, but the results are awaited instead of blocking, so it can be consumed with `async for`.
+    If the consumer stops early or is cancelled, the chunks that have not started yet are cancelled.
+
+    Parameters
+    ----------
+    func : Callable[..., R]
+        A function, accepting exactly as many arguments as there are positional iterables in `iterable`. Must be picklable.
+    *iterable
+        an arbitrary number of iterables, including generators. See imap_parallel.
+    chunk_size: int, optional
+        The number of entries sent to a worker in one task. Default: 100
+    max_in_flight: int, optional
+        The maximum number of chunks submitted but not yet yielded. Defaults to twice the number of workers in the pool.
+    ordered: bool, optional
+        If True, results are yielded in the order of the input. If False, results of whichever chunk finishes first are yielded first. Default: True
+    pool: WorkerPool, optional
+        The pool of workers to run on. If not provided, the shared default pool of the `backend` is used.
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+
+    Returns
+    --------
+    AsyncIterator of R
+        An asynchronous iterator over the results of applying func to the entries in *iterable
+
+    See also
+    --------
+    imap_parallel: For the blocking version
+
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    # The length of the input is unknown, so "auto" can only decide by the interpreter
+    pool = _get_pool(pool, backend, None)
+
+    if max_in_flight is None:
+        max_in_flight = 2*pool.max_workers
+
+    loop = asyncio.get_running_loop()
+    executor = None if pool.kind == "serial" else pool.get_executor()
+
+    params_iterator = zip(*iterable)
+    # Read the input lazily, one list of at most chunk_size entries at a time, until an empty list signals the end
+    chunks = iter(lambda: list(islice(params_iterator, chunk_size)), [])
+
+    # A queue in submission order if ordered, otherwise just the set of pending futures
+    in_flight = deque() if ordered else set()
+
+    async def take_finished() -> List[asyncio.Future]:
+        if ordered:
+            # Only remove the future once it is done, so that it is still cancelled if the wait is interrupted
+            await asyncio.wait([in_flight[0]])
+            return [in_flight.popleft()]
+        done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        in_flight.difference_update(done)
+        return list(done)
+
+    try:
+        for chunk in chunks:
+            # Backpressure: only take the next chunk once there is room for it
+            while len(in_flight) >= max_in_flight:
+                for future in await take_finished():
+                    for result in future.result():
+                        yield result
+
+            future = loop.run_in_executor(executor, _map_helper_func, func, chunk)
+            if ordered:
+                in_flight.append(future)
+            else:
+                in_flight.add(future)
+
+        # All chunks are submitted, so we only need to drain the remaining ones
+        while in_flight:
+            for future in await take_finished():
+                for result in future.result():
+                    yield result
+    finally:
+        # If a task failed or the consumer stopped early, the remaining ones are not needed anymore
+        for future in in_flight:
+            future.cancel()
+
+
+async def areduce_parallel(func: Callable[[C, N], C], combine: Callable[[C, C], C], iterable: Sequence[N], initial: Optional[C] = None, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, vectorized: bool = False, backend: Optional[str] = None, timeout: Optional[float] = None) -> C:
+    """Coroutine to mimic reduce() functionality in parallel without blocking the event loop
+
+    Works like reduce_parallel, but the chunks are scheduled with loop.run_in_executor() and awaited.
+    The partial results are folded with `combine` in the order of the chunks once all of them are available.
+
+    Parameters
+    ----------
+    func: Callable[[C, N], C]
+        Function accepting a cumulative value and the next entry and returning the next cumulative value
+    combine: Callable[[C, C], C]
+        Function combining the results of calls to func() into one aggregate result
+    iterable: Sequence of N
+        The values to be reduced into one cumulative value
+    initial: C, optional
+        An optional initial cumulative value. See reduce_parallel.
+    min_executor_data_count: int, optional
+        The minimum chunk size of data assigned to each executor process. See reduce_parallel.
+    pool: WorkerPool, optional
+        The pool of workers to run on. If not provided, the shared default pool of the `backend` is used.
+    vectorized: bool, optional
+        If True, `func` must be a numpy ufunc like np.add. See reduce_parallel. Default: False
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+    timeout: float, optional
+        The maximum time in seconds to wait for the result. Waits indefinitely if not provided.
+
+    Returns
+    --------
+    C
+        The cumulative value after repeated evaluations of `func` on the entire list
+
+    Raises
+    --------
+    TypeError
+        If `iterable` is empty and no `initial` value is provided. The blocking version raises StopIteration instead, which cannot be raised from a coroutine.
+    asyncio.TimeoutError
+        If the result is not available within `timeout` seconds
+
+    See also
+    --------
+    reduce_parallel: For the blocking version
+
+    """
+    in_data = np.asarray(iterable) if vectorized else [
+        params for params in iterable]
+    total_length = len(in_data)
+
+    _check_not_empty(total_length, initial)
+    if total_length == 0:
+        return initial
+
+    pool = _get_pool(pool, backend, total_length, vectorized)
+    plan = await _run_off_loop(_get_reduce_plan, func, in_data, initial,
+                               min_executor_data_count, pool, vectorized)
+    if plan.serial:
+        # A single chunk off the event loop, without copying the data to any worker
+        pool = get_default_pool("serial")
+
+    if not vectorized:
+        tasks = ((reduce, (func, in_data[begin_index:end_index], initial))
+                 for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+        return _fold_partials(combine, await _gather_tasks(pool, tasks, timeout))
+
+    with _chunk_inputs([in_data], list(_chunk_bounds(total_length, plan.num_chunks)), pool) as chunks:
+        tasks = ((_reduce_shared_helper_func, (func, input_handles[0], begin_index, end_index, initial))
+                 for input_handles, begin_index, end_index in chunks)
+        return _fold_partials(combine, await _gather_tasks(pool, tasks, timeout))
+
+
+async def amap_reduce_parallel(func_map: Callable[..., R], reduce_func: Callable[[N, R], N], combine_func: Callable[[N, N], N], *iterable: Sequence, reduce_initial: N = None, min_executor_data_count: Optional[int] = None, pool: Optional[WorkerPool] = None, vectorized: bool = False, backend: Optional[str] = None, timeout: Optional[float] = None) -> N:
+    """Coroutine to apply first a map with func_map to the input iterables and then reduce with reduce_func and combine_func without blocking the event loop
+
+    Works like map_reduce_parallel, including the fusion of map and reduce on each worker, but the chunks are scheduled with loop.run_in_executor() and awaited.
+    The partial results are folded with `combine_func` in the order of the chunks once all of them are available.
+
+    Parameters
+    ----------
+    func_map : Callable[..., R]
+        A function, accepting exactly as many arguments as there are positional iterables in `iterable`
+    reduce_func: Callable[[N, R], N]
+        Function accepting a cumulative value and the next mapped entry and returning the next cumulative value
+    combine_func: Callable[[N, N], N]
+        Function combining the partial results of the chunks into one aggregate result
+    *iterable
+        an arbitrary number of sequences. See map_reduce_parallel.
+    reduce_initial: N, optional
+        An optional initial cumulative value. See map_reduce_parallel.
+    min_executor_data_count: int, optional
+        The minimum chunk size of data assigned to each executor process. See map_reduce_parallel.
+    pool: WorkerPool, optional
+        The pool of workers to run on. If not provided, the shared default pool of the `backend` is used.
+    vectorized: bool, optional
+        If True, `func_map` is called once per chunk with numpy slices and `reduce_func` must be a numpy ufunc. See map_reduce_parallel. Default: False
+    backend: str, optional
+        One of "serial", "thread", "process" or "auto". See map_parallel. Defaults to the global setting.
+    timeout: float, optional
+        The maximum time in seconds to wait for the result. Waits indefinitely if not provided.
+
+    Returns
+    --------
+    N
+        The same result as map_reduce_parallel
+
+    Raises
+    --------
+    TypeError
+        If there are no entries and no `reduce_initial` value is provided, see areduce_parallel
+    asyncio.TimeoutError
+        If the result is not available within `timeout` seconds
+
+    See also
+    --------
+    map_reduce_parallel: For the blocking version
+
+    """
+    if vectorized:
+        iterable = [np.asarray(values) for values in iterable]
+
+    shared = _is_shared_memory_input(iterable)
+    # Vectorized functions always get whole chunks of the arrays, which are pickled if they cannot be shared
+    chunked = shared or (vectorized and _has_array_entries(iterable))
+    if chunked:
+        total_length = min(len(values) for values in iterable)
+    else:
+        in_data = [params for params in zip(*iterable)]
+        total_length = len(in_data)
+
+    _check_not_empty(total_length, reduce_initial)
+    if total_length == 0:
+        return reduce_initial
+
+    pool = _get_pool(pool, backend, total_length, vectorized)
+    plan = await _run_off_loop(_get_map_reduce_plan, func_map, reduce_func, iterable if chunked else in_data, reduce_initial,
+                               total_length, min_executor_data_count, pool, shared, vectorized)
+    if plan.serial:
+        # A single chunk off the event loop, without copying the data to any worker
+        pool = get_default_pool("serial")
+
+    if not chunked:
+        tasks = ((_map_reduce_helper_func, (func_map, reduce_func, reduce_initial, in_data[begin_index:end_index]))
+                 for begin_index, end_index in _chunk_bounds(total_length, plan.num_chunks))
+        return _fold_partials(combine_func, await _gather_tasks(pool, tasks, timeout))
 
-    return reduce_parallel(reduce_func, combine_func, map_parallel(func_map, *iterable, min_executor_data_count=min_executor_data_count), initial=reduce_initial, min_executor_data_count=min_executor_data_count)
+    with _chunk_inputs([values[:total_length] for values in iterable], list(_chunk_bounds(total_length, plan.num_chunks)), pool) as chunks:
+        tasks = ((_map_reduce_shared_helper_func, (func_map, reduce_func, input_handles, begin_index, end_index, reduce_initial, vectorized))
+                 for input_handles, begin_index, end_index in chunks)
+        return _fold_partials(combine_func, await _gather_tasks(pool, tasks, timeout))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+import logging
+import os
+from typing import Optional, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Data on disk is either given as an array (usually an np.memmap) or as the path of a raw binary file
+DataSource = Union[np.ndarray, str, os.PathLike]
+
+# The number of samples processed at once. Bounds the memory of all temporary arrays independent of the size of the data
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def open_samples(source: DataSource, dtype: np.dtype = np.float64) -> np.ndarray:
+    """Function to open a series of samples without loading it into memory
+
+    Parameters
+    ----------
+    source: np.ndarray, str or os.PathLike
+        Either an array, e.g. an np.memmap, which is returned as it is, or the path of a raw binary file of samples
+    dtype: np.dtype, optional
+        The data type of the samples in the file. Ignored for arrays. Default: np.float64
+
+    Returns
+    --------
+    np.ndarray
+        The samples, memory-mapped read-only if a path was provided
+
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    return np.memmap(source, dtype=dtype, mode="r")
+
+
+def _open_output(out: Optional[DataSource], length: int, dtype: np.dtype) -> np.ndarray:
+    if out is None:
+        return np.empty((length,), dtype=dtype)
+    if isinstance(out, np.ndarray):
+        if out.shape != (length,):
+            raise ValueError("The output must have shape {}, got {}".format(
+                (length,), out.shape))
+        return out
+    # Creates or overwrites the file
+    return np.memmap(out, dtype=dtype, mode="w+", shape=(length,))
+
+
+def _check_block_sorted(x_block: np.ndarray, begin_index: int) -> None:
+    # Sorting does not fit into memory, so the samples must arrive in ascending order of x
+    if np.any(np.diff(x_block) < 0):
+        logging.error(
+            "Samples must be stored in ascending order of x. Found descending x in the block starting at index %d.", begin_index)
+        raise ValueError("Samples not in ascending order of x")
+
+
+def _check_lengths(x: np.ndarray, y: np.ndarray) -> int:
+    if len(x) != len(y):
+        raise ValueError(
+            "x and y must have the same length, got {} and {}".format(len(x), len(y)))
+    return len(x)
+
+
+def get_center_derivative_chunked(x: DataSource, y: DataSource, out: Optional[DataSource] = None, dtype: np.dtype = np.float64, out_dtype: Optional[np.dtype] = None, block_size: int = DEFAULT_BLOCK_SIZE) -> np.ndarray:
+    """Function to calculate the central numerical derivative of samples too large for memory, block by block
+
+    Each block is read together with one neighbouring sample on either side, so the differences at the block boundaries are the same as for the whole series.
+    Only O(`block_size`) memory is used besides the output, which can itself be a file.
+    Sorting does not fit into memory, so the samples must be stored in ascending order of x.
+
+    Parameters
+    ----------
+    x, y : np.ndarray, str or os.PathLike
+        The x and y positions of the points respectively, as arrays or np.memmap or as paths of raw binary files. Both of same length.
+    out: np.ndarray, str or os.PathLike, optional
+        Where to write the derivatives: an array of length two less than x, e.g. an np.memmap opened for writing, or the path of a binary file to create.
+        If not provided, the derivatives are returned in a new array in memory.
+    dtype: np.dtype, optional
+        The data type of the samples in the files if paths are given for x and y. Default: np.float64
+    out_dtype: np.dtype, optional
+        The data type of the output file or array to create. Defaults to the data type of the samples
+    block_size: int, optional
+        The number of derivatives calculated per block. Default: 2**20
+
+    Raises
+    --------
+    ValueError
+        If x is not in ascending order, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    np.ndarray of np.float32
+        The center derivatives, of length two less than x and y. The np.memmap of the file if `out` is a path
+
+    See also
+    --------
+    ex_3_3.get_center_derivative: For data in memory
+
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+
+    x = open_samples(x, dtype)
+    y = open_samples(y, dtype)
+    num_derivatives = max(0, _check_lengths(x, y) - 2)
+    output = _open_output(out, num_derivatives, out_dtype or np.result_type(x, y))
+
+    for begin_index in range(0, num_derivatives, block_size):
+        end_index = min(begin_index+block_size, num_derivatives)
+        # The derivatives at begin_index:end_index need the samples from begin_index up to end_index+1, i.e. one overlapping sample on each side
+        x_block = np.asarray(x[begin_index:end_index+2])
+        y_block = np.asarray(y[begin_index:end_index+2])
+        _check_block_sorted(x_block, begin_index)
+        output[begin_index:end_index] = (
+            y_block[2:]-y_block[:-2])/(x_block[2:]-x_block[:-2])
+
+    if isinstance(output, np.memmap):
+        output.flush()
+    return output
+
+
+def get_trapezoid_integral_chunked(x: DataSource, y: DataSource, dtype: np.dtype = np.float64, block_size: int = DEFAULT_BLOCK_SIZE) -> np.float32:
+    """Function to calculate the trapezoid integral of samples too large for memory, block by block
+
+    Consecutive blocks overlap by one sample, so the trapezoid between two blocks is counted exactly once.
+    Sorting does not fit into memory, so the samples must be stored in ascending order of x.
+
+    Parameters
+    ----------
+    x, y : np.ndarray, str or os.PathLike
+        The x and y positions of the function graph respectively, as arrays or np.memmap or as paths of raw binary files. Both of same length.
+    dtype: np.dtype, optional
+        The data type of the samples in the files if paths are given for x and y. Default: np.float64
+    block_size: int, optional
+        The number of trapezoids summed per block. Default: 2**20
+
+    Raises
+    --------
+    ValueError
+        If x is not in ascending order, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    np.float32
+        The area integral of the discrete function
+
+    See also
+    --------
+    ex_3_3.get_trapezoid_integral: For data in memory
+
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+
+    x = open_samples(x, dtype)
+    y = open_samples(y, dtype)
+    num_trapezoids = max(0, _check_lengths(x, y) - 1)
+
+    total = 0.0
+    for begin_index in range(0, num_trapezoids, block_size):
+        end_index = min(begin_index+block_size, num_trapezoids)
+        # The trapezoids begin_index:end_index need the samples up to end_index, i.e. one sample overlapping with the next block
+        x_block = np.asarray(x[begin_index:end_index+1])
+        y_block = np.asarray(y[begin_index:end_index+1])
+        _check_block_sorted(x_block, begin_index)
+        total += np.sum((y_block[1:]+y_block[:-1]) *
+                        (x_block[1:]-x_block[:-1])/2.0)
+    return total
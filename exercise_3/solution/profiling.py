@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class PhaseRecord(NamedTuple):
+    """One phase of a parallel call in the calling process, e.g. preparing the data or combining the partial results
+
+    Times are wall clock seconds since the epoch, so that they can be compared with the times measured in the worker processes.
+    """
+    name: str
+    start_time: float
+    end_time: float
+
+    @property
+    def duration(self) -> float:
+        """The time in seconds spent in this phase"""
+        return self.end_time - self.start_time
+
+
+class ChunkRecord(NamedTuple):
+    """The timing of one chunk of a parallel call, from its submission to the end of the work on the worker
+
+    Attributes
+    ----------
+    index: int
+        The number of the chunk in submission order
+    worker: str
+        The id of the worker that ran the chunk as "<process id>:<thread id>"
+    submit_time: float
+        When the chunk was handed to the pool
+    start_time: float
+        When the worker started the work on the chunk
+    end_time: float
+        When the worker finished the work on the chunk
+    bytes_sent: int
+        The size of the pickled task sent to a worker process, 0 if nothing was pickled
+    bytes_received: int
+        The size of the pickled result sent back by a worker process, 0 if nothing was pickled
+    """
+    index: int
+    worker: str
+    submit_time: float
+    start_time: float
+    end_time: float
+    bytes_sent: int
+    bytes_received: int
+
+    @property
+    def queue_wait(self) -> float:
+        """The time in seconds the chunk waited between submission and the start of the work, including the transfer to the worker"""
+        return self.start_time - self.submit_time
+
+    @property
+    def duration(self) -> float:
+        """The time in seconds the worker spent on the chunk"""
+        return self.end_time - self.start_time
+
+
+def _profiled_task(serialized: bool, func: Callable, *args) -> Tuple[Any, str, float, float, int]:
+    # Runs on the worker: the result is returned together with where and when it was computed
+    start_time = time.time()
+    result = func(*args)
+    end_time = time.time()
+    bytes_received = len(pickle.dumps(result)) if serialized else 0
+    worker = "{}:{}".format(os.getpid(), threading.get_ident())
+    return result, worker, start_time, end_time, bytes_received
+
+
+class CallProfile:
+    """The structured timing record of one parallel call
+
+    The record is filled while the call runs and handed to the `profile` callback of the call or collected by profile_calls() once the call has finished.
+
+    Parameters
+    ----------
+    name: str
+        The name of the profiled function, e.g. "map_parallel"
+
+    Attributes
+    ----------
+    name: str
+        The name of the profiled function
+    backend: str, optional
+        The kind of pool the call ran on
+    serial: bool, optional
+        Whether the call was evaluated in the calling process without any workers
+    num_workers, num_chunks: int, optional
+        The number of workers and chunks the call was split into
+    start_time, end_time: float
+        When the call started and ended, in wall clock seconds since the epoch
+    phases: List[PhaseRecord]
+        The phases in the calling process in the order they started
+    chunks: List[ChunkRecord]
+        The chunks in the order they were collected
+
+    See also
+    --------
+    profile_calls, to_chrome_trace
+
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.backend: Optional[str] = None
+        self.serial: Optional[bool] = None
+        self.num_workers: Optional[int] = None
+        self.num_chunks: Optional[int] = None
+        self.start_time = time.time()
+        self.end_time = self.start_time
+        self.phases: List[PhaseRecord] = []
+        self.chunks: List[ChunkRecord] = []
+        self.caller = "{}:{}".format(os.getpid(), threading.get_ident())
+        # Chunks submitted but not collected yet: future -> (index, submit time, bytes sent)
+        self._pending: Dict[Future, Tuple[int, float, int]] = {}
+        self._num_submitted = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Context manager recording the time spent in its body as the phase `name`"""
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.phases.append(PhaseRecord(name, start_time, time.time()))
+
+    def set_plan(self, backend: str, serial: bool, num_workers: int, num_chunks: int) -> None:
+        """Function to record how the call was split"""
+        self.backend = backend
+        self.serial = serial
+        self.num_workers = num_workers
+        self.num_chunks = num_chunks
+
+    def submit_chunk(self, pool, func: Callable, args: tuple) -> Future:
+        """Function to submit one chunk to `pool` so that its timing is recorded
+
+        The returned future yields the raw timing tuple and must be passed to collect_chunk() to obtain the plain result.
+        For worker processes, the task is pickled once more to measure its size.
+        """
+        serialized = pool.kind == "process"
+        bytes_sent = 0
+        if serialized:
+            with self.phase("pickle"):
+                bytes_sent = len(pickle.dumps((func, args)))
+
+        submit_time = time.time()
+        future = pool.submit(_profiled_task, serialized, func, *args)
+        self._pending[future] = (self._num_submitted, submit_time, bytes_sent)
+        self._num_submitted += 1
+        return future
+
+    def collect_chunk(self, future: Future) -> Future:
+        """Function to record a finished chunk submitted with submit_chunk() and return a future with its plain result"""
+        index, submit_time, bytes_sent = self._pending.pop(future)
+        if future.cancelled() or future.exception() is not None:
+            # Failed chunks only pass their exception on
+            return future
+
+        result, worker, start_time, end_time, bytes_received = future.result()
+        self.chunks.append(ChunkRecord(index, worker, submit_time,
+                                       start_time, end_time, bytes_sent, bytes_received))
+        plain_future = Future()
+        plain_future.set_result(result)
+        return plain_future
+
+    def finish(self) -> None:
+        """Function to mark the end of the call"""
+        self.end_time = time.time()
+
+    @property
+    def duration(self) -> float:
+        """The total time in seconds of the call"""
+        return self.end_time - self.start_time
+
+    @property
+    def bytes_serialized(self) -> int:
+        """The total number of bytes pickled to send the chunks to the workers and their results back"""
+        return sum(chunk.bytes_sent + chunk.bytes_received for chunk in self.chunks)
+
+    def summary(self) -> Dict[str, float]:
+        """Function to sum up the time per phase
+
+        Returns
+        --------
+        Dict[str, float]
+            The total time in seconds per phase name, plus "work" and "queue_wait" summed over all chunks and the total "duration" of the call
+
+        """
+        totals: Dict[str, float] = {}
+        for phase in self.phases:
+            totals[phase.name] = totals.get(phase.name, 0.0) + phase.duration
+        totals["work"] = totals.get("work", 0.0) + \
+            sum(chunk.duration for chunk in self.chunks)
+        totals["queue_wait"] = sum(chunk.queue_wait for chunk in self.chunks)
+        totals["duration"] = self.duration
+        return totals
+
+
+# The lists collecting the profiles of all calls inside of the active profile_calls() contexts
+_active_collectors: ContextVar[Tuple[List[CallProfile], ...]] = ContextVar(
+    "active_collectors", default=())
+
+
+@contextmanager
+def profile_calls() -> Iterator[List[CallProfile]]:
+    """Context manager collecting the profiles of all parallel calls made inside of it
+
+    Yields
+    --------
+    List of CallProfile
+        The list the profile of every finished call is appended to
+
+    """
+    profiles: List[CallProfile] = []
+    token = _active_collectors.set(_active_collectors.get() + (profiles,))
+    try:
+        yield profiles
+    finally:
+        _active_collectors.reset(token)
+
+
+def begin_call(name: str, profile: Optional[Callable[[CallProfile], None]]) -> Optional[CallProfile]:
+    """Function to start the profile of a call if it is requested, either by a `profile` callback or by an active profile_calls() context
+
+    Returns None otherwise, so that a disabled profiler costs nothing but this check.
+    """
+    if profile is None and not _active_collectors.get():
+        return None
+    return CallProfile(name)
+
+
+def end_call(call_profile: Optional[CallProfile], profile: Optional[Callable[[CallProfile], None]]) -> None:
+    """Function to finish the profile of a call and hand it to the callback and all active profile_calls() contexts"""
+    if call_profile is None:
+        return
+    call_profile.finish()
+    for profiles in _active_collectors.get():
+        profiles.append(call_profile)
+    if profile is not None:
+        profile(call_profile)
+
+
+def phase(call_profile: Optional[CallProfile], name: str) -> ContextManager[None]:
+    """Function to obtain a context manager recording the phase `name` if the call is profiled and doing nothing otherwise"""
+    if call_profile is None:
+        return nullcontext()
+    return call_profile.phase(name)
+
+
+def _split_worker(worker: str) -> Tuple[int, int]:
+    process_id, thread_id = worker.split(":")
+    return int(process_id), int(thread_id)
+
+
+def to_chrome_trace(profiles: Sequence[CallProfile]) -> Dict[str, Any]:
+    """Function to convert call profiles into the Chrome trace event format
+
+    The result can be loaded in chrome://tracing or https://ui.perfetto.dev to see the timeline of the calling process and every worker.
+
+    Parameters
+    ----------
+    profiles: Sequence of CallProfile
+        The profiles to convert
+
+    Returns
+    --------
+    Dict[str, Any]
+        The JSON serializable trace
+
+    """
+    def microseconds(seconds: float) -> float:
+        return seconds*1e6
+
+    events = []
+    for call_profile in profiles:
+        caller_pid, caller_tid = _split_worker(call_profile.caller)
+        events.append({"name": call_profile.name, "cat": "call", "ph": "X", "pid": caller_pid, "tid": caller_tid,
+                       "ts": microseconds(call_profile.start_time), "dur": microseconds(call_profile.duration),
+                       "args": {"backend": call_profile.backend, "serial": call_profile.serial, "num_workers": call_profile.num_workers,
+                                "num_chunks": call_profile.num_chunks, "bytes_serialized": call_profile.bytes_serialized}})
+        for phase_record in call_profile.phases:
+            events.append({"name": phase_record.name, "cat": "phase", "ph": "X", "pid": caller_pid, "tid": caller_tid,
+                           "ts": microseconds(phase_record.start_time), "dur": microseconds(phase_record.duration)})
+        for chunk in call_profile.chunks:
+            worker_pid, worker_tid = _split_worker(chunk.worker)
+            events.append({"name": "{} chunk {}".format(call_profile.name, chunk.index), "cat": "chunk", "ph": "X",
+                           "pid": worker_pid, "tid": worker_tid, "ts": microseconds(chunk.start_time), "dur": microseconds(chunk.duration),
+                           "args": {"queue_wait": chunk.queue_wait, "bytes_sent": chunk.bytes_sent, "bytes_received": chunk.bytes_received}})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(profiles: Sequence[CallProfile], path: str) -> None:
+    """Function to write call profiles to a file in the Chrome trace event format
+
+    Parameters
+    ----------
+    profiles: Sequence of CallProfile
+        The profiles to export
+    path: str
+        The path of the JSON file to write
+
+    See also
+    --------
+    to_chrome_trace
+
+    """
+    with open(path, "w") as trace_file:
+        json.dump(to_chrome_trace(profiles), trace_file)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+import logging
+from concurrent.futures import Future
+from typing import Iterator, List, Optional, Tuple, Union
+import numpy as np
+try:
+    from .worker_pool import WorkerPool, get_default_pool
+except ImportError:
+    # Imported as a top-level module by the scripts of this directory, see ex_3.2.py
+    from worker_pool import WorkerPool, get_default_pool
+
+logger = logging.getLogger(__name__)
+
+# The number of values drawn from one generator. Part of the definition of the random stream:
+# changing it changes the values for a given seed, changing the number of workers does not
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+# The number of tasks per worker, for load balancing
+TASKS_PER_WORKER = 4
+
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+def get_seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    """Function to obtain the root seed sequence of a random stream
+
+    Parameters
+    ----------
+    seed: None, int or np.random.SeedSequence, optional
+        The seed. If None, fresh entropy from the operating system is used, which can be retrieved from the `entropy` of the result to reproduce the stream
+
+    Returns
+    --------
+    np.random.SeedSequence
+        The root seed sequence
+
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def _get_block_generator(root: np.random.SeedSequence, block_index: int) -> np.random.Generator:
+    # The same seed sequence as root.spawn(block_index+1)[block_index] of a fresh root, without creating the sequences of all previous blocks
+    child = np.random.SeedSequence(root.entropy, spawn_key=tuple(root.spawn_key) + (block_index,), pool_size=root.pool_size)
+    return np.random.Generator(np.random.PCG64(child))
+
+
+def _fill_block(root: np.random.SeedSequence, block_index: int, out: np.ndarray, mean: np.float32, sigma: np.float32) -> None:
+    _get_block_generator(root, block_index).standard_normal(out=out, dtype=out.dtype)
+    # Scaling in place does not allocate any temporary arrays
+    if sigma != 1.0:
+        out *= sigma
+    if mean != 0.0:
+        out += mean
+
+
+def _fill_blocks(root: np.random.SeedSequence, out: np.ndarray, first_block: int, block_size: int, mean: np.float32, sigma: np.float32) -> None:
+    # Fills out with the consecutive blocks of the stream starting at first_block
+    for begin_index in range(0, len(out), block_size):
+        _fill_block(root, first_block + begin_index//block_size, out[begin_index:begin_index+block_size], mean, sigma)
+
+
+def fill_normal(out: np.ndarray, mean: np.float32 = 0.0, sigma: np.float32 = 1.0, seed: Seed = None, block_size: int = DEFAULT_BLOCK_SIZE, pool: Optional[WorkerPool] = None) -> np.ndarray:
+    """Function to fill an array with normal distributed random numbers in parallel
+
+    The array is split into blocks of `block_size` values, each drawn from its own generator seeded with a child of the seed sequence.
+    The blocks are filled by the workers in place, so no memory is allocated besides `out`, which may also be an np.memmap larger than the available memory.
+    For a given seed and block size, the values are the same for any number of workers.
+
+    Parameters
+    ----------
+    out: np.ndarray of np.float32 or np.float64
+        The C-contiguous array to fill, e.g. an np.memmap opened for writing
+    mean: np.float32, optional
+        The desired mean of the numbers. Default: 0.0
+    sigma: np.float32, optional
+        The desired standard deviation of numbers. Default: 1.0
+    seed: None, int or np.random.SeedSequence, optional
+        The seed of the random stream, see get_seed_sequence
+    block_size: int, optional
+        The number of values drawn from each generator. Default: 2**16
+    pool: WorkerPool, optional
+        The pool to fill the blocks on. The generators release the GIL, so the default is the shared thread pool.
+        Worker processes cannot write to `out`, so process pools are not supported
+
+    Raises
+    --------
+    ValueError
+        If `out` is not a C-contiguous array of floats or `pool` consists of processes, then the function will log an error and throw a ValueError
+
+    Returns
+    --------
+    np.ndarray
+        The filled array `out`
+
+    See also
+    --------
+    get_normal_array, iter_normal_blocks
+
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1")
+    if out.dtype not in (np.float32, np.float64) or not out.flags.c_contiguous:
+        logging.error("The output must be a C-contiguous array of np.float32 or np.float64. Got an array of %s.", out.dtype)
+        raise ValueError("Output not supported")
+    if pool is None:
+        pool = get_default_pool("thread")
+    if pool.kind == "process":
+        logging.error("Random numbers are written in place, which needs a thread or serial pool. Got a process pool.")
+        raise ValueError("Process pools not supported")
+
+    root = get_seed_sequence(seed)
+    # A flat view, so that every block is a contiguous range
+    flat = out.reshape(-1)
+    num_blocks = -(-flat.size//block_size)
+
+    num_tasks = min(num_blocks, pool.max_workers*TASKS_PER_WORKER)
+    futures: List[Future] = []
+    try:
+        for task_index in range(num_tasks):
+            # Every task fills a contiguous range of blocks
+            begin_block = num_blocks*task_index//num_tasks
+            end_block = num_blocks*(task_index+1)//num_tasks
+            futures.append(pool.submit(_fill_blocks, root, flat[begin_block*block_size:end_block*block_size],
+                                       begin_block, block_size, mean, sigma))
+        for future in futures:
+            future.result()
+    finally:
+        # If a block failed, the blocks that have not started yet are not needed anymore
+        for future in futures:
+            future.cancel()
+    return out
+
+
+def get_normal_array(n: Union[int, Tuple[int, ...]], mean: np.float32 = 0.0, sigma: np.float32 = 1.0, seed: Seed = None, dtype: np.dtype = np.float64, block_size: int = DEFAULT_BLOCK_SIZE, pool: Optional[WorkerPool] = None) -> np.ndarray:
+    """Function to obtain a numpy array of length/shape n filled with normal distributed random numbers with the denoted mean and sigma, generated in parallel
+
+    Parameters
+    ----------
+    n : int or Tuple[int]
+        The length (if int) or shape (if tuple) of the target array of random numbers
+    mean, sigma, seed, block_size, pool: optional
+        See fill_normal
+    dtype: np.dtype, optional
+        np.float32 or np.float64. Default: np.float64
+
+    Returns
+    --------
+    np.ndarray of dtype
+        The resulting array of randomly generated values
+
+    See also
+    --------
+    fill_normal
+
+    """
+    return fill_normal(np.empty(n, dtype=dtype), mean, sigma, seed, block_size, pool)
+
+
+def iter_normal_blocks(n: int, mean: np.float32 = 0.0, sigma: np.float32 = 1.0, seed: Seed = None, dtype: np.dtype = np.float64, block_size: int = DEFAULT_BLOCK_SIZE, blocks_per_chunk: int = 16) -> Iterator[np.ndarray]:
+    """Function to lazily generate n normal distributed random numbers chunk by chunk
+
+    Only one chunk is held in memory at a time. The concatenated chunks equal the result of get_normal_array for the same seed and block size.
+
+    Parameters
+    ----------
+    n : int
+        The total number of values
+    mean, sigma, seed, block_size: optional
+        See fill_normal
+    dtype: np.dtype, optional
+        np.float32 or np.float64. Default: np.float64
+    blocks_per_chunk: int, optional
+        The number of blocks of `block_size` values per yielded chunk. Default: 16
+
+    Yields
+    --------
+    np.ndarray of dtype
+        The next chunk of at most blocks_per_chunk*block_size values
+
+    """
+    if block_size < 1 or blocks_per_chunk < 1:
+        raise ValueError("block_size and blocks_per_chunk must be at least 1")
+    root = get_seed_sequence(seed)
+    chunk_size = block_size*blocks_per_chunk
+    for begin_index in range(0, n, chunk_size):
+        chunk = np.empty((min(chunk_size, n-begin_index),), dtype=dtype)
+        _fill_blocks(root, chunk, begin_index//block_size, block_size, mean, sigma)
+        yield chunk
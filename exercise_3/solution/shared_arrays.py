@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple, Tuple
+import numpy as np
+
+
+class SharedArraySpec(NamedTuple):
+    """Everything a worker process needs to attach to a numpy array placed in shared memory
+
+    Only this small description is sent to the workers, never the data itself.
+    """
+    name: str
+    dtype: str
+    shape: Tuple[int, ...]
+
+
+def create_shared_array(shape: Tuple[int, ...], dtype: np.dtype) -> Tuple[SharedMemory, np.ndarray, SharedArraySpec]:
+    """Function to allocate an uninitialized numpy array in a new block of shared memory
+
+    The caller owns the returned SharedMemory and is responsible for calling `close()` and `unlink()` on it once the array is no longer needed.
+
+    Parameters
+    ----------
+    shape: Tuple[int, ...]
+        The shape of the array to allocate
+    dtype: np.dtype
+        The data type of the array to allocate
+
+    Raises
+    --------
+    ValueError
+        If the data type holds Python objects, which are only pointers into the memory of the creating process
+
+    Returns
+    --------
+    Tuple[SharedMemory, np.ndarray, SharedArraySpec]
+        The shared memory block, an array view into it and the spec that workers can use to attach to it
+
+    """
+    dtype = np.dtype(dtype)
+    if dtype.hasobject:
+        raise ValueError("Arrays of data type {} hold Python objects and cannot be placed in shared memory".format(dtype))
+    # A shared memory block of size 0 is not allowed, so we always allocate at least one byte
+    size = max(1, int(np.prod(shape, dtype=np.int64)) * dtype.itemsize)
+    shm = SharedMemory(create=True, size=size)
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return shm, array, SharedArraySpec(shm.name, dtype.str, tuple(shape))
+
+
+def share_array(source: np.ndarray) -> Tuple[SharedMemory, np.ndarray, SharedArraySpec]:
+    """Function to copy an existing numpy array into a new block of shared memory
+
+    Parameters
+    ----------
+    source: np.ndarray
+        The array to be copied
+
+    Raises
+    --------
+    ValueError
+        If the data type of `source` holds Python objects, see create_shared_array
+
+    Returns
+    --------
+    Tuple[SharedMemory, np.ndarray, SharedArraySpec]
+        The shared memory block, the copy of `source` inside of it and the spec that workers can use to attach to it
+
+    See also
+    --------
+    create_shared_array
+
+    """
+    shm, array, spec = create_shared_array(source.shape, source.dtype)
+    array[...] = source
+    return shm, array, spec
+
+
+def attach_shared_array(spec: SharedArraySpec) -> Tuple[SharedMemory, np.ndarray]:
+    """Function to open a numpy array in shared memory that was created by another process
+
+    The caller must call `close()` on the returned SharedMemory once done, but must not unlink it.
+
+    Parameters
+    ----------
+    spec: SharedArraySpec
+        The description of the shared array as returned on creation
+
+    Returns
+    --------
+    Tuple[SharedMemory, np.ndarray]
+        The attached shared memory block and an array view into it
+
+    """
+    shm = SharedMemory(name=spec.name)
+    array = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+    return shm, array
+
+
+def release_shared_array(shm: SharedMemory, unlink: bool = False) -> None:
+    """Function to close a shared memory block and optionally free it
+
+    Parameters
+    ----------
+    shm: SharedMemory
+        The shared memory block to be released. All array views into it must have been dropped before.
+    unlink: bool, optional
+        Whether to also free the block. Only the creating process should do this. Default: False
+
+    """
+    shm.close()
+    if unlink:
+        shm.unlink()
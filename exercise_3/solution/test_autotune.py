@@ -0,0 +1,119 @@
+import gc
+import unittest
+import weakref
+import numpy as np
+from .autotune import plan_execution, static_plan, get_cost_per_entry, clear_cost_cache, COST_CACHE_SIZE
+from .map_reduce_parallel import map_parallel, reduce_parallel
+from .worker_pool import WorkerPool
+from numpy.testing import assert_almost_equal
+
+
+def calc_square(x: np.float32) -> np.float32:
+    return x*x
+
+
+def calc_sum(x: np.float32, y: np.float32) -> np.float32:
+    return x+y
+
+
+class TestPlanExecution(unittest.TestCase):
+    def test_cheap_function_runs_serial(self):
+        plan = plan_execution(1e-7, 1000, max_workers=8)
+        self.assertTrue(plan.serial)
+
+    def test_empty_input_runs_serial(self):
+        plan = plan_execution(1.0, 0, max_workers=8)
+        self.assertTrue(plan.serial)
+
+    def test_single_worker_runs_serial(self):
+        plan = plan_execution(1e-2, 1000, max_workers=1)
+        self.assertTrue(plan.serial)
+
+    def test_expensive_function_uses_all_workers(self):
+        plan = plan_execution(1e-2, 1000, max_workers=8, chunks_per_worker=4)
+        self.assertFalse(plan.serial)
+        self.assertEqual(plan.num_workers, 8)
+        self.assertEqual(plan.num_chunks, 32)
+        self.assertGreaterEqual(plan.num_chunks*plan.chunk_size, 1000)
+
+    def test_chunks_not_larger_than_input(self):
+        plan = plan_execution(1.0, 3, max_workers=8)
+        self.assertFalse(plan.serial)
+        self.assertLessEqual(plan.num_chunks, 3)
+
+    def test_static_plan(self):
+        plan = static_plan(100, max_workers=8, min_executor_data_count=20)
+        self.assertFalse(plan.serial)
+        self.assertEqual(plan.num_workers, 5)
+        self.assertEqual(plan.num_chunks, 5)
+        self.assertEqual(plan.chunk_size, 20)
+
+
+class TestCostCache(unittest.TestCase):
+    def setUp(self):
+        clear_cost_cache()
+
+    def test_pilot_runs_once(self):
+        calls = []
+
+        def pilot():
+            calls.append(1)
+            return 10
+
+        cost_1 = get_cost_per_entry("key", pilot)
+        cost_2 = get_cost_per_entry("key", pilot)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cost_1, cost_2)
+        self.assertGreaterEqual(cost_1, 0.0)
+
+    def test_empty_pilot_not_cached(self):
+        calls = []
+
+        def pilot():
+            calls.append(1)
+            return 0
+
+        self.assertEqual(get_cost_per_entry("empty", pilot), 0.0)
+        get_cost_per_entry("empty", pilot)
+        self.assertEqual(len(calls), 2)
+
+    def test_bounded(self):
+        def pilot():
+            return 10
+
+        first_func = lambda x: x
+        first_func_ref = weakref.ref(first_func)
+        get_cost_per_entry((first_func, "map"), pilot)
+        del first_func
+        # Functions created anew for every call must neither grow the cache without limit nor be kept alive
+        for _ in range(COST_CACHE_SIZE):
+            get_cost_per_entry((lambda x: x, "map"), pilot)
+        gc.collect()
+        self.assertIsNone(first_func_ref())
+
+        # Recently used keys are kept
+        calls = []
+
+        def counting_pilot():
+            calls.append(1)
+            return 10
+
+        get_cost_per_entry("used", counting_pilot)
+        for index in range(COST_CACHE_SIZE):
+            get_cost_per_entry("used", counting_pilot)
+            get_cost_per_entry(index, pilot)
+        self.assertEqual(len(calls), 1)
+
+    def test_auto_tuned_calls(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        with WorkerPool(max_workers=2) as pool:
+            result_map = map_parallel(calc_square, data_list, pool=pool)
+            result_map_list = map_parallel(calc_square, list(data_list), pool=pool)
+            result_reduce = reduce_parallel(calc_sum, calc_sum, data_list, pool=pool)
+        assert_almost_equal(result_map, data_list**2)
+        assert_almost_equal(np.array(result_map_list), data_list**2)
+        assert_almost_equal(result_reduce, np.sum(data_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import unittest
+from .benchmark import summarize, compare_results, run_benchmarks, measure_peak_memory
+from .worker_pool import get_default_pool
+from numpy.testing import assert_almost_equal
+
+
+def make_report(medians: dict, iqr: float = 0.0) -> dict:
+    return {"results": [{"case": case, "n": 100, "workers": 2, "median": median, "iqr": iqr}
+                        for case, median in medians.items()]}
+
+
+class TestSummarize(unittest.TestCase):
+    def test_quartiles(self):
+        summary = summarize([1.0, 2.0, 3.0, 4.0, 5.0])
+        assert_almost_equal(summary["median"], 3.0)
+        assert_almost_equal(summary["iqr"], 2.0)
+        assert_almost_equal(summary["min"], 1.0)
+        assert_almost_equal(summary["max"], 5.0)
+
+
+class TestCompareResults(unittest.TestCase):
+    def test_regression_flagged(self):
+        baseline = make_report({"fast": 1.0, "slow": 1.0})
+        current = make_report({"fast": 1.05, "slow": 2.0})
+        comparison = {entry["case"]: entry for entry in compare_results(
+            baseline, current, tolerance=0.1)}
+        self.assertFalse(comparison["fast"]["regression"])
+        self.assertTrue(comparison["slow"]["regression"])
+        assert_almost_equal(comparison["slow"]["ratio"], 2.0)
+
+    def test_noise_not_flagged(self):
+        comparison = compare_results(make_report({"noisy": 1.0}, iqr=2.0),
+                                     make_report({"noisy": 2.0}, iqr=2.0))
+        self.assertFalse(comparison[0]["regression"])
+
+    def test_missing_cases_skipped(self):
+        comparison = compare_results(make_report({"old": 1.0}),
+                                     make_report({"new": 1.0}))
+        self.assertEqual(comparison, [])
+
+
+class TestRunBenchmarks(unittest.TestCase):
+    def test_speedup_against_baseline(self):
+        report = run_benchmarks(["reduce_parallel_vectorized"], sizes=[1000], workers=[1, 2],
+                                backend="thread", warmup=1, repeat=3, log=lambda message: None, memory=False)
+        cases = [(entry["case"], entry["workers"])
+                 for entry in report["results"]]
+        self.assertEqual(cases, [("numpy_sum", None), ("reduce_parallel_vectorized", 1),
+                                 ("reduce_parallel_vectorized", 2)])
+        for entry in report["results"][1:]:
+            self.assertEqual(entry["baseline"], "numpy_sum")
+            self.assertGreater(entry["speedup"], 0.0)
+        self.assertIn("cpu_count", report["environment"])
+
+    def test_pools_restored(self):
+        previous_num_workers = [get_default_pool(kind).max_workers for kind in ("thread", "process")]
+        run_benchmarks(["map_parallel_vectorized"], sizes=[100], workers=[1, 3],
+                       backend="thread", warmup=0, repeat=1, log=lambda message: None, memory=False)
+        self.assertEqual([get_default_pool(kind).max_workers for kind in ("thread", "process")], previous_num_workers)
+
+    def test_unknown_case(self):
+        with self.assertRaises(ValueError):
+            run_benchmarks(["does_not_exist"])
+
+
+@unittest.skipIf(sys.platform == "win32", "Resident memory is not reported on Windows")
+class TestMeasurePeakMemory(unittest.TestCase):
+    def test_calling_process(self):
+        memory = measure_peak_memory("numpy_square", 1_000_000, seed=42)
+        # At least the result array of 8 bytes per entry
+        self.assertGreater(memory["peak_rss_bytes"], 4_000_000)
+        self.assertIsNone(memory["worker_peak_rss_bytes"])
+
+    def test_worker_processes(self):
+        memory = measure_peak_memory("map_reduce_parallel", 100_000, seed=42, num_workers=2, backend="process")
+        self.assertGreaterEqual(memory["peak_rss_bytes"], 0)
+        self.assertGreater(memory["worker_peak_rss_bytes"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
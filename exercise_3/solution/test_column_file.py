@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from .column_file import ALIGNMENT, create_columns, open_columns, read_metadata, to_structured, write_columns
+from numpy.testing import assert_array_equal
+
+
+class ColumnFileTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "table.cols")
+
+
+class TestColumnFile(ColumnFileTestCase):
+    def test_round_trip(self):
+        columns = {"x": np.random.exponential(10, size=(1001,)), "count": np.arange(1001, dtype=np.int32),
+                   "name": np.array(["name_{}".format(index) for index in range(1001)]), "flag": np.arange(1001) % 3 == 0}
+        write_columns(self.path, columns, metadata={"source": "test", "version": [1, 2]})
+
+        result = open_columns(self.path)
+        self.assertEqual(list(result), list(columns))
+        for name, values in columns.items():
+            self.assertIsInstance(result[name], np.memmap)
+            self.assertEqual(result[name].dtype, values.dtype)
+            assert_array_equal(result[name], values)
+            # Every column is aligned, so it can be used with any vectorized routine
+            self.assertEqual(result[name].offset % ALIGNMENT, 0)
+        self.assertEqual(read_metadata(self.path), {"source": "test", "version": [1, 2]})
+
+    def test_read_only(self):
+        write_columns(self.path, {"x": np.arange(10.0)})
+        with self.assertRaises(ValueError):
+            open_columns(self.path)["x"][0] = 1.0
+
+    def test_structured(self):
+        table = np.zeros((5,), dtype=[("a", np.float32), ("b", np.int64)])
+        table["a"] = np.arange(5)
+        table["b"] = -np.arange(5)
+        write_columns(self.path, table)
+        assert_array_equal(to_structured(open_columns(self.path)), table)
+
+    def test_create_blockwise(self):
+        columns = create_columns(self.path, 1000, {"x": np.float64, "y": np.float32}, metadata={"step": 0.5})
+        for begin_index in range(0, 1000, 300):
+            columns["x"][begin_index:begin_index+300] = np.arange(begin_index, min(begin_index+300, 1000))*0.5
+            columns["y"][begin_index:begin_index+300] = 1.0
+        for column in columns.values():
+            column.flush()
+        del columns
+
+        result = open_columns(self.path)
+        assert_array_equal(result["x"], np.arange(1000)*0.5)
+        assert_array_equal(result["y"], np.ones(1000, dtype=np.float32))
+
+    def test_large_header(self):
+        # Many columns make the header longer than the space reserved at first
+        columns = {"column_with_a_long_name_{}".format(index): np.full(3, index) for index in range(100)}
+        write_columns(self.path, columns)
+        result = open_columns(self.path)
+        for name, values in columns.items():
+            assert_array_equal(result[name], values)
+
+    def test_empty(self):
+        write_columns(self.path, {"x": np.empty((0,))})
+        self.assertEqual(open_columns(self.path)["x"].shape, (0,))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            write_columns(self.path, {"x": np.arange(3), "y": np.arange(4)})
+        with self.assertRaises(ValueError):
+            write_columns(self.path, {"x": np.array([None, 1])})
+        with open(self.path, "wb") as data_file:
+            data_file.write(b"not a column file")
+        with self.assertRaises(ValueError):
+            open_columns(self.path)
+
+    def test_not_one_dimensional(self):
+        write_columns(self.path, {"x": np.arange(3.0)})
+        for columns in ({"x": np.arange(3.0), "y": np.ones((3, 2))}, {"x": np.float64(1.0)}):
+            with self.assertRaises(ValueError):
+                write_columns(self.path, columns)
+            # The previous file is left intact
+            assert_array_equal(open_columns(self.path)["x"], np.arange(3.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+from .gaussian_fit import MomentAccumulator, fit_normal, fit_normal_chunks, fit_normal_histogram
+from .histogram import Histogram
+from .random_arrays import get_normal_array
+from numpy.testing import assert_allclose, assert_array_equal
+
+
+class TestFitNormal(unittest.TestCase):
+    def test_single_channel(self):
+        samples = get_normal_array(200000, mean=3.0, sigma=0.5, seed=1)
+        fit = fit_normal(samples, block_size=7000)
+        assert_allclose(fit.mean, np.mean(samples))
+        assert_allclose(fit.sigma, np.std(samples))
+        assert_allclose(fit.mean_error, np.std(samples)/np.sqrt(200000))
+        assert_allclose(fit.sigma_error, np.std(samples)/np.sqrt(400000))
+        self.assertEqual(fit.num_samples, 200000)
+        assert_allclose(fit_normal(samples, ddof=1).sigma, np.std(samples, ddof=1))
+
+    def test_channels(self):
+        samples = get_normal_array((3, 4, 10000), seed=2)
+        samples += np.arange(3)[:, np.newaxis, np.newaxis]
+        fit = fit_normal(samples, block_size=999)
+        assert_allclose(fit.mean, np.mean(samples, axis=-1))
+        assert_allclose(fit.sigma, np.std(samples, axis=-1))
+        # Samples along another axis
+        fit = fit_normal(np.moveaxis(samples, -1, 0), axis=0)
+        assert_allclose(fit.mean, np.mean(samples, axis=-1))
+
+    def test_large_mean(self):
+        # Sums of squares would lose all digits of the variance
+        samples = 1e9 + get_normal_array(100000, sigma=1e-3, seed=3)
+        assert_allclose(fit_normal(samples, block_size=1000).sigma, np.std(samples), rtol=1e-6)
+
+    def test_chunks_and_merge(self):
+        samples = get_normal_array((2, 30000), seed=4)
+        expected_res = fit_normal(samples)
+        fit = fit_normal_chunks(np.array_split(samples, 7, axis=-1))
+        assert_allclose(fit.mean, expected_res.mean)
+        assert_allclose(fit.sigma, expected_res.sigma)
+
+        first = MomentAccumulator((2,)).add(samples[:, :100])
+        first.merge(MomentAccumulator((2,)).add(samples[:, 100:]))
+        assert_allclose(first.estimate().sigma, expected_res.sigma)
+        assert_array_equal(first.count, [30000, 30000])
+
+    def test_empty(self):
+        fit = fit_normal(np.empty((2, 0)))
+        self.assertTrue(np.all(np.isnan(fit.mean)))
+        self.assertTrue(np.all(np.isnan(fit.sigma)))
+        self.assertTrue(np.isnan(fit_normal_chunks([]).mean))
+        self.assertTrue(np.isnan(fit_normal(np.ones(1), ddof=1).sigma))
+        with self.assertRaises(ValueError):
+            MomentAccumulator((2,)).add(np.ones((3, 10)))
+
+
+class TestFitNormalHistogram(unittest.TestCase):
+    def test_fallback(self):
+        samples = get_normal_array(500000, mean=1.0, sigma=2.0, seed=5)
+        histogram = Histogram.uniform(40, (-7.0, 9.0)).add(samples)
+        centers, = histogram.centers
+        fit = fit_normal_histogram(centers, histogram.density())
+        self.assertAlmostEqual(float(fit.mean), 1.0, places=1)
+        self.assertAlmostEqual(float(fit.sigma), 2.0, places=1)
+        self.assertTrue(fit.mean_error > 0)
+
+        # One histogram per channel
+        fits = fit_normal_histogram(centers, np.stack([histogram.density()]*2), p0=[(0.0, 1.0), (2.0, 3.0)])
+        assert_allclose(fits.mean, [fit.mean]*2, rtol=1e-4)
+        assert_allclose(fits.sigma, [fit.sigma]*2, rtol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
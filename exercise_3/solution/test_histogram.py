@@ -0,0 +1,100 @@
+import unittest
+import numpy as np
+from .histogram import Histogram
+from .map_reduce_parallel import map_reduce_parallel
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+
+class TestHistogram1D(unittest.TestCase):
+    def test_uniform_edges(self):
+        data = np.random.randn(10000)
+        # Samples right on the edges, outside of them and NaN
+        data[:5] = [-3.0, 3.0, -2.4, 5.0, np.nan]
+        histogram = Histogram.uniform(10, (-3.0, 3.0)).add(data)
+        expected_res, _ = np.histogram(data[~np.isnan(data)], bins=10, range=(-3.0, 3.0))
+        assert_array_equal(histogram.counts, expected_res)
+        self.assertEqual(histogram.num_samples, 10000)
+
+    def test_edges_on_rounding_boundaries(self):
+        # Edges like 0.1*k are not exactly representable, so index arithmetic alone would put some of these samples into the wrong bin
+        edges = np.linspace(0.0, 1.0, 11)
+        data = np.concatenate([edges, np.nextafter(edges, -np.inf), np.nextafter(edges, np.inf)])
+        assert_array_equal(Histogram(edges).add(data).counts, np.histogram(data, bins=edges)[0])
+
+    def test_far_and_offset_samples(self):
+        # Infinite and huge samples must not overflow the integer bin indices, and edges far from 0 must not lose the rounding correction
+        data = np.concatenate([[np.inf, -np.inf, 1e300, -1e300, np.nan], 1e6 + np.random.rand(10000)])
+        edges = np.linspace(1e6, 1e6 + 1.0, 33)
+        data = np.concatenate([data, edges, np.nextafter(edges, -np.inf), np.nextafter(edges, np.inf)])
+        assert_array_equal(Histogram(edges).add(data).counts, np.histogram(data[~np.isnan(data)], bins=edges)[0])
+
+    def test_non_uniform_edges(self):
+        data = np.random.exponential(1.0, size=(10000,))
+        edges = np.array([0.0, 0.1, 0.5, 1.0, 2.0, 5.0])
+        data[:3] = [5.0, 0.5, np.nan]
+        histogram = Histogram(edges).add(data)
+        data = data[~np.isnan(data)]
+        assert_array_equal(histogram.counts, np.histogram(data, bins=edges)[0])
+        assert_almost_equal(histogram.density(), np.histogram(data, bins=edges, density=True)[0])
+
+    def test_chunks_and_merge(self):
+        data = np.random.randn(10000)
+        expected_res = Histogram.uniform(20, (-4.0, 4.0)).add(data)
+
+        histogram = Histogram.uniform(20, (-4.0, 4.0)).add_chunks(np.array_split(data, 7))
+        assert_array_equal(histogram.counts, expected_res.counts)
+
+        first = Histogram.uniform(20, (-4.0, 4.0)).add(data[:3000])
+        second = Histogram.uniform(20, (-4.0, 4.0)).add(data[3000:])
+        assert_array_equal(first.merge(second).counts, expected_res.counts)
+        self.assertEqual(first.num_samples, 10000)
+
+        with self.assertRaises(ValueError):
+            first.merge(Histogram.uniform(20, (-4.0, 5.0)))
+
+    def test_map_reduce_parallel(self):
+        data = np.random.randn(100000)
+        histogram = Histogram.uniform(50, (-5.0, 5.0))
+        counts = map_reduce_parallel(histogram.count_chunk, np.add, np.add, data, vectorized=True, min_executor_data_count=10000)
+        histogram.add_counts(counts, len(data))
+        assert_array_equal(histogram.counts, np.histogram(data, bins=50, range=(-5.0, 5.0))[0])
+
+    def test_invalid_edges(self):
+        with self.assertRaises(ValueError):
+            Histogram([0.0, 1.0, 0.5])
+        with self.assertRaises(ValueError):
+            Histogram([0.0])
+
+
+class TestHistogram2D(unittest.TestCase):
+    def test_uniform(self):
+        data = np.random.randn(2, 10000)
+        histogram = Histogram.uniform((10, 20), ((-3.0, 3.0), (-2.0, 4.0))).add(data[0], data[1])
+        expected_res, edges_x, edges_y = np.histogram2d(data[0], data[1], bins=(10, 20), range=((-3.0, 3.0), (-2.0, 4.0)))
+        assert_array_equal(histogram.counts, expected_res)
+        assert_almost_equal(histogram.centers[1], (edges_y[:-1]+edges_y[1:])/2.0)
+
+    def test_outside_in_one_dimension(self):
+        data = np.random.randn(2, 10000)
+        data[0, :3] = [np.nan, 10.0, 3.0]
+        data[1, 3:6] = [-np.inf, -3.0, 1.0]
+        histogram = Histogram.uniform((6, 6), ((-3.0, 3.0), (-3.0, 3.0))).add(data[0], data[1])
+        valid = ~np.isnan(data).any(axis=0)
+        expected_res, _, _ = np.histogram2d(data[0, valid], data[1, valid], bins=6, range=((-3.0, 3.0), (-3.0, 3.0)))
+        assert_array_equal(histogram.counts, expected_res)
+
+    def test_mixed_edges_parallel(self):
+        data = np.random.exponential(1.0, size=(2, 10000))
+        edges = (np.array([0.0, 0.5, 1.0, 3.0]), np.linspace(0.0, 4.0, 9))
+        histogram = Histogram(edges)
+        histogram.add_chunks(zip(np.array_split(data[0], 3), np.array_split(data[1], 3)))
+        expected_res, _, _ = np.histogram2d(data[0], data[1], bins=edges)
+        assert_array_equal(histogram.counts, expected_res)
+
+        counts = map_reduce_parallel(histogram.count_chunk, np.add, np.add, data[0], data[1], vectorized=True, min_executor_data_count=1000)
+        assert_array_equal(counts, expected_res)
+        assert_almost_equal(histogram.density(), np.histogram2d(data[0], data[1], bins=edges, density=True)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+import warnings
+import numpy as np
+from .loader import infer_column_types, load_columns, CACHE_SUFFIX
+from .column_file import open_columns
+from numpy.testing import assert_almost_equal, assert_array_equal
+
+
+class LoaderTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        self.numbers = np.random.exponential(10, size=(500,))
+        self.counts = np.arange(500)
+        self.path = os.path.join(self.directory, "data.txt")
+        with open(self.path, "w") as data_file:
+            data_file.write("# number name count\n")
+            for index in range(500):
+                data_file.write("{!r}   name_{}  {}\n".format(float(self.numbers[index]), index, self.counts[index]))
+                if index == 250:
+                    # Empty lines and comments in the middle of the data
+                    data_file.write("\n# comment\n")
+
+
+class TestInferColumnTypes(LoaderTestCase):
+    def test_types(self):
+        self.assertEqual(infer_column_types(self.path), [np.float64, None, np.int64])
+
+    def test_ragged(self):
+        with open(self.path, "a") as data_file:
+            data_file.write("1.0 2.0\n")
+        with self.assertRaises(ValueError):
+            infer_column_types(self.path, num_lines=1000)
+
+
+class TestLoadColumns(LoaderTestCase):
+    def test_numeric_columns(self):
+        # Small blocks, so that the comments and empty lines end up in the middle of a block and on block boundaries
+        for block_bytes in (100, 1 << 20):
+            numbers, counts = load_columns(self.path, block_bytes=block_bytes, cache=False)
+            assert_array_equal(numbers, self.numbers)
+            self.assertEqual(counts.dtype, np.int64)
+            assert_array_equal(counts, self.counts)
+
+    def test_blocks_of_comments(self):
+        path = os.path.join(self.directory, "comments.txt")
+        with open(path, "w") as data_file:
+            data_file.write("1.5 abc 1\n" + "# a run of comments longer than a block\n"*5 + "\n"*50 + "2.5 def 2\n")
+        with warnings.catch_warnings():
+            # np.loadtxt warns about blocks without any data
+            warnings.simplefilter("error")
+            numbers, names, counts = load_columns(path, usecols=(0, 1, 2), block_bytes=40)
+        assert_array_equal(numbers, [1.5, 2.5])
+        assert_array_equal(counts, [1, 2])
+        # Text columns only get the width of their longest entry
+        self.assertEqual(names.dtype, np.dtype("<U3"))
+        assert_array_equal(names, ["abc", "def"])
+
+    def test_same_as_loadtxt(self):
+        expected_res = np.loadtxt(self.path, usecols=(0, 2))
+        assert_almost_equal(np.column_stack(load_columns(self.path, cache=False)), expected_res)
+
+    def test_structured(self):
+        result = load_columns(self.path, usecols=(2, 1), structured=True, names=("count", "name"), cache=False)
+        assert_array_equal(result["count"], self.counts)
+        self.assertEqual(result["name"][499], "name_499")
+
+    def test_integers_turning_into_floats(self):
+        with open(self.path, "a") as data_file:
+            data_file.write("1.0   name  2.5\n")
+        counts = load_columns(self.path, usecols=(2,), block_bytes=100, cache=False)[0]
+        self.assertEqual(counts.dtype, np.float64)
+        assert_array_equal(counts[:-1], self.counts)
+        self.assertEqual(counts[-1], 2.5)
+
+    def test_delimiter(self):
+        path = os.path.join(self.directory, "data.csv")
+        np.savetxt(path, np.column_stack([self.numbers, self.counts]), delimiter=",")
+        numbers, counts = load_columns(path, delimiter=",", cache=False)
+        assert_array_equal(numbers, self.numbers)
+        assert_array_equal(counts, self.counts)
+
+    def test_cache(self):
+        cache_path = self.path + CACHE_SUFFIX
+        expected_res = load_columns(self.path)
+        self.assertTrue(os.path.exists(cache_path))
+
+        # The cache is used instead of the text while the file is unchanged, which we check by changing the cache
+        columns = open_columns(cache_path, mode="r+")
+        columns["column_0"][:] += 1.0
+        columns["column_0"].flush()
+        del columns
+        cached = load_columns(self.path)
+        self.assertIsInstance(cached[0], np.memmap)
+        assert_array_equal(cached[0], expected_res[0] + 1.0)
+        # Another selection of columns is not taken from the cache
+        assert_array_equal(load_columns(self.path, usecols=(0,))[0], self.numbers)
+
+        # Modifying the file invalidates the cache
+        with open(self.path, "a") as data_file:
+            data_file.write("1.0   name  2\n")
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(len(load_columns(self.path)[0]), 501)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,14 @@
+import asyncio
+import time
 import unittest
 import numpy as np
-from .map_reduce_parallel import map_parallel, reduce_parallel, map_reduce_parallel
+from .map_reduce_parallel import map_parallel, imap_parallel, reduce_parallel, map_reduce_parallel, map_slices_parallel, reduce_slices_parallel, amap_parallel, aimap_parallel, areduce_parallel, amap_reduce_parallel
+from fractions import Fraction
+from itertools import count, islice
+from typing import Tuple
+from .autotune import clear_cost_cache
+from .shared_arrays import share_array
+from .worker_pool import WorkerPool, BACKENDS, get_default_pool, get_default_backend, set_default_backend, default_backend
 from numpy.testing import assert_almost_equal
 
 
@@ -12,7 +20,49 @@ def calc_sum(x: np.float32, y: np.float32) -> np.float32:
     return x+y
 
 
-class TestMapMethod(unittest.TestCase):
+def make_pair(x: np.float32) -> tuple:
+    return (x, x)
+
+
+def first_entry(x: np.ndarray) -> np.float32:
+    return x[0]
+
+
+def clip_scale(x: np.float32):
+    return 0 if x < 0 else x*1.5
+
+
+def int_after_pilot(x: np.float32):
+    return int(x) if x < 20 else x/2
+
+
+def get_fractions(size: int) -> np.ndarray:
+    # Exact fractions have no numpy type, so the array holds pointers to Python objects
+    return np.array([Fraction(index, 7) for index in range(size)], dtype=object)
+
+
+def append_entry(cumulative: list, x) -> list:
+    return cumulative + [x]
+
+
+def concat_lists(x: list, y: list) -> list:
+    return x + y
+
+
+class BackendTestCase(unittest.TestCase):
+    # The backend all parallel calls without an explicit pool run on
+    backend = "process"
+
+    def setUp(self):
+        previous_backend = get_default_backend()
+        set_default_backend(self.backend)
+        self.addCleanup(set_default_backend, previous_backend)
+
+    def make_pool(self, max_workers: int) -> WorkerPool:
+        return WorkerPool(max_workers=max_workers, kind="process" if self.backend == "auto" else self.backend)
+
+
+class MapMethodTests:
     def test_single_iterator(self):
         data_list = np.random.exponential(10, size=(100,))
         data_list_result = data_list**2
@@ -45,8 +95,112 @@ class TestMapMethod(unittest.TestCase):
         with self.assertRaises(TypeError):
             map_parallel(calc_sum, data_list_x)
 
+    def test_shared_memory_result_array(self):
+        data_list_x = np.random.exponential(10, size=(1000,))
+        data_list_y = np.random.exponential(20, size=(1000,))
+
+        result = map_parallel(calc_sum, data_list_x, data_list_y)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.dtype, np.float64)
+        assert_almost_equal(result, data_list_x+data_list_y)
+
+    def test_shared_memory_out_dtype(self):
+        data_list = np.arange(100, dtype=np.int32)
+        result = map_parallel(calc_square, data_list, out_dtype=np.float32)
+        self.assertEqual(result.dtype, np.float32)
+        assert_almost_equal(result, data_list.astype(np.float32)**2)
+
+    def test_shared_memory_mixed_result_types(self):
+        # The first result is an int, but the results must not be truncated to ints
+        data_list = np.array([-1.0, 2.5, 3.7, 4.2]*100)
+        result = map_parallel(clip_scale, data_list, min_executor_data_count=50)
+        self.assertEqual(result.dtype, np.float64)
+        assert_almost_equal(result, np.array([0.0, 3.75, 5.55, 6.3]*100))
+
+        # Floats only appear after the entries evaluated to find the type, so the workers have to promote the result
+        data_list = np.arange(200.0)
+        result = map_parallel(int_after_pilot, data_list, min_executor_data_count=20)
+        self.assertEqual(result.dtype, np.float64)
+        assert_almost_equal(result, np.where(data_list < 20, data_list, data_list/2))
+
+    def test_shared_memory_non_scalar_result(self):
+        data_list = np.random.exponential(10, size=(100,))
+        result = map_parallel(make_pair, data_list)
+        self.assertIsInstance(result, list)
+        self.assertEqual(result, [(x, x) for x in data_list])
+
+    def test_vectorized(self):
+        data_list_x = np.random.exponential(10, size=(1000,))
+        data_list_y = np.random.exponential(20, size=(1000,))
+
+        result = map_parallel(calc_sum, data_list_x, data_list_y, vectorized=True)
+        self.assertIsInstance(result, np.ndarray)
+        assert_almost_equal(result, data_list_x+data_list_y)
+
+    def test_vectorized_list_input(self):
+        data_list = [1.0, 2.0, 3.0]
+        result = map_parallel(calc_square, data_list, vectorized=True)
+        assert_almost_equal(result, np.array(data_list)**2)
+
+    def test_vectorized_empty(self):
+        result = map_parallel(calc_square, [], vectorized=True)
+        self.assertEqual(len(result), 0)
+
+    def test_vectorized_scalar_kernel(self):
+        data_list = np.random.exponential(10, size=(100,))
+        with self.assertRaises(ValueError):
+            map_parallel(first_entry, data_list, vectorized=True)
+
+    def test_vectorized_rows(self):
+        data_rows = np.random.exponential(10, size=(300, 7))
+        result = map_parallel(np.square, data_rows, vectorized=True, min_executor_data_count=50)
+        self.assertEqual(result.shape, (300, 7))
+        assert_almost_equal(result, data_rows**2)
+
+    def test_object_input(self):
+        data_list = get_fractions(100)
+        with self.assertRaises(ValueError):
+            share_array(data_list)
+        with self.make_pool(2) as pool:
+            result = map_parallel(calc_square, data_list, pool=pool, min_executor_data_count=10)
+            self.assertEqual(list(result), [x*x for x in data_list])
+            result = map_parallel(calc_square, data_list, pool=pool, min_executor_data_count=10, vectorized=True)
+            self.assertEqual(result.dtype, object)
+            self.assertEqual(list(result), [x*x for x in data_list])
 
-class TestReduceMethod(unittest.TestCase):
+
+class ImapMethodTests:
+    def test_generator_input(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        result = list(imap_parallel(calc_square, (x for x in data_list), chunk_size=64))
+        assert_almost_equal(np.array(result), data_list**2)
+
+    def test_multiple_iterator(self):
+        data_list_x = np.random.exponential(10, size=(100,))
+        data_list_y = np.random.exponential(20, size=(100,))
+        result = list(imap_parallel(calc_sum, data_list_x, data_list_y, chunk_size=7, max_in_flight=1))
+        assert_almost_equal(np.array(result), data_list_x+data_list_y)
+
+    def test_unbounded_input(self):
+        # Only the consumed part of the infinite input may be evaluated
+        results = imap_parallel(calc_square, count(), chunk_size=10, max_in_flight=2)
+        self.assertEqual(list(islice(results, 25)), [x*x for x in range(25)])
+        results.close()
+
+    def test_unordered(self):
+        data_list = list(range(500))
+        result = imap_parallel(calc_square, data_list, chunk_size=16, ordered=False)
+        self.assertEqual(sorted(result), [x*x for x in data_list])
+
+    def test_empty_list(self):
+        self.assertEqual(list(imap_parallel(calc_square, [])), [])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            list(imap_parallel(calc_square, [1, 2], chunk_size=0))
+
+
+class ReduceMethodTests:
     def test_empty_list_initial(self):
         data_list = []
         result_1 = reduce_parallel(calc_sum, calc_sum, data_list, initial=1)
@@ -70,6 +224,57 @@ class TestReduceMethod(unittest.TestCase):
         with self.assertRaises(StopIteration):
             reduce_parallel(calc_sum, calc_sum, data_list)
 
+    def test_vectorized_ufunc(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        result_sum = reduce_parallel(np.add, np.add, data_list, vectorized=True)
+        assert_almost_equal(result_sum, np.sum(data_list))
+
+        result_max = reduce_parallel(np.maximum, np.maximum, data_list, vectorized=True)
+        self.assertEqual(result_max, np.max(data_list))
+
+    def test_combine_orders(self):
+        data_list = list(range(100))
+        with self.make_pool(4) as pool:
+            for combine_order in ("submission", "tree"):
+                # Concatenation is associative but not commutative, so the order of the chunks must be kept
+                result = reduce_parallel(append_entry, concat_lists, data_list, initial=[],
+                                         min_executor_data_count=10, pool=pool, combine_order=combine_order)
+                self.assertEqual(result, data_list)
+
+            result = reduce_parallel(append_entry, concat_lists, data_list, initial=[],
+                                     min_executor_data_count=10, pool=pool, combine_order="completed")
+            self.assertEqual(sorted(result), data_list)
+
+    def test_tree_combine_many_chunks(self):
+        # Enough chunks for several levels of merges, with a segment left over on some levels
+        data_list = list(range(130))
+        for num_chunks in (1, 2, 3, 7, 13):
+            with self.make_pool(num_chunks) as pool:
+                result = reduce_parallel(append_entry, concat_lists, data_list[:num_chunks*10], initial=[],
+                                         min_executor_data_count=10, pool=pool, combine_order="tree")
+            self.assertEqual(result, data_list[:num_chunks*10])
+
+    def test_tree_combine_vectorized(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        with self.make_pool(3) as pool:
+            result = reduce_parallel(np.add, np.add, data_list, min_executor_data_count=10,
+                                     pool=pool, vectorized=True, combine_order="tree")
+        assert_almost_equal(result, np.sum(data_list))
+
+    def test_invalid_combine_order(self):
+        with self.assertRaises(ValueError):
+            reduce_parallel(calc_sum, calc_sum, [1, 2, 3], combine_order="random")
+
+    def test_vectorized_empty_list_initial(self):
+        result = reduce_parallel(np.add, np.add, [], initial=1, vectorized=True)
+        self.assertEqual(result, 1)
+
+    def test_vectorized_object_input(self):
+        data_list = get_fractions(100)
+        with self.make_pool(2) as pool:
+            result = reduce_parallel(np.add, np.add, data_list, min_executor_data_count=10, pool=pool, vectorized=True)
+        self.assertEqual(result, sum(data_list))
+
 
 def power2(x: np.float32) -> np.float32:
     return x**2
@@ -83,7 +288,7 @@ def power7(x: np.float32) -> np.float32:
     return x**7
 
 
-class TestMapReduceMethod(unittest.TestCase):
+class MapReduceMethodTests:
     def test_power_2(self):
         data_list = np.random.exponential(10, size=(100,))
         expected_res = np.sum(data_list**2)
@@ -111,6 +316,326 @@ class TestMapReduceMethod(unittest.TestCase):
             map_reduce_parallel(
             power7, calc_sum, calc_sum, data_list, min_executor_data_count=20)
 
+    def test_fused_multiple_iterators(self):
+        data_list_x = np.random.exponential(1, size=(300,))
+        data_list_y = np.random.exponential(1, size=(300,))
+        expected_res = np.sum(data_list_x+data_list_y)
+        with self.make_pool(3) as pool:
+            # Numpy arrays are read from shared memory, lists are sent to the workers in slices
+            result_arrays = map_reduce_parallel(
+                calc_sum, calc_sum, calc_sum, data_list_x, data_list_y, reduce_initial=0, min_executor_data_count=10, pool=pool)
+            result_lists = map_reduce_parallel(
+                calc_sum, calc_sum, calc_sum, list(data_list_x), list(data_list_y), reduce_initial=0, min_executor_data_count=10, pool=pool)
+        assert_almost_equal(result_arrays, expected_res)
+        assert_almost_equal(result_lists, expected_res)
+
+    def test_fused_without_initial(self):
+        data_list = np.random.exponential(1, size=(100,))
+        expected_res = np.sum(data_list**2)
+        result_1 = map_reduce_parallel(
+            power2, calc_sum, calc_sum, data_list, min_executor_data_count=10)
+        assert_almost_equal(result_1, expected_res)
+
+    def test_tree_combine(self):
+        data_list = np.random.exponential(1, size=(200,))
+        expected_res = np.sum(data_list**2)
+        with self.make_pool(4) as pool:
+            result_1 = map_reduce_parallel(
+                power2, calc_sum, calc_sum, data_list, reduce_initial=0, min_executor_data_count=10, pool=pool, combine_order="tree")
+        assert_almost_equal(result_1, expected_res)
+
+    def test_vectorized(self):
+        data_list = np.random.exponential(1, size=(1000,))
+        expected_res = np.sum(data_list**3)
+        result_1 = map_reduce_parallel(
+            power3, np.add, np.add, data_list, reduce_initial=0, vectorized=True)
+        assert_almost_equal(result_1, expected_res)
+
+    def test_object_input(self):
+        data_list = get_fractions(100)
+        expected_res = sum(x**2 for x in data_list)
+        with self.make_pool(2) as pool:
+            result = map_reduce_parallel(power2, calc_sum, calc_sum, data_list, reduce_initial=0,
+                                         min_executor_data_count=10, pool=pool)
+            self.assertEqual(result, expected_res)
+            result = map_reduce_parallel(power2, np.add, np.add, data_list, reduce_initial=0,
+                                         min_executor_data_count=10, pool=pool, vectorized=True)
+            self.assertEqual(result, expected_res)
+
+
+def central_difference(x: np.ndarray) -> np.ndarray:
+    return x[2:]-x[:-2]
+
+
+def sum_neighbor_products(x: np.ndarray, y: np.ndarray) -> np.float32:
+    return np.sum(x[1:]*y[:-1])
+
+
+class SliceMethodTests:
+    def test_map_halo(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        expected_res = data_list[2:]-data_list[:-2]
+        assert_almost_equal(map_slices_parallel(central_difference, data_list, halo=2), expected_res)
+        with self.make_pool(3) as pool:
+            result = map_slices_parallel(central_difference, data_list, halo=2, min_executor_data_count=10, pool=pool)
+        self.assertIsInstance(result, np.ndarray)
+        assert_almost_equal(result, expected_res)
+
+    def test_reduce_halo(self):
+        data_x = np.random.exponential(10, size=(1000,))
+        data_y = np.random.exponential(10, size=(1000,))
+        expected_res = np.sum(data_x[1:]*data_y[:-1])
+        for combine_order in ("submission", "completed", "tree"):
+            with self.make_pool(3) as pool:
+                result = reduce_slices_parallel(sum_neighbor_products, np.add, data_x, data_y, halo=1,
+                                                min_executor_data_count=10, pool=pool, combine_order=combine_order)
+            assert_almost_equal(result, expected_res)
+
+    def test_short_input(self):
+        self.assertEqual(map_slices_parallel(central_difference, np.arange(2.0), halo=2).shape, (0,))
+        self.assertEqual(reduce_slices_parallel(sum_neighbor_products, np.add, np.ones(1), np.ones(1), halo=1), 0.0)
+        with self.assertRaises(ValueError):
+            map_slices_parallel(central_difference, np.arange(5.0), halo=-1)
+
+
+def slow_square(x: np.float32) -> np.float32:
+    time.sleep(0.2)
+    return x*x
+
+
+async def collect(async_iterator) -> list:
+    return [result async for result in async_iterator]
+
+
+class AsyncMethodTests:
+    def test_map(self):
+        data_list = np.random.exponential(10, size=(100,))
+        result_array = asyncio.run(amap_parallel(calc_square, data_list))
+        result_list = asyncio.run(amap_parallel(make_pair, list(data_list)))
+        assert_almost_equal(result_array, data_list**2)
+        self.assertEqual(result_list, [(x, x) for x in data_list])
+
+        data_list = np.arange(200.0)
+        result_array = asyncio.run(amap_parallel(int_after_pilot, data_list, min_executor_data_count=20))
+        self.assertEqual(result_array.dtype, np.float64)
+        assert_almost_equal(result_array, np.where(data_list < 20, data_list, data_list/2))
+
+    def test_map_vectorized(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        result = asyncio.run(amap_parallel(
+            np.multiply, data_list, data_list, vectorized=True, min_executor_data_count=100))
+        assert_almost_equal(result, data_list**2)
+
+    def test_object_input(self):
+        data_list = get_fractions(100)
+        with self.make_pool(2) as pool:
+            result = asyncio.run(amap_parallel(calc_square, data_list, pool=pool, min_executor_data_count=10, vectorized=True))
+            self.assertEqual(list(result), [x*x for x in data_list])
+            result = asyncio.run(areduce_parallel(np.add, np.add, data_list, pool=pool, min_executor_data_count=10, vectorized=True))
+            self.assertEqual(result, sum(data_list))
+            result = asyncio.run(amap_reduce_parallel(power2, np.add, np.add, data_list, reduce_initial=0,
+                                                      pool=pool, min_executor_data_count=10, vectorized=True))
+            self.assertEqual(result, sum(x**2 for x in data_list))
+
+    def test_imap(self):
+        results = asyncio.run(collect(aimap_parallel(calc_square, range(250), chunk_size=10)))
+        self.assertEqual(results, [x*x for x in range(250)])
+        results = asyncio.run(collect(aimap_parallel(calc_square, range(250), chunk_size=10, ordered=False)))
+        self.assertEqual(sorted(results), [x*x for x in range(250)])
+
+    def test_reduce(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        result = asyncio.run(areduce_parallel(
+            calc_sum, calc_sum, list(data_list), min_executor_data_count=100))
+        result_vectorized = asyncio.run(areduce_parallel(
+            np.add, np.add, data_list, vectorized=True, min_executor_data_count=100))
+        assert_almost_equal(result, np.sum(data_list))
+        assert_almost_equal(result_vectorized, np.sum(data_list))
+
+    def test_reduce_empty(self):
+        self.assertEqual(asyncio.run(areduce_parallel(calc_sum, calc_sum, [], 0)), 0)
+        with self.assertRaises(TypeError):
+            asyncio.run(areduce_parallel(calc_sum, calc_sum, []))
+
+    def test_map_reduce(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        result = asyncio.run(amap_reduce_parallel(
+            power2, calc_sum, calc_sum, data_list, reduce_initial=0, min_executor_data_count=100))
+        result_vectorized = asyncio.run(amap_reduce_parallel(
+            power2, np.add, np.add, data_list, reduce_initial=0, vectorized=True))
+        assert_almost_equal(result, np.sum(data_list**2))
+        assert_almost_equal(result_vectorized, np.sum(data_list**2))
+
+
+# Every test of the parallel functions runs once per backend
+for _tests in (MapMethodTests, ImapMethodTests, ReduceMethodTests, MapReduceMethodTests, SliceMethodTests, AsyncMethodTests):
+    for _backend in BACKENDS:
+        _name = "Test" + _tests.__name__[:-len("Tests")] + _backend.capitalize()
+        globals()[_name] = type(_name, (_tests, BackendTestCase), {"backend": _backend})
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_explicit_pool_reused(self):
+        data_list = np.random.exponential(10, size=(100,))
+        with WorkerPool(max_workers=2) as pool:
+            result_1 = np.array(map_parallel(calc_square, data_list, pool=pool))
+            executor = pool.get_executor()
+            result_2 = reduce_parallel(calc_sum, calc_sum, data_list, pool=pool)
+            # The second call must not have started a new executor
+            self.assertIs(executor, pool.get_executor())
+        self.assertFalse(pool.is_running)
+        assert_almost_equal(result_1, data_list**2)
+        assert_almost_equal(result_2, np.sum(data_list))
+
+    def test_resize(self):
+        data_list = np.random.exponential(10, size=(100,))
+        with WorkerPool(max_workers=1) as pool:
+            pool.warm_up()
+            executor = pool.get_executor()
+            pool.resize(2)
+            self.assertEqual(pool.max_workers, 2)
+            self.assertFalse(pool.is_running)
+            result = map_reduce_parallel(
+                calc_square, calc_sum, calc_sum, data_list, reduce_initial=0, pool=pool)
+            self.assertIsNot(executor, pool.get_executor())
+        assert_almost_equal(result, np.sum(data_list**2))
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            WorkerPool(max_workers=0)
+
+    def test_default_pool_shared(self):
+        self.assertIs(get_default_pool(), get_default_pool())
+        self.assertIs(get_default_pool("thread"), get_default_pool("thread"))
+        self.assertIsNot(get_default_pool("thread"), get_default_pool("process"))
+
+    def test_kinds(self):
+        data_list = np.random.exponential(10, size=(100,))
+        for kind in ("serial", "thread", "process"):
+            with WorkerPool(max_workers=2, kind=kind) as pool:
+                self.assertEqual(pool.kind, kind)
+                self.assertEqual(pool.shares_memory, kind != "process")
+                result = map_parallel(calc_square, data_list, min_executor_data_count=10, pool=pool)
+                assert_almost_equal(result, data_list**2)
+        self.assertEqual(WorkerPool(max_workers=4, kind="serial").max_workers, 1)
+
+    def test_invalid_kind(self):
+        with self.assertRaises(ValueError):
+            WorkerPool(kind="cluster")
+
+
+class TestAsyncControl(unittest.TestCase):
+    def test_timeout(self):
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            with self.assertRaises(asyncio.TimeoutError):
+                asyncio.run(amap_parallel(slow_square, [1, 2, 3, 4], pool=pool,
+                                          min_executor_data_count=1, timeout=0.05))
+
+    def test_cancel(self):
+        async def cancel_map(pool: WorkerPool):
+            task = asyncio.create_task(amap_parallel(
+                slow_square, [1, 2, 3, 4], pool=pool, min_executor_data_count=1))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await task
+
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(cancel_map(pool))
+
+    def test_event_loop_not_blocked(self):
+        async def tick_during_map(pool: WorkerPool):
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(1)
+                    await asyncio.sleep(0.01)
+
+            ticker_task = asyncio.create_task(ticker())
+            result = await amap_parallel(slow_square, [1, 2], pool=pool, min_executor_data_count=1)
+            ticker_task.cancel()
+            return result, len(ticks)
+
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            result, num_ticks = asyncio.run(tick_during_map(pool))
+        self.assertEqual(list(result), [1, 4])
+        self.assertGreater(num_ticks, 5)
+
+
+def slow_cube(x: np.float32) -> np.float32:
+    time.sleep(0.02)
+    return x*x*x
+
+
+def slow_add(x: np.float32, y: np.float32) -> np.float32:
+    time.sleep(0.02)
+    return x+y
+
+
+class TestAsyncPlanning(unittest.TestCase):
+    # Probing the results and the pilot batch of the plan evaluate the functions in the calling process, which must not happen on the event loop.
+    # With 16 pilot entries of 20 ms each, the loop would be blocked for at least 0.3 s
+    def get_longest_pause(self, coroutine_factory) -> Tuple[object, float]:
+        async def tick_during_call():
+            ticks = []
+
+            async def ticker():
+                while True:
+                    ticks.append(time.perf_counter())
+                    await asyncio.sleep(0.01)
+
+            ticker_task = asyncio.create_task(ticker())
+            # Let the ticker start before the call
+            await asyncio.sleep(0)
+            result = await coroutine_factory()
+            ticks.append(time.perf_counter())
+            ticker_task.cancel()
+            return result, max(np.diff(ticks))
+
+        clear_cost_cache()
+        return asyncio.run(tick_during_call())
+
+    def test_map(self):
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            result, longest_pause = self.get_longest_pause(lambda: amap_parallel(slow_cube, np.arange(20.0), pool=pool))
+        assert_almost_equal(result, np.arange(20.0)**3)
+        self.assertLess(longest_pause, 0.2)
+
+    def test_reduce(self):
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            result, longest_pause = self.get_longest_pause(lambda: areduce_parallel(slow_add, calc_sum, list(range(20)), pool=pool))
+        self.assertEqual(result, sum(range(20)))
+        self.assertLess(longest_pause, 0.2)
+
+    def test_map_reduce(self):
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            result, longest_pause = self.get_longest_pause(lambda: amap_reduce_parallel(
+                slow_cube, calc_sum, calc_sum, np.arange(20.0), reduce_initial=0, pool=pool))
+        self.assertEqual(result, np.sum(np.arange(20.0)**3))
+        self.assertLess(longest_pause, 0.2)
+
+
+class TestBackendSetting(unittest.TestCase):
+    def test_default_backend_context(self):
+        previous_backend = get_default_backend()
+        with default_backend("serial"):
+            self.assertEqual(get_default_backend(), "serial")
+        self.assertEqual(get_default_backend(), previous_backend)
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            set_default_backend("cluster")
+        with self.assertRaises(ValueError):
+            map_parallel(calc_square, [1, 2, 3], backend="cluster")
+
+    def test_explicit_backend(self):
+        data_list = np.random.exponential(10, size=(100,))
+        for backend in BACKENDS:
+            result = map_reduce_parallel(
+                power2, calc_sum, calc_sum, data_list, reduce_initial=0, min_executor_data_count=10, backend=backend)
+            assert_almost_equal(result, np.sum(data_list**2))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from .ex_3_3 import get_center_derivative, get_trapezoid_integral
+from .out_of_core import get_center_derivative_chunked, get_trapezoid_integral_chunked, open_samples
+from numpy.testing import assert_almost_equal
+
+
+class OutOfCoreTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        self.data_x = np.sort(np.random.exponential(10, size=(1001,)))
+        self.data_y = np.sin(self.data_x)
+        self.x_path = os.path.join(self.directory, "x.bin")
+        self.y_path = os.path.join(self.directory, "y.bin")
+        self.data_x.tofile(self.x_path)
+        self.data_y.tofile(self.y_path)
+
+
+class TestCenterDerivativeChunked(OutOfCoreTestCase):
+    def test_block_boundaries(self):
+        expected_res = get_center_derivative(self.data_x, self.data_y)
+        # Block sizes that do and do not divide the number of derivatives
+        for block_size in (1, 7, 999, 5000):
+            result = get_center_derivative_chunked(
+                self.data_x, self.data_y, block_size=block_size)
+            assert_almost_equal(result, expected_res)
+
+    def test_files(self):
+        out_path = os.path.join(self.directory, "derivative.bin")
+        result = get_center_derivative_chunked(
+            self.x_path, self.y_path, out=out_path, block_size=100)
+        self.assertIsInstance(result, np.memmap)
+        del result
+
+        expected_res = get_center_derivative(self.data_x, self.data_y)
+        assert_almost_equal(np.fromfile(out_path), expected_res)
+
+    def test_output_memmap(self):
+        output = np.memmap(os.path.join(self.directory, "out.bin"),
+                           dtype=np.float32, mode="w+", shape=(999,))
+        result = get_center_derivative_chunked(
+            open_samples(self.x_path), open_samples(self.y_path), out=output, block_size=64)
+        self.assertIs(result, output)
+        assert_almost_equal(result, get_center_derivative(self.data_x, self.data_y), decimal=3)
+
+    def test_unsorted(self):
+        with self.assertRaises(ValueError):
+            get_center_derivative_chunked(self.data_x[::-1], self.data_y, block_size=64)
+
+
+class TestTrapezoidIntegralChunked(OutOfCoreTestCase):
+    def test_block_boundaries(self):
+        expected_res = get_trapezoid_integral(self.data_x, self.data_y)
+        for block_size in (1, 7, 1000, 5000):
+            result = get_trapezoid_integral_chunked(
+                self.x_path, self.y_path, block_size=block_size)
+            assert_almost_equal(result, expected_res)
+
+    def test_float32_files(self):
+        self.data_x.astype(np.float32).tofile(self.x_path)
+        self.data_y.astype(np.float32).tofile(self.y_path)
+        result = get_trapezoid_integral_chunked(
+            self.x_path, self.y_path, dtype=np.float32, block_size=100)
+        assert_almost_equal(result, get_trapezoid_integral(self.data_x, self.data_y), decimal=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from .map_reduce_parallel import map_parallel, reduce_parallel, map_reduce_parallel
+from .profiling import profile_calls, begin_call, export_chrome_trace, to_chrome_trace
+from .worker_pool import WorkerPool
+from numpy.testing import assert_almost_equal
+
+
+def calc_square(x: np.float32) -> np.float32:
+    return x*x
+
+
+def calc_sum(x: np.float32, y: np.float32) -> np.float32:
+    return x+y
+
+
+class TestCallProfile(unittest.TestCase):
+    def test_disabled_by_default(self):
+        self.assertIsNone(begin_call("map_parallel", None))
+
+    def test_callback_per_chunk(self):
+        data_list = list(np.random.exponential(10, size=(1000,)))
+        profiles = []
+        with WorkerPool(max_workers=2) as pool:
+            result = map_parallel(calc_square, data_list, pool=pool,
+                                  min_executor_data_count=100, profile=profiles.append)
+        assert_almost_equal(np.array(result), np.array(data_list)**2)
+
+        self.assertEqual(len(profiles), 1)
+        call_profile = profiles[0]
+        self.assertEqual(call_profile.name, "map_parallel")
+        self.assertEqual(call_profile.backend, "process")
+        self.assertEqual(len(call_profile.chunks), call_profile.num_chunks)
+        self.assertEqual(sorted(chunk.index for chunk in call_profile.chunks),
+                         list(range(call_profile.num_chunks)))
+        # Process pools pickle every chunk and its result
+        self.assertGreater(call_profile.bytes_serialized, 0)
+        self.assertTrue(all(chunk.queue_wait >= 0.0 for chunk in call_profile.chunks))
+
+        phase_names = {phase.name for phase in call_profile.phases}
+        for name in ("prepare", "plan", "start_workers", "pickle", "collect"):
+            self.assertIn(name, phase_names)
+        summary = call_profile.summary()
+        self.assertGreaterEqual(summary["duration"], summary["collect"])
+
+    def test_context_collects_all_calls(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            with profile_calls() as profiles:
+                reduce_parallel(np.add, calc_sum, data_list, pool=pool,
+                                vectorized=True, min_executor_data_count=100, combine_order="tree")
+                map_reduce_parallel(calc_square, calc_sum, calc_sum, data_list,
+                                    reduce_initial=0, pool=pool, min_executor_data_count=100)
+            map_parallel(calc_square, data_list, pool=pool)
+
+        self.assertEqual([call_profile.name for call_profile in profiles],
+                         ["reduce_parallel", "map_reduce_parallel"])
+        for call_profile in profiles:
+            self.assertEqual(len(call_profile.chunks), 2)
+            # Threads share the data, nothing is pickled
+            self.assertEqual(call_profile.bytes_serialized, 0)
+            self.assertIn("combine", {phase.name for phase in call_profile.phases})
+
+    def test_chrome_trace(self):
+        data_list = np.random.exponential(10, size=(1000,))
+        with WorkerPool(max_workers=2, kind="thread") as pool:
+            with profile_calls() as profiles:
+                map_parallel(calc_square, data_list, pool=pool, min_executor_data_count=100)
+
+        trace = to_chrome_trace(profiles)
+        categories = [event["cat"] for event in trace["traceEvents"]]
+        self.assertEqual(categories.count("call"), 1)
+        self.assertEqual(categories.count("chunk"), 2)
+        for event in trace["traceEvents"]:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["dur"], 0.0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            export_chrome_trace(profiles, path)
+            with open(path) as trace_file:
+                self.assertEqual(json.load(trace_file), json.loads(json.dumps(trace)))
+
+
+if __name__ == '__main__':
+    unittest.main()
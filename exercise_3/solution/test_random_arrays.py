@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from .random_arrays import fill_normal, get_normal_array, get_seed_sequence, iter_normal_blocks
+from .worker_pool import WorkerPool
+from numpy.testing import assert_array_equal
+
+
+class TestNormalArray(unittest.TestCase):
+    def test_independent_of_workers(self):
+        expected_res = get_normal_array(100000, seed=42, block_size=1000, pool=WorkerPool(kind="serial"))
+        for max_workers in (1, 3, 8):
+            with WorkerPool(max_workers=max_workers, kind="thread") as pool:
+                assert_array_equal(get_normal_array(100000, seed=42, block_size=1000, pool=pool), expected_res)
+        assert_array_equal(get_normal_array(100000, seed=get_seed_sequence(42), block_size=1000), expected_res)
+        self.assertFalse(np.array_equal(get_normal_array(100000, seed=43, block_size=1000), expected_res))
+
+    def test_distribution(self):
+        result = get_normal_array((2, 500000), mean=3.0, sigma=0.5, seed=1)
+        self.assertEqual(result.shape, (2, 500000))
+        self.assertAlmostEqual(np.mean(result), 3.0, places=2)
+        self.assertAlmostEqual(np.std(result), 0.5, places=2)
+
+    def test_float32(self):
+        result = get_normal_array(10000, mean=1.0, sigma=2.0, seed=7, dtype=np.float32)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertAlmostEqual(float(np.mean(result)), 1.0, places=1)
+
+    def test_memmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            out = np.memmap(os.path.join(directory, "random.bin"), dtype=np.float64, mode="w+", shape=(5000,))
+            fill_normal(out, seed=5, block_size=700)
+            assert_array_equal(out, get_normal_array(5000, seed=5, block_size=700))
+            del out
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            fill_normal(np.empty(10, dtype=np.int64))
+        with self.assertRaises(ValueError):
+            fill_normal(np.empty((10, 10))[:, ::2])
+        with WorkerPool(kind="process") as pool:
+            with self.assertRaises(ValueError):
+                fill_normal(np.empty(10), pool=pool)
+
+
+class TestNormalBlocks(unittest.TestCase):
+    def test_same_as_array(self):
+        expected_res = get_normal_array(10001, mean=-1.0, sigma=3.0, seed=11, block_size=100)
+        chunks = list(iter_normal_blocks(10001, mean=-1.0, sigma=3.0, seed=11, block_size=100, blocks_per_chunk=7))
+        self.assertTrue(all(len(chunk) <= 700 for chunk in chunks))
+        assert_array_equal(np.concatenate(chunks), expected_res)
+
+    def test_empty(self):
+        self.assertEqual(list(iter_normal_blocks(0, seed=1)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
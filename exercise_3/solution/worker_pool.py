@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+
+import atexit
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, BrokenExecutor
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from typing import Callable, Dict, Iterator, Optional
+
+# The kinds of workers a WorkerPool can consist of
+POOL_KINDS = ("serial", "thread", "process")
+# The backends that can be selected for the parallel functions. "auto" chooses one of the pool kinds per call
+BACKENDS = POOL_KINDS + ("auto",)
+
+
+def _noop() -> int:
+    return os.getpid()
+
+
+class _SerialExecutor(Executor):
+    # Runs every task immediately in the calling thread, so that serial execution can use the same code paths as the pools
+
+    def submit(self, func, /, *args, **kwargs) -> Future:
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as exception:
+            future.set_exception(exception)
+        return future
+
+
+class WorkerPool:
+    """A long-lived pool of worker processes that can be shared across many parallel calls
+
+    Starting worker processes (and importing numpy in each of them) is expensive.
+    A WorkerPool creates its executor lazily on first use and then keeps it alive, so this fixed cost is paid once instead of once per call.
+    The pool can be used as a context manager, in which case it is shut down when the context is left.
+    Instead of processes, the pool can also consist of threads, which avoids all pickling for functions that release the GIL like most numpy kernels,
+    or run everything serially in the calling thread.
+
+    Parameters
+    ----------
+    max_workers: int, optional
+        The maximum number of worker processes in the pool. Defaults to the number of logical CPU cores. Always 1 for serial pools.
+    kind: str, optional
+        The kind of workers, one of "process", "thread" or "serial". Default: "process"
+
+    See also
+    --------
+    get_default_pool: For the module-level pool used when no pool is provided explicitly
+
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, kind: str = "process"):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if kind not in POOL_KINDS:
+            raise ValueError("kind must be one of {}, got {!r}".format(
+                POOL_KINDS, kind))
+
+        self._kind = kind
+        self._max_workers: int = 1 if kind == "serial" else max_workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+        # Protects the creation and replacement of the executor if the pool is used from multiple threads
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
+
+    @property
+    def max_workers(self) -> int:
+        """The maximum number of worker processes in this pool"""
+        return self._max_workers
+
+    @property
+    def kind(self) -> str:
+        """The kind of workers in this pool, one of "process", "thread" or "serial"."""
+        return self._kind
+
+    @property
+    def shares_memory(self) -> bool:
+        """Whether the workers run in the calling process and can therefore access its arrays directly"""
+        return self._kind != "process"
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker processes of this pool have been started and not shut down yet"""
+        return self._executor is not None
+
+    def _create_executor(self) -> Executor:
+        if self._kind == "serial":
+            return _SerialExecutor()
+        if self._kind == "thread":
+            return ThreadPoolExecutor(max_workers=self._max_workers)
+
+        # Workers must inherit the resource tracker of this process. Otherwise each worker would start its own
+        # tracker, which would try to free shared memory blocks the workers attached to but do not own
+        resource_tracker.ensure_running()
+        return ProcessPoolExecutor(max_workers=self._max_workers)
+
+    def get_executor(self) -> Executor:
+        """Function to obtain the executor of this pool, starting it if it is not running yet
+
+        Returns
+        --------
+        Executor
+            The executor backing this pool
+
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """Function to schedule `func`(*args, **kwargs) on one of the workers of this pool
+
+        If the pool has been broken by a worker process dying, the pool is restarted once before giving up.
+
+        Parameters
+        ----------
+        func: Callable
+            The function to be executed. Must be picklable.
+        *args, **kwargs
+            The arguments to be passed to `func`
+
+        Returns
+        --------
+        Future
+            The future representing the pending result of the call
+
+        """
+        executor = self.get_executor()
+        try:
+            return executor.submit(func, *args, **kwargs)
+        except BrokenExecutor:
+            self._reset(executor)
+            return self.get_executor().submit(func, *args, **kwargs)
+
+    def _reset(self, broken_executor: Executor) -> None:
+        with self._lock:
+            # Another thread might already have replaced the broken executor
+            if self._executor is broken_executor:
+                self._executor = None
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self) -> None:
+        """Function to start all worker processes now instead of on the first call
+
+        Blocks until every worker has run a trivial task.
+        """
+        futures = [self.submit(_noop) for _ in range(self._max_workers)]
+        for future in futures:
+            future.result()
+
+    def resize(self, max_workers: int) -> None:
+        """Function to change the maximum number of worker processes of this pool
+
+        If the cap changes, the currently running workers are shut down after finishing their pending work.
+        The new workers will be started lazily on the next use.
+
+        Parameters
+        ----------
+        max_workers: int
+            The new maximum number of worker processes. Must be at least 1.
+
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        if max_workers == self._max_workers or self._kind == "serial":
+            return
+
+        with self._lock:
+            old_executor = self._executor
+            self._executor = None
+            self._max_workers = max_workers
+
+        if old_executor is not None:
+            old_executor.shutdown(wait=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Function to stop all worker processes of this pool
+
+        The pool can still be used afterwards, it will then be restarted lazily.
+
+        Parameters
+        ----------
+        wait: bool, optional
+            Whether to block until all pending work has been finished. Default: True
+
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_default_pools: Dict[str, WorkerPool] = {}
+_default_pool_lock = threading.Lock()
+
+_default_backend = "auto"
+
+
+def get_default_pool(kind: str = "process") -> WorkerPool:
+    """Function to obtain the module-level WorkerPool of the given kind shared by all parallel calls that do not provide their own pool
+
+    The pool is created on first use and shut down automatically when the interpreter exits.
+
+    Parameters
+    ----------
+    kind: str, optional
+        The kind of workers, one of "process", "thread" or "serial". Default: "process"
+
+    Returns
+    --------
+    WorkerPool
+        The shared default pool of that kind
+
+    """
+    with _default_pool_lock:
+        if kind not in _default_pools:
+            _default_pools[kind] = WorkerPool(kind=kind)
+        return _default_pools[kind]
+
+
+def shutdown_default_pool(wait: bool = True) -> None:
+    """Function to shut down all module-level default pools that have been started
+
+    Parameters
+    ----------
+    wait: bool, optional
+        Whether to block until all pending work has been finished. Default: True
+
+    """
+    with _default_pool_lock:
+        pools = list(_default_pools.values())
+
+    for pool in pools:
+        pool.shutdown(wait=wait)
+
+
+def get_default_backend() -> str:
+    """Function to obtain the backend used by the parallel functions if none is provided explicitly
+
+    Returns
+    --------
+    str
+        One of "serial", "thread", "process" or "auto"
+
+    """
+    return _default_backend
+
+
+def set_default_backend(backend: str) -> None:
+    """Function to set the backend used by the parallel functions if none is provided explicitly
+
+    Parameters
+    ----------
+    backend: str
+        One of "serial", "thread", "process" or "auto"
+
+    Raises
+    --------
+    ValueError
+        If the backend is not known
+
+    """
+    global _default_backend
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of {}, got {!r}".format(
+            BACKENDS, backend))
+    _default_backend = backend
+
+
+@contextmanager
+def default_backend(backend: str) -> Iterator[None]:
+    """Context manager to temporarily set the backend used by the parallel functions if none is provided explicitly
+
+    Parameters
+    ----------
+    backend: str
+        One of "serial", "thread", "process" or "auto"
+
+    """
+    previous_backend = get_default_backend()
+    set_default_backend(backend)
+    try:
+        yield
+    finally:
+        set_default_backend(previous_backend)
+
+
+atexit.register(shutdown_default_pool)